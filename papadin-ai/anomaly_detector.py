@@ -4,28 +4,30 @@ Anomaly Detection - Detects unusual stock patterns
 Uses Isolation Forest (unsupervised ML)
 """
 
-import numpy as np
-import pandas as pd
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import pickle
 import os
 
+from stock_table import StockTable
+from metrics import stage
+from model_artifacts import (
+    write_artifact, read_artifact, scaler_arrays, scaler_from_arrays,
+    forest_arrays, forest_from_arrays
+)
+
 class StockAnomalyDetector:
-    def __init__(self, contamination=0.1):
+    def __init__(self, contamination=0.1, n_jobs=None):
         self.contamination = contamination
-        self.model = IsolationForest(contamination=contamination, random_state=42)
+        self.model = IsolationForest(contamination=contamination, random_state=42, n_jobs=n_jobs)
         self.scaler = StandardScaler()
         self.features = ['order', 'baki', 'stockIn', 'usage_rate', 'stock_loss_pct']
     
+    @stage('features', 'anomaly')
     def prepare_features(self, stock_data):
-        """Engineer features"""
-        df = pd.DataFrame(stock_data)
-        df['tarikh'] = pd.to_datetime(df['tarikh'])
-        for col in ['stockIn', 'baki', 'order']:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        
-        df = df.sort_values(['outlet', 'item', 'tarikh'])
+        """Engineer features (records or a shared StockTable)"""
+        # Typed columns, already sorted by outlet, item, tarikh
+        df = StockTable.coerce(stock_data).to_frame()
         
         # Calculate features
         df['usage_rate'] = (df['stockIn'] - df['baki']) / (df['stockIn'] + 1)
@@ -33,8 +35,8 @@ class StockAnomalyDetector:
         
         return df
     
-    def train(self, stock_data):
-        """Train detector"""
+    def train(self, stock_data, save=True):
+        """Train detector (save=False when publishing to the registry)"""
         print("🔍 Training anomaly detector...")
         df = self.prepare_features(stock_data)
         X = self.scaler.fit_transform(df[self.features])
@@ -43,26 +45,40 @@ class StockAnomalyDetector:
         n_anomalies = sum(predictions == -1)
         print(f"✅ Found {n_anomalies} anomalies")
         
-        self.save_model()
+        if save:
+            self.save_model()
         return {'success': True, 'anomalies': int(n_anomalies)}
     
     def detect(self, stock_data):
         """Detect anomalies"""
         df = self.prepare_features(stock_data)
-        X = self.scaler.transform(df[self.features])
-        predictions = self.model.predict(X)
+        with stage('inference', 'anomaly'):
+            X = self.scaler.transform(df[self.features])
+            predictions = self.model.predict(X)
         
         df['is_anomaly'] = predictions == -1
         anomalies = df[df['is_anomaly']][['tarikh', 'outlet', 'item', 'order', 'baki']]
         
         return {'success': True, 'anomalies': anomalies.to_dict('records')}
     
-    def save_model(self):
-        os.makedirs("models/anomaly", exist_ok=True)
-        with open("models/anomaly/detector.pkl", 'wb') as f:
-            pickle.dump({'model': self.model, 'scaler': self.scaler}, f)
+    def save_model(self, directory="models/anomaly"):
+        """Save detector (forest nodes and scaler as raw arrays)"""
+        arrays, meta = forest_arrays(self.model, 'forest')
+        scaler_data, scaler_meta = scaler_arrays(self.scaler, 'scaler')
+        arrays.update(scaler_data)
+        meta.update(scaler_meta)
+        meta['contamination'] = self.contamination
+        write_artifact(os.path.join(directory, "detector.bin"), arrays, meta)
     
-    def load_model(self):
-        with open("models/anomaly/detector.pkl", 'rb') as f:
+    def load_model(self, directory="models/anomaly"):
+        """Load detector (memory-mapped; older pickles still load)"""
+        artifact_path = os.path.join(directory, "detector.bin")
+        if os.path.exists(artifact_path):
+            arrays, meta = read_artifact(artifact_path)
+            self.model = forest_from_arrays(arrays, meta, 'forest')
+            self.scaler = scaler_from_arrays(arrays, meta, 'scaler')
+            self.contamination = meta['contamination']
+            return
+        with open(os.path.join(directory, "detector.pkl"), 'rb') as f:
             data = pickle.load(f)
             self.model, self.scaler = data['model'], data['scaler']
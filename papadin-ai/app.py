@@ -8,51 +8,244 @@ Advanced Papadin AI Backend with 5 AI/ML Features:
 5. Recommendation Engine
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from openai import OpenAI
 import os
+import time
+import pandas as pd
 from dotenv import load_dotenv
-import requests
 
-# Import AI modules
-from lstm_predictor import LSTMTrainer
-from receipt_scanner import ReceiptScanner, AdvancedReceiptProcessor
+# AI modules (torch, sklearn, OpenCV, OpenAI) are imported on first use
+# through lazy_backends / the model registry, not here
 # COMMENTED OUT - NLP Chatbot (optional feature)
 # from finetuned_chatbot import FinetunedChatbot, HybridChatbot
-from anomaly_detector import StockAnomalyDetector
-from recommendation_engine import OrderRecommendationEngine
-from ml_model import StockPredictor  # Original Random Forest model
+from stock_cache import StockSnapshotCache, PartitionedStockCache
+from feature_state import FeatureStateStore
+from backend_client import BackendClient
+from training_jobs import JobConflict, TrainingJobQueue
+from parallel_training import train_all_parallel
+from backtest import run_backtest
+from model_registry import ModelRegistry
+from lazy_backends import BackendRegistry, lazy_class
+from result_cache import ResultCache
+import metrics
 
 load_dotenv()
 
+class TimedJSONProvider(DefaultJSONProvider):
+    """jsonify() with the encode time recorded as the serialization stage"""
+    
+    def response(self, *args, **kwargs):
+        with metrics.stage('serialization', 'flask'):
+            return super().response(*args, **kwargs)
+
 app = Flask(__name__)
+app.json = TimedJSONProvider(app)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=api_key) if api_key else None
 
-# Initialize AI models
-lstm_trainer = LSTMTrainer()
-receipt_scanner = ReceiptScanner()
+def openai_client():
+    if not api_key:
+        return None
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
+
+# Non-model backends, each imported and constructed on first use
+backends = BackendRegistry()
+backends.register('openai', openai_client)
+backends.register('receipt_scanner', lazy_class('receipt_scanner', 'ReceiptScanner'))
 # COMMENTED OUT - NLP Chatbot (optional)
 # finetuned_chatbot = FinetunedChatbot()
-anomaly_detector = StockAnomalyDetector()
-recommendation_engine = OrderRecommendationEngine()
-rf_predictor = StockPredictor()  # Original model
+
+# Trained models are served from the versioned registry and hot-swapped
+# when a new version is published; a model's module is imported when the
+# model is first loaded
+model_registry = ModelRegistry(os.getenv("MODEL_REGISTRY_DIR", "models/registry"))
+model_registry.register('random_forest', lazy_class('ml_model', 'StockPredictor'))  # Original model
+model_registry.register('lstm', lazy_class('lstm_predictor', 'LSTMTrainer'))
+model_registry.register('anomaly', lazy_class('anomaly_detector', 'StockAnomalyDetector'))
+model_registry.register('recommendation', lazy_class('recommendation_engine', 'OrderRecommendationEngine'))
+
+# Endpoint responses keyed by (endpoint, model, outlet, data version, model version)
+result_cache = ResultCache(
+    maxsize=int(os.getenv("RESULT_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("RESULT_CACHE_TTL", 300))
+)
+
+def warmup_names(setting):
+    """
+    WARMUP_BACKENDS: "all" (default), "none", or a comma list of backend
+    and model names to load on a background thread after startup;
+    everything else loads on its first request
+    """
+    setting = setting.strip().lower()
+    if setting == 'none':
+        return [], []
+    if setting == 'all':
+        return None, None
+    names = [name.strip() for name in setting.split(',') if name.strip()]
+    return [name for name in names if name in backends], [name for name in names if name in model_registry]
+
+# Training runs here, off the request threads; one job at a time.
+# Backtests only read the data and served models, so they get their own
+# worker instead of queueing behind a long training run
+training_jobs = TrainingJobQueue(max_workers=1)
+backtest_jobs = TrainingJobQueue(max_workers=1)
 
 NODEJS_BACKEND = "http://localhost:5001"
 
-def get_stock_data():
-    """Fetch stock data from Node.js backend"""
-    try:
-        response = requests.get(f"{NODEJS_BACKEND}/get-stock", timeout=5)
-        if response.status_code == 200:
-            return response.json().get('data', [])
-        return []
-    except Exception as e:
-        print(f"Error fetching stock: {e}")
-        return []
+# Keep-alive pool sized to gunicorn's 8 threads
+backend = BackendClient(NODEJS_BACKEND, pool_size=8, timeout=5)
+
+def fetch_stock(since=None):
+    """Fetch stock data from Node.js backend (only changes after `since` if given)"""
+    return backend.fetch_stock(since=since)
+
+# Serving state, created by init_serving()
+stock_cache = None
+outlet_cache = None
+feature_store = None
+
+def init_serving():
+    """
+    Serving-only setup: stock caches, feature store, cache invalidation
+    listeners and the background warm-up of models and backends
+    
+    Called by the entry points (python app.py below, wsgi.py under
+    gunicorn), never on import: the training and backtest pools spawn
+    workers that re-import the main module, and those must not build
+    caches, start warm-up threads or load every registry model.
+    """
+    global stock_cache, outlet_cache, feature_store
+    if stock_cache is not None:
+        return
+    
+    stock_cache = StockSnapshotCache(
+        fetch_stock,
+        ttl=float(os.getenv("STOCK_CACHE_TTL", 30)),
+        full_resync_interval=float(os.getenv("STOCK_FULL_RESYNC", 600))
+    )
+    
+    # Per-outlet partitions for the per-outlet endpoints (server-side outlet query)
+    outlet_cache = PartitionedStockCache(
+        lambda outlet, since=None: backend.fetch_stock(since=since, outlet=outlet),
+        ttl=stock_cache.ttl,
+        full_resync_interval=stock_cache.full_resync_interval
+    )
+    
+    # Latest lag/rolling features per (outlet, item), updated by each outlet sync
+    feature_store = FeatureStateStore()
+    outlet_cache.on_change(feature_store.on_sync)
+    model_registry.on_publish(lambda name, version: result_cache.invalidate_model(name))
+    
+    warmup_backends, warmup_models = warmup_names(os.getenv("WARMUP_BACKENDS", "all"))
+    model_registry.warm_start(background=True, names=warmup_models)
+    backends.warm_up(warmup_backends, background=True)
+
+def get_stock_table():
+    """Typed StockTable for the current snapshot, parsed once per data version"""
+    return stock_cache.get().table
+
+def train_and_publish(name, stock_data, progress=None, from_current=False, **kwargs):
+    """
+    Train an instance off to the side (fresh, or a copy of the served version
+    for incremental training), then publish it as a new version
+    """
+    model = model_registry.create(name, from_current=from_current)
+    if progress is not None:
+        kwargs['progress'] = progress
+    with TRAINING_SECONDS.time(model=name):
+        results = model.train(stock_data, save=False, **kwargs)
+        version = model_registry.publish(name, model)
+    return {**results, 'version': version}
+
+def parse_as_of(data):
+    """
+    Optional "as_of" date (YYYY-MM-DD) of a predict request: predictions
+    are then for that day, from the history before it
+    """
+    as_of = (data or {}).get('as_of')
+    return pd.Timestamp(as_of).normalize() if as_of else None
+
+# ========== METRICS ==========
+
+REQUEST_SECONDS = metrics.Histogram(
+    'papadin_request_seconds', 'HTTP request latency by route',
+    ['route', 'method', 'status']
+)
+TRAINING_SECONDS = metrics.Histogram(
+    'papadin_training_seconds', 'Model training and publish time',
+    ['model'], buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+)
+metrics.Gauge(
+    'papadin_model_loaded', 'Whether the model is loaded and serving (1) or not (0)', ['model']
+).set_function(lambda: {
+    (name,): int(info['status'] == 'loaded') for name, info in model_registry.status().items()
+})
+metrics.Gauge(
+    'papadin_model_load_seconds', 'Time taken to load the served model version', ['model']
+).set_function(lambda: {
+    (name,): info['load_seconds'] for name, info in model_registry.status().items()
+})
+metrics.Gauge(
+    'papadin_result_cache_entries', 'Entries in the prediction result cache'
+).set_function(lambda: len(result_cache))
+metrics.Counter(
+    'papadin_result_cache_lookups_total', 'Result cache lookups by outcome', ['result']
+).set_function(lambda: {('hit',): result_cache.hits, ('miss',): result_cache.misses})
+metrics.Gauge(
+    'papadin_stock_cache_version', 'Version of the current stock snapshot'
+).set_function(lambda: stock_cache.version)
+metrics.Gauge(
+    'papadin_stock_cache_outlet_partitions', 'Per-outlet stock partitions held in memory'
+).set_function(lambda: len(outlet_cache))
+metrics.Gauge(
+    'papadin_training_queue_depth', 'Training jobs queued or running'
+).set_function(training_jobs.depth)
+metrics.Gauge(
+    'papadin_backtest_queue_depth', 'Backtest jobs queued or running'
+).set_function(backtest_jobs.depth)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            route=route, method=request.method, status=response.status_code
+        )
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition of latency histograms and gauges"""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+def job_accepted(job, created, message):
+    """202 response for a submitted (or already running) training job"""
+    return jsonify({
+        "success": True,
+        "message": message if created else "Training already in progress",
+        "job_id": job.id,
+        "deduplicated": not created,
+        "status_url": f"/ml/jobs/{job.id}"
+    }), 202
+
+def job_conflict(error):
+    """409 response when the model already has an active job with other options"""
+    return jsonify({
+        "success": False,
+        "error": str(error),
+        "job_id": error.job.id,
+        "status_url": f"/ml/jobs/{error.job.id}"
+    }), 409
 
 @app.route('/')
 def home():
@@ -74,19 +267,46 @@ def home():
 
 @app.route('/ml/status', methods=['GET'])
 def ml_status():
-    """Check if ML model is trained"""
-    import os
-    model_exists = os.path.exists("models/stock_predictor.pkl")
+    """Check if ML model is trained, plus version/load details per model"""
+    model_registry.load('random_forest')
+    models = model_registry.status()
+    model_ready = models['random_forest']['status'] == 'loaded'
     return jsonify({
-        "model_trained": model_exists,
-        "message": "Model ready" if model_exists else "Train model first"
+        "model_trained": model_ready,
+        "message": "Model ready" if model_ready else "Train model first",
+        "models": models,
+        "backends": backends.status()
     })
 
 @app.route('/ml/train', methods=['POST'])
 def train_model():
-    """Train the Random Forest model"""
+    """
+    Queue Random Forest training (poll /ml/jobs/<id> for the metrics)
+    
+    Body (optional): {"mode": "incremental", "window_days": 30,
+    "new_trees": 25, "max_trees": 100} warm-starts new trees on recent
+    data instead of refitting the whole forest;
+    {"backend": "hist_gradient_boosting"} trains a gradient boosting model
+    (early stopping) instead of the Random Forest
+    """
     try:
-        stock_data = get_stock_data()
+        data = request.get_json(silent=True) or {}
+        options = {}
+        if data.get('mode') == 'incremental':
+            options = {'incremental': True, 'from_current': True}
+            for key in ('window_days', 'new_trees', 'max_trees'):
+                if key in data:
+                    options[key] = int(data[key])
+        if 'backend' in data:
+            from ml_model import BACKENDS
+            if data['backend'] not in BACKENDS:
+                return jsonify({
+                    "success": False,
+                    "error": f"Unknown backend: {data['backend']}. Choose from {', '.join(BACKENDS)}"
+                }), 400
+            options['backend'] = data['backend']
+        
+        stock_data = get_stock_table()
         
         if len(stock_data) < 30:
             return jsonify({
@@ -94,76 +314,64 @@ def train_model():
                 "error": f"Need at least 30 records for training. Got {len(stock_data)}"
             }), 400
         
-        metrics = rf_predictor.train(stock_data)
-        
-        return jsonify({
-            "success": True,
-            "message": "Model trained successfully!",
-            "metrics": metrics
-        })
+        job, created = training_jobs.submit('random_forest', train_and_publish, 'random_forest',
+                                            stock_data, **options)
+        return job_accepted(job, created, "Random Forest training started")
+    except JobConflict as e:
+        return job_conflict(e)
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/ml/jobs/<job_id>', methods=['GET'])
+def training_job_status(job_id):
+    """Progress (stage, epoch, loss) and final metrics of a training job"""
+    job = training_jobs.get(job_id) or backtest_jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify({"success": True, **job.to_dict()})
+
 @app.route('/ml/predict-all', methods=['POST'])
 def predict_all():
-    """Get predictions for all items"""
+    """Get predictions for all items (for today, or for body "as_of")"""
     try:
         data = request.json
         outlet = data.get('outlet')
+        as_of = parse_as_of(data)
         
-        stock_data = get_stock_data()
-        
-        # Filter outlet data and convert types
-        outlet_data = []
-        for item in stock_data:
-            if item.get('outlet') == outlet:
-                try:
-                    item['stockIn'] = float(item.get('stockIn', 0))
-                    item['baki'] = float(item.get('baki', 0))
-                    item['order'] = float(item.get('order', 0))
-                    outlet_data.append(item)
-                except (ValueError, TypeError):
-                    continue
-        
-        if not outlet_data:
-            return jsonify({"success": False, "error": "No data for outlet"}), 404
+        # Syncing the partition also brings the feature store up to date
+        snapshot = outlet_cache.get(outlet) if outlet else None
         
-        # Prepare data
-        df = rf_predictor.prepare_data(outlet_data)
-        df = rf_predictor.create_features(df)
+        if not snapshot:
+            return jsonify({"success": False, "error": "No data for outlet"}), 404
         
-        # Get unique items
-        items = df['item'].unique()
+        rf_predictor, model_version = model_registry.get_versioned('random_forest')
+        # Today's rows come from the feature store, which may still be
+        # applying a snapshot another request just synced: key on the
+        # version its rows were built from
+        data_version = snapshot.version if as_of is not None else feature_store.version(outlet)
+        cache_key = ResultCache.make_key('predict-all', 'random_forest', outlet,
+                                         data_version, model_version, as_of)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(cached)
+        
+        if as_of is None:
+            # Latest feature row of each item, read from the ring buffers
+            latest_rows, data_version = feature_store.latest_rows(outlet)
+            cache_key = ResultCache.make_key('predict-all', 'random_forest', outlet,
+                                             data_version, model_version, as_of)
+        else:
+            latest_rows = rf_predictor.latest_features(snapshot.table, as_of=as_of)
         
-        predictions = []
-        for item_name in items:
-            item_df = df[df['item'] == item_name].sort_values('tarikh')
-            
-            if len(item_df) > 0:
-                # SIMPLEST FIX: Convert Series to dict directly
-                latest_row = item_df.iloc[-1]
-                latest_dict = latest_row.to_dict()  # ✅ This works!
-                
-                # Ensure all values are float
-                for key in ['stockIn', 'baki', 'order', 'prev_order_1day', 
-                           'prev_order_3day', 'prev_order_7day', 'avg_order_7day',
-                           'avg_order_30day', 'prev_baki', 'prev_stockIn']:
-                    if key in latest_dict:
-                        latest_dict[key] = float(latest_dict[key])
-                    else:
-                        latest_dict[key] = 0.0
-                
-                # Ensure unit is string
-                latest_dict['unit'] = str(latest_dict.get('unit', 'PCS'))
-                
-                # Get prediction
-                result = rf_predictor.predict(outlet, item_name, latest_dict)
-                predictions.append(result)
+        # One scale + predict pass for every item of the outlet
+        predictions = rf_predictor.predict_batch(latest_rows, as_of=as_of)
         
-        return jsonify({
+        result = {
             "success": True,
             "predictions": predictions
-        })
+        }
+        result_cache.put(cache_key, result)
+        return jsonify(result)
         
     except Exception as e:
         import traceback
@@ -178,11 +386,35 @@ def predict_all():
 
 # ========== FEATURE 1: LSTM DEEP LEARNING ==========
 
+# Checkpoints of a running LSTM training job; a job interrupted by a
+# restart continues from here when training is requested again
+LSTM_CHECKPOINT_DIR = "models/lstm/checkpoint"
+
 @app.route('/ml/train-lstm', methods=['POST'])
 def train_lstm():
-    """Train LSTM deep learning model"""
+    """
+    Queue LSTM deep learning training (poll /ml/jobs/<id>)
+    
+    Body (optional): {"epochs": 50} caps the epochs; training stops
+    earlier once the validation loss stops improving. {"horizon": 7}
+    trains a model forecasting the next 7 days in one pass (default 1).
+    {"mode": "incremental", "epochs": 5, "replay_ratio": 1.0} fine-tunes
+    the served model on the records since its last training run, plus a
+    replay sample of older sequences, instead of training from scratch
+    """
     try:
-        stock_data = get_stock_data()
+        data = request.get_json(silent=True) or {}
+        options = {}
+        if data.get('mode') == 'incremental':
+            options = {'incremental': True, 'from_current': True}
+            if 'replay_ratio' in data:
+                options['replay_ratio'] = float(data['replay_ratio'])
+        if 'horizon' in data:
+            options['horizon'] = int(data['horizon'])
+            if options['horizon'] < 1:
+                return jsonify({"success": False, "error": "horizon must be at least 1"}), 400
+        epochs = int(data.get('epochs', 5 if options.get('incremental') else 50))
+        stock_data = get_stock_table()
         
         if len(stock_data) < 100:
             return jsonify({
@@ -190,52 +422,86 @@ def train_lstm():
                 "error": f"Need at least 100 records for LSTM. Got {len(stock_data)}"
             }), 400
         
-        metrics = lstm_trainer.train(stock_data, epochs=50)
-        
-        return jsonify({
-            "success": True,
-            "message": "LSTM model trained!",
-            "model_type": "Deep Learning - LSTM",
-            "metrics": metrics
-        })
+        job, created = training_jobs.submit('lstm', train_and_publish, 'lstm', stock_data,
+                                            epochs=epochs, checkpoint_dir=LSTM_CHECKPOINT_DIR, **options)
+        return job_accepted(job, created, "LSTM training started")
+    except JobConflict as e:
+        return job_conflict(e)
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/ml/predict-lstm', methods=['POST'])
 def predict_lstm():
-    """Get LSTM predictions"""
+    """
+    Get LSTM predictions (for today, or for body "as_of")
+    
+    Body "horizon": N (default 1) adds each item's "forecast" of the next
+    N days, from one forward pass of a model trained with that horizon
+    """
     try:
         data = request.json
         outlet = data.get('outlet')
+        as_of = parse_as_of(data)
+        horizon = int(data.get('horizon', 1))
         
-        stock_data = get_stock_data()
-        outlet_data = [item for item in stock_data if item.get('outlet') == outlet]
+        snapshot = outlet_cache.get(outlet) if outlet else None
         
-        if not outlet_data:
+        if not snapshot:
             return jsonify({"success": False, "error": "No data for outlet"}), 404
         
-        # Get predictions for each item
+        lstm_trainer, model_version = model_registry.get_versioned('lstm')
+        if not 1 <= horizon <= lstm_trainer.horizon:
+            return jsonify({
+                "success": False,
+                "error": f"horizon must be 1-{lstm_trainer.horizon} for the served LSTM "
+                         f"(train it with a longer horizon via /ml/train-lstm)"
+            }), 400
+        # Keyed on the feature store's version for today (see predict_all)
+        data_version = snapshot.version if as_of is not None else feature_store.version(outlet)
+        cache_key = ResultCache.make_key('predict-lstm', 'lstm', outlet,
+                                         data_version, model_version, as_of, horizon)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(cached)
+        
+        # Each item's last rows (one sequence plus its lags): from the ring
+        # buffers, or from the history before the as-of date
+        window = lstm_trainer.sequence_length + lstm_trainer.LOOKBACK
+        if as_of is None:
+            histories, data_version = feature_store.histories(outlet, window)
+            cache_key = ResultCache.make_key('predict-lstm', 'lstm', outlet,
+                                             data_version, model_version, as_of, horizon)
+        else:
+            histories = [
+                (str(key[1]), len(group), group.frame.tail(window).reset_index(drop=True))
+                for key, group in snapshot.table.before(as_of).groups()
+            ]
+        
+        # All items with a full sequence in one forward pass; (items, days)
+        ready = [(item_name, recent) for item_name, count, recent in histories
+                 if count >= lstm_trainer.sequence_length]
+        recents = [recent for _, recent in ready]
+        quantities = lstm_trainer.predict_batch(recents).reshape(len(ready), lstm_trainer.horizon)
         predictions = []
-        for item_name in set(item['item'] for item in outlet_data):
-            item_data = [d for d in outlet_data if d['item'] == item_name]
-            item_data.sort(key=lambda x: x.get('tarikh', ''))
-            
-            if len(item_data) >= 14:
-                recent_df = lstm_trainer.prepare_data(item_data)
-                prediction = lstm_trainer.predict(recent_df)
-                
-                predictions.append({
-                    'item': item_name,
-                    'predicted_order': int(prediction),
-                    'model': 'LSTM Deep Learning',
-                    'confidence': 'High'
-                })
-        
-        return jsonify({
+        for (item_name, _), forecast in zip(ready, quantities):
+            prediction = {
+                'item': item_name,
+                'predicted_order': int(forecast[0]),
+                'model': 'LSTM Deep Learning',
+                'confidence': 'High'
+            }
+            if horizon > 1:
+                prediction['forecast'] = [int(quantity) for quantity in forecast[:horizon]]
+            predictions.append(prediction)
+        
+        result = {
             "success": True,
             "predictions": predictions,
-            "model": "LSTM"
-        })
+            "model": "LSTM",
+            "horizon": horizon
+        }
+        result_cache.put(cache_key, result)
+        return jsonify(result)
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -251,7 +517,7 @@ def scan_receipt():
         if not image_base64:
             return jsonify({"success": False, "error": "No image provided"}), 400
         
-        result = receipt_scanner.scan_receipt(image_base64, is_base64=True)
+        result = backends.get('receipt_scanner').scan_receipt(image_base64, is_base64=True)
         
         return jsonify(result)
     except Exception as e:
@@ -264,6 +530,7 @@ def batch_scan():
         data = request.json
         images = data.get('images', [])
         
+        from receipt_scanner import AdvancedReceiptProcessor
         processor = AdvancedReceiptProcessor()
         results = processor.process_batch(images)
         
@@ -284,8 +551,8 @@ def batch_scan():
 def train_anomaly():
     """Train anomaly detection model"""
     try:
-        stock_data = get_stock_data()
-        result = anomaly_detector.train(stock_data)
+        stock_data = get_stock_table()
+        result = train_and_publish('anomaly', stock_data)
         
         return jsonify({
             "success": True,
@@ -299,8 +566,16 @@ def train_anomaly():
 def detect_anomalies():
     """Detect anomalies in stock data"""
     try:
-        stock_data = get_stock_data()
-        result = anomaly_detector.detect(stock_data)
+        stock_data = get_stock_table()
+        anomaly_detector, model_version = model_registry.get_versioned('anomaly')
+        
+        # Scans every outlet, so it is cached under outlet None
+        cache_key = ResultCache.make_key('anomaly-detect', 'anomaly', None,
+                                         stock_data.version, model_version)
+        result = result_cache.get(cache_key)
+        if result is None:
+            result = anomaly_detector.detect(stock_data)
+            result_cache.put(cache_key, result)
         
         return jsonify(result)
     except Exception as e:
@@ -312,8 +587,8 @@ def detect_anomalies():
 def train_recommendation():
     """Build recommendation engine"""
     try:
-        stock_data = get_stock_data()
-        result = recommendation_engine.train(stock_data)
+        stock_data = get_stock_table()
+        result = train_and_publish('recommendation', stock_data)
         
         return jsonify({
             "success": True,
@@ -332,54 +607,119 @@ def get_recommendations():
         item = data.get('item')
         current_baki = data.get('current_baki', 0)
         
-        if item:
-            result = recommendation_engine.get_recommendations(outlet, item, current_baki)
-        else:
-            result = recommendation_engine.get_all_recommendations(outlet)
+        recommendation_engine, model_version = model_registry.get_versioned('recommendation')
+        
+        # Answers come from the trained profiles only, so there is no data version
+        cache_key = ResultCache.make_key('recommend-get', 'recommendation', outlet,
+                                         None, model_version, item, current_baki)
+        result = result_cache.get(cache_key)
+        if result is None:
+            if item:
+                result = recommendation_engine.get_recommendations(outlet, item, current_baki)
+            else:
+                result = recommendation_engine.get_all_recommendations(outlet)
+            result_cache.put(cache_key, result)
         
         return jsonify(result)
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+# ========== CACHES ==========
+
+@app.route('/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    """Called by the Node.js backend after /add-stock, /update-stock, /delete-stock"""
+    data = request.json or {}
+    outlet = data.get('outlet')
+    
+    # Force the next read to re-sync; data versions change only if records did
+    stock_cache.invalidate()
+    outlet_cache.invalidate(outlet)
+    dropped = result_cache.invalidate_outlet(outlet) if outlet else result_cache.clear()
+    
+    return jsonify({"success": True, "outlet": outlet, "dropped": dropped})
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Result cache hit/miss counters and stock snapshot versions"""
+    return jsonify({
+        "success": True,
+        "results": result_cache.stats(),
+        "stock": {
+            "version": stock_cache.version,
+            "outlet_partitions": len(outlet_cache)
+        }
+    })
+
 # ========== COMBINED ENDPOINTS ==========
 
+def train_all(stock_data, progress):
+    """
+    Train all AI models concurrently (runs as a training job); each worker
+    publishes a registry version, which is then hot-swapped in here
+    """
+    models = ['random_forest', 'anomaly', 'recommendation']
+    
+    # Train LSTM if enough data
+    if len(stock_data) >= 100:
+        models.insert(1, 'lstm')
+    
+    results, timing = train_all_parallel(
+        stock_data, models=models, registry_root=model_registry.root,
+        options={'lstm_epochs': 30}, progress=progress
+    )
+    
+    for name, seconds in timing['per_model_seconds'].items():
+        TRAINING_SECONDS.observe(seconds, model=name)
+    
+    progress(stage='loading')
+    for name in models:
+        if 'error' not in results[name]:
+            model_registry.refresh(name)
+    
+    return {**results, 'timing': timing}
+
 @app.route('/ml/train-all', methods=['POST'])
 def train_all_models():
-    """Train all AI models at once"""
+    """Queue training of all AI models at once (poll /ml/jobs/<id>)"""
     try:
-        stock_data = get_stock_data()
-        results = {}
-        
-        # Train Random Forest (always)
-        try:
-            results['random_forest'] = rf_predictor.train(stock_data)
-        except Exception as e:
-            results['random_forest'] = {"error": str(e)}
-        
-        # Train LSTM if enough data
-        if len(stock_data) >= 100:
-            try:
-                results['lstm'] = lstm_trainer.train(stock_data, epochs=30)
-            except Exception as e:
-                results['lstm'] = {"error": str(e)}
-        
-        # Train Anomaly Detector
-        try:
-            results['anomaly'] = anomaly_detector.train(stock_data)
-        except Exception as e:
-            results['anomaly'] = {"error": str(e)}
-        
-        # Train Recommendation Engine
-        try:
-            results['recommendation'] = recommendation_engine.train(stock_data)
-        except Exception as e:
-            results['recommendation'] = {"error": str(e)}
-        
-        return jsonify({
-            "success": True,
-            "message": "All models trained!",
-            "results": results
-        })
+        job, created = training_jobs.submit('all', train_all, get_stock_table())
+        return job_accepted(job, created, "Training all models")
+    except JobConflict as e:
+        return job_conflict(e)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+def backtest(stock_data, progress, reuse=False, **options):
+    """Walk-forward backtest (runs as a training job)"""
+    models = options.pop('models', None)
+    served = {name: model_registry.get(name) for name in models or ['random_forest', 'lstm']} if reuse else None
+    return run_backtest(stock_data, models=models, reuse=served, progress=progress, **options).to_dict()
+
+@app.route('/ml/backtest', methods=['POST'])
+def backtest_models():
+    """
+    Queue a walk-forward backtest (poll /ml/jobs/<id> for MAE/RMSE per
+    fold and per item)
+    
+    Body (optional): {"models": ["random_forest", "lstm"], "n_folds": 4,
+    "horizon_days": 7, "min_train_days": 28, "lstm_epochs": 20,
+    "reuse": false}; "reuse": true scores the served models instead of
+    retraining per fold
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        options = {key: int(data[key]) for key in ('n_folds', 'horizon_days', 'min_train_days') if key in data}
+        if data.get('models'):
+            options['models'] = list(data['models'])
+        if 'lstm_epochs' in data:
+            options['options'] = {'lstm_epochs': int(data['lstm_epochs'])}
+        
+        job, created = backtest_jobs.submit('backtest', backtest, get_stock_table(),
+                                            reuse=bool(data.get('reuse')), **options)
+        return job_accepted(job, created, "Backtest started")
+    except JobConflict as e:
+        return job_conflict(e)
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -391,14 +731,18 @@ def chat():
     data = request.json
     messages = data.get('messages', [])
     
+    try:
+        client = backends.get('openai')
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
     if not client:
         return jsonify({"success": False, "error": "OpenAI not configured"}), 500
     
     try:
-        stock_data = get_stock_data()
+        snapshot = stock_cache.get()
         
         # Create context from stock data
-        context = f"You are Papadin AI, an assistant for restaurant inventory management. Current stock records: {len(stock_data)}"
+        context = f"You are Papadin AI, an assistant for restaurant inventory management. Current stock records: {len(snapshot)}"
         
         completion = client.chat.completions.create(
             model="gpt-4o-mini",
@@ -434,9 +778,13 @@ if __name__ == '__main__':
     print("  /ml/predict-all - Get predictions")
     print("  /ml/train-all - Train all models")
     print("  /ml/train-lstm - Train LSTM")
+    print("  /ml/jobs/<id> - Training job progress")
     print("  /cv/scan-receipt - Scan receipts")
     print("  /anomaly/detect - Find anomalies")
     print("  /recommend/get - Get recommendations")
+    print("  /cache/stats - Result cache hit/miss counters")
+    print("  /metrics - Prometheus latency histograms and gauges")
     print("\n" + "=" * 60 + "\n")
     
+    init_serving()
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -0,0 +1,181 @@
+# papadin-ai/backend_client.py
+"""
+Pooled, streaming HTTP client for the Node.js backend
+Reuses keep-alive connections and decodes the /get-stock body record by
+record, so peak memory is one chunk plus the records we keep
+"""
+
+import codecs
+import json
+import re
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import stage
+
+CHUNK_SIZE = 64 * 1024
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class StreamingEnvelopeDecoder:
+    """
+    Incremental decoder for a JSON object whose `array_key` member is a
+    (possibly huge) array, e.g. {"success": true, "data": [...], "syncedAt": "..."}
+
+    Elements of the array are yielded one at a time by `records()`; every
+    other top-level member is decoded normally and collected in `meta`.
+    """
+
+    def __init__(self, chunks, array_key='data', keep=None):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self.array_key = array_key
+        self.keep = keep
+        self.meta = {}
+
+    def _fill(self):
+        """Append the next chunk to the buffer; False once the stream is done"""
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            self._buf = self._buf[self._pos:] + self._utf8.decode(b'', final=True)
+            self._pos = 0
+            return False
+        self._buf = self._buf[self._pos:] + self._utf8.decode(chunk)
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Next non-whitespace character (consumes the whitespace)"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self._pos}")
+        self._pos += 1
+
+    def _value(self):
+        """Decode one complete JSON value, reading more input as needed"""
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A number ending exactly at the buffer edge may be truncated
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def records(self):
+        """Yield array elements (those passing `keep`) as they are decoded"""
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+
+        while True:
+            self._peek()
+            key = self._value()
+            self._expect(':')
+
+            if key == self.array_key and self._peek() == '[':
+                self._pos += 1
+                if self._peek() == ']':
+                    self._pos += 1
+                else:
+                    while True:
+                        self._peek()
+                        record = self._value()
+                        if self.keep is None or self.keep(record):
+                            yield record
+                        if self._peek() == ',':
+                            self._pos += 1
+                            continue
+                        self._expect(']')
+                        break
+            else:
+                self._peek()
+                self.meta[key] = self._value()
+
+            if self._peek() == ',':
+                self._pos += 1
+                continue
+            self._expect('}')
+            return
+
+
+class BackendClient:
+    """
+    Keep-alive connection pool to the Node.js backend
+
+    Args:
+        base_url: backend root, e.g. http://localhost:5001
+        pool_size: max pooled connections (match gunicorn --threads)
+        timeout: (connect, read) timeout in seconds
+    """
+
+    def __init__(self, base_url, pool_size=8, timeout=5):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=1)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def iter_stock(self, since=None, outlet=None, item=None, date_from=None, date_to=None, meta=None):
+        """
+        Yield stock records from /get-stock as they are decoded
+
+        Args:
+            since: only records changed after this ISO timestamp
+            outlet: only this outlet's records (server-side query, and
+                re-checked while parsing for older backends)
+            item: only this item's records (server-side query)
+            date_from, date_to: inclusive tarikh range, YYYY-MM-DD
+            meta: optional dict that receives the non-data members
+                (syncedAt, deleted, ...) once the stream is consumed
+        """
+        params = {
+            'since': since, 'outlet': outlet, 'item': item,
+            'from': date_from, 'to': date_to
+        }
+        params = {k: v for k, v in params.items() if v}
+        keep = (lambda record: record.get('outlet') == outlet) if outlet else None
+
+        with self.session.get(f"{self.base_url}/get-stock", params=params or None,
+                              timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            decoder = StreamingEnvelopeDecoder(
+                response.iter_content(chunk_size=CHUNK_SIZE), keep=keep
+            )
+            yield from decoder.records()
+            if meta is not None:
+                meta.update(decoder.meta)
+
+    @stage('fetch', 'backend')
+    def fetch_stock(self, since=None, outlet=None, **filters):
+        """
+        Same shape as the /get-stock response body ({'data', 'deleted',
+        'syncedAt', ...}), built from the stream with the filters applied
+        """
+        meta = {}
+        data = list(self.iter_stock(since=since, outlet=outlet, meta=meta, **filters))
+        return {**meta, 'data': data}
+
+    def close(self):
+        self.session.close()
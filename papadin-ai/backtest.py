@@ -0,0 +1,258 @@
+# papadin-ai/backtest.py
+"""
+Walk-forward backtesting
+Replays the stock history at a series of as-of dates. Each fold fits the
+forecasters on the data up to its cutoff (or reuses a given model), then
+predicts every (outlet, item) for each day of the following horizon from
+the history before that day - what the predict endpoints would have
+answered on that day - and compares with the recorded orders.
+
+Folds run in a process pool; each scores all of its (item, day) pairs in
+one vectorized batch.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from stock_table import StockTable
+from feature_kernels import GroupLayout, group_codes
+from parallel_training import _limit_threads
+
+MODELS = ['random_forest', 'lstm']
+PREDICTION_COLUMNS = ['model', 'fold', 'outlet', 'item', 'tarikh', 'actual', 'predicted']
+
+
+def walk_forward_folds(stock_data, n_folds=4, horizon_days=7, min_train_days=28):
+    """
+    Fold boundaries ending at the last day of the data
+
+    Fold k trains on rows dated up to its cutoff and is scored on the
+    `horizon_days` days after it; folds with less than `min_train_days`
+    of history before the cutoff are dropped.
+
+    Returns:
+        list of {'fold', 'cutoff', 'start', 'end'} (Timestamps; the
+        scored days are start..end inclusive)
+    """
+    dates = StockTable.coerce(stock_data).frame['tarikh'].dropna()
+    if dates.empty:
+        return []
+
+    first, last = dates.min().normalize(), dates.max().normalize()
+    horizon = pd.Timedelta(days=horizon_days)
+    folds = []
+    for k in range(n_folds, 0, -1):
+        cutoff = last - horizon * k
+        if cutoff - first < pd.Timedelta(days=min_train_days):
+            continue
+        folds.append({
+            'fold': len(folds),
+            'cutoff': cutoff,
+            'start': cutoff + pd.Timedelta(days=1),
+            'end': cutoff + horizon
+        })
+    return folds
+
+
+def _targets(frame, fold, history):
+    """
+    Rows dated inside the fold's window with at least `history` earlier
+    rows in their (outlet, item) group; frames are sorted by group, so
+    layout positions line up with frame rows
+    """
+    layout = GroupLayout(group_codes(frame))
+    tarikh = frame['tarikh']
+    in_window = (tarikh >= fold['start']) & (tarikh < fold['end'] + pd.Timedelta(days=1))
+    return np.flatnonzero(in_window.to_numpy() & (layout.position >= history) & ~layout.ungrouped)
+
+
+def _prediction_frame(frame, targets, predicted):
+    return pd.DataFrame({
+        'outlet': frame['outlet'].to_numpy()[targets],
+        'item': frame['item'].to_numpy()[targets],
+        'tarikh': frame['tarikh'].to_numpy()[targets],
+        'actual': frame['order'].to_numpy(dtype=np.float64)[targets],
+        'predicted': predicted
+    })
+
+
+def _backtest_random_forest(table, fold, n_threads, model, options):
+    """Each target day predicted from the previous row's features"""
+    from ml_model import StockPredictor
+
+    if model is None:
+        model = StockPredictor(n_jobs=n_threads)
+        model.train(table.before(fold['start']), save=False)
+
+    df = model.create_features(model.prepare_data(table))
+    targets = _targets(df, fold, history=1)
+    latest = df.iloc[targets - 1].reset_index(drop=True)
+    predicted = model.predict_quantities(latest, as_of=df['tarikh'].to_numpy()[targets])
+    return _prediction_frame(df, targets, predicted)
+
+
+def _backtest_lstm(table, fold, n_threads, model, options):
+    """Each target day predicted from the sequence of rows before it"""
+    from lstm_predictor import LSTMTrainer
+
+    if model is None:
+        model = LSTMTrainer()
+        model.train(table.before(fold['start']), epochs=options.get('lstm_epochs', 20), save=False)
+
+    # Lags and rolling means only look back, so features built on the full
+    # history equal those built on the history before each target day
+    df = model.prepare_data(table)
+    length = model.sequence_length
+    targets = _targets(df, fold, history=length)
+    values = df[model.feature_columns].to_numpy(dtype=np.float32)
+    sequences = model.sequence_windows(values)[targets - length]
+    predicted = model.predict_sequences(sequences)
+    if predicted.ndim == 2:
+        predicted = predicted[:, 0]  # multi-day model: its next-day forecast
+    return _prediction_frame(df, targets, predicted)
+
+
+def run_fold(name, stock_table, fold, n_threads, model=None, options=None):
+    """
+    Backtest one model on one fold in a worker process
+
+    Returns (name, fold number, predictions DataFrame or {'error': ...},
+    wall_seconds)
+    """
+    _limit_threads(n_threads, torch_threads=(name == 'lstm'))
+    options = options or {}
+    start = time.perf_counter()
+
+    try:
+        if name == 'random_forest':
+            predictions = _backtest_random_forest(stock_table, fold, n_threads, model, options)
+        elif name == 'lstm':
+            predictions = _backtest_lstm(stock_table, fold, n_threads, model, options)
+        else:
+            raise ValueError(f"Unknown model: {name}")
+        predictions.insert(0, 'model', name)
+        predictions.insert(1, 'fold', fold['fold'])
+        result = predictions
+    except Exception as e:
+        result = {"error": str(e)}
+
+    return name, fold['fold'], result, time.perf_counter() - start
+
+
+def score(predictions, by):
+    """Rows, MAE and RMSE of `predictions` grouped by the `by` columns"""
+    error = predictions['predicted'] - predictions['actual']
+    grouped = predictions.assign(abs_error=error.abs(), sq_error=error ** 2).groupby(by, sort=True)
+    table = grouped.agg(n=('actual', 'size'), mae=('abs_error', 'mean'), rmse=('sq_error', 'mean'))
+    table['rmse'] = np.sqrt(table['rmse'])
+    return table.reset_index()
+
+
+class BacktestResult:
+    """
+    predictions: one row per (model, fold, outlet, item, day)
+    folds: MAE/RMSE per model and fold, with the fold boundaries
+    items: MAE/RMSE per model and (outlet, item) over all folds
+    overall: MAE/RMSE per model
+    """
+
+    def __init__(self, predictions, folds, errors, timing):
+        self.predictions = predictions
+        self.folds = pd.DataFrame(folds).merge(score(predictions, ['model', 'fold']), on='fold')
+        self.items = score(predictions, ['model', 'outlet', 'item'])
+        self.overall = score(predictions, ['model'])
+        self.errors = errors
+        self.timing = timing
+
+    def to_dict(self):
+        """JSON-ready summary (dates as YYYY-MM-DD, metrics rounded)"""
+        def records(table):
+            table = table.copy()
+            for col in ('cutoff', 'start', 'end'):
+                if col in table:
+                    table[col] = table[col].dt.strftime('%Y-%m-%d')
+            return table.round({'mae': 3, 'rmse': 3}).to_dict('records')
+
+        return {
+            'overall': records(self.overall),
+            'folds': records(self.folds),
+            'items': records(self.items),
+            'errors': self.errors,
+            'timing': self.timing
+        }
+
+
+def run_backtest(stock_data, models=None, n_folds=4, horizon_days=7, min_train_days=28,
+                 reuse=None, total_cpus=None, max_workers=None, options=None, progress=None):
+    """
+    Walk-forward backtest of `models`, one process per (model, fold)
+
+    Args:
+        stock_data: raw records or a StockTable with the full history
+        models: subset of MODELS (default: both)
+        n_folds, horizon_days, min_train_days: see walk_forward_folds
+        reuse: {model name: fitted model} scored on every fold instead of
+            retraining per fold (faster, but a model trained on the whole
+            history has seen the later folds)
+        total_cpus: cores to divide between workers (default: os.cpu_count())
+        max_workers: worker processes (default: one per task up to total_cpus)
+        options: e.g. {'lstm_epochs': 20}
+        progress: optional callback(**fields) for job status updates
+
+    Returns:
+        BacktestResult
+    """
+    progress = progress or (lambda **fields: None)
+    table = StockTable.coerce(stock_data)
+    models = list(models or MODELS)
+    reuse = reuse or {}
+
+    folds = walk_forward_folds(table, n_folds, horizon_days, min_train_days)
+    if not folds:
+        raise ValueError(f"Need more than {min_train_days + horizon_days} days of history to backtest")
+
+    tasks = [(name, fold) for fold in folds for name in models]
+    total = total_cpus or os.cpu_count() or 1
+    workers = max_workers or max(1, min(len(tasks), total))
+    n_threads = max(1, total // workers)
+
+    frames, errors, wall_times = [], [], {}
+    start = time.perf_counter()
+    progress(stage='backtesting', tasks=len(tasks), completed=0)
+
+    # spawn: forking a process that already runs torch/Flask threads is unsafe
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [
+            pool.submit(run_fold, name, table, fold, n_threads, reuse.get(name), options)
+            for name, fold in tasks
+        ]
+        for future in as_completed(futures):
+            name, k, result, seconds = future.result()
+            if isinstance(result, dict):
+                errors.append({'model': name, 'fold': k, **result})
+            else:
+                frames.append(result)
+            wall_times[f"{name}/{k}"] = round(seconds, 2)
+            progress(completed=len(wall_times))
+
+    total_seconds = time.perf_counter() - start
+    summed = sum(wall_times.values())
+    timing = {
+        'per_fold_seconds': dict(sorted(wall_times.items())),
+        'workers': workers,
+        'total_seconds': round(total_seconds, 2),
+        'sum_fold_seconds': round(summed, 2),
+        'speedup': round(summed / total_seconds, 2) if total_seconds > 0 else None
+    }
+
+    predictions = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=PREDICTION_COLUMNS)
+    predictions = predictions.sort_values(['model', 'fold', 'outlet', 'item', 'tarikh'], ignore_index=True)
+    print(f"🧪 Backtested {len(models)} models x {len(folds)} folds in {total_seconds:.1f}s "
+          f"({len(predictions)} predictions, {len(errors)} failed)")
+    return BacktestResult(predictions, folds, errors, timing)
@@ -0,0 +1,100 @@
+# papadin-ai/benchmarks/bench_backend_client.py
+"""
+Benchmark: bare requests.get + full JSON decode vs pooled streaming client
+
+Serves a synthetic /get-stock body from a local stub server and measures
+latency and peak Python heap (tracemalloc) for fetching one outlet's rows.
+
+Run from papadin-ai/:  python benchmarks/bench_backend_client.py
+"""
+
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend_client import BackendClient
+from benchmarks.synthetic import make_stock_records
+
+REPEATS = 5
+
+
+def start_stub_server(body):
+    """Keep-alive HTTP/1.1 server returning `body` for every GET"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def baseline_fetch(url, outlet):
+    """What get_stock_data() + the predict_all filter used to do"""
+    data = requests.get(f"{url}/get-stock", timeout=30).json().get('data', [])
+    return [item for item in data if item.get('outlet') == outlet]
+
+
+def measure(fn):
+    """Median latency (untraced runs) and peak heap (one traced run)"""
+    latencies = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        n = len(fn())
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(latencies), peak, n
+
+
+def main():
+    print("📡 Backend client benchmark")
+    print("=" * 72)
+    print(f"{'records':>9} {'method':<12} {'rows kept':>10} {'median ms':>10} {'peak MB':>9}")
+
+    for n_items in (10, 50, 200):
+        records = make_stock_records(n_outlets=20, n_items=n_items, days=90)
+        outlet = records[0]['outlet']
+        body = json.dumps({'success': True, 'data': records, 'syncedAt': '2025-01-01T00:00:00Z'}).encode()
+        del records
+
+        server = start_stub_server(body)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        client = BackendClient(url, timeout=30)
+
+        for name, fn in [
+            ('baseline', lambda: baseline_fetch(url, outlet)),
+            ('streaming', lambda: client.fetch_stock(outlet=outlet)['data']),
+        ]:
+            latency, peak, kept = measure(fn)
+            n_records = 20 * n_items * 90
+            print(f"{n_records:>9} {name:<12} {kept:>10} {latency * 1000:>10.1f} {peak / 1e6:>9.1f}")
+
+        client.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
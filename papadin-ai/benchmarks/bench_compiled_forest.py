@@ -0,0 +1,92 @@
+# papadin-ai/benchmarks/bench_compiled_forest.py
+"""
+Benchmark: sklearn Random Forest vs the compiled flat-array forest
+
+1. Parity: CompiledForest (scaler folded into thresholds) against
+   model.predict(scaler.transform(X)) on real and perturbed feature rows,
+   and StockPredictor.predict against the DataFrame + sklearn path.
+2. Latency of StockPredictor.predict for one item, old path vs compiled.
+3. Raw inference time per batch size, sklearn vs compiled.
+
+Run from papadin-ai/:  python benchmarks/bench_compiled_forest.py
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_model import StockPredictor
+from benchmarks.synthetic import make_stock_records
+
+
+def per_call(fn, repeats):
+    """Median seconds per call over `repeats` timed calls"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    os.chdir(tempfile.mkdtemp(prefix="papadin-bench-"))
+
+    predictor = StockPredictor()
+    predictor.train(make_stock_records(n_outlets=10, n_items=20, days=90), save=False)
+    forest = predictor.compiled
+
+    df = predictor.create_features(predictor.prepare_data(
+        make_stock_records(n_outlets=10, n_items=50, days=30, seed=7)
+    ))
+    X = df[predictor.feature_columns].to_numpy(dtype=np.float64)
+    noisy = X + np.random.default_rng(0).normal(0, 2, X.shape)
+
+    print(f"\n🌲 Compiled forest: {forest.n_trees} trees, {forest.n_nodes} nodes, "
+          f"{forest.nbytes / 1e6:.1f} MB, depth {forest.max_depth}")
+    print("=" * 64)
+
+    # ---------- parity ----------
+    for name, rows in (('feature rows', X), ('perturbed rows', noisy)):
+        expected = predictor.model.predict(predictor.scaler.transform(
+            pd.DataFrame(rows, columns=predictor.feature_columns)
+        ))
+        actual = forest.predict(rows)
+        print(f"parity {name:<15} max |diff| {np.abs(expected - actual).max():.2e} "
+              f"({len(rows)} rows)")
+
+    latest = df.groupby(['outlet', 'item'], observed=True).tail(1).head(200)
+    sklearn_path = StockPredictor()
+    sklearn_path.__dict__.update(predictor.__dict__, compiled=None)
+    rows = latest.to_dict('records')
+    same = all(
+        predictor.predict(r['outlet'], r['item'], r) == sklearn_path.predict(r['outlet'], r['item'], r)
+        for r in rows
+    )
+    print(f"parity StockPredictor.predict vs DataFrame+sklearn path: {same} ({len(rows)} items)")
+
+    # ---------- single-item latency ----------
+    row = rows[0]
+    old = per_call(lambda: sklearn_path.predict(row['outlet'], row['item'], row), 50)
+    new = per_call(lambda: predictor.predict(row['outlet'], row['item'], row), 500)
+    print(f"\nStockPredictor.predict (1 item): {old * 1e3:.2f} ms -> {new * 1e3:.3f} ms "
+          f"({old / new:.0f}x)")
+
+    # ---------- raw inference per batch size ----------
+    print(f"\n{'rows':>6} {'sklearn ms':>11} {'compiled ms':>12} {'us/row':>8}")
+    frame = pd.DataFrame(X, columns=predictor.feature_columns)
+    for n in (1, 10, 100, 512, 5000):
+        sk = per_call(lambda: predictor.model.predict(predictor.scaler.transform(frame.iloc[:n])), 20)
+        compiled = per_call(lambda: forest.predict(X[:n]), 20)
+        print(f"{n:>6} {sk * 1e3:>11.2f} {compiled * 1e3:>12.3f} {compiled * 1e6 / n:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# papadin-ai/benchmarks/bench_lstm_fine_tune.py
+"""
+Benchmark: incremental LSTM fine-tuning vs a full retrain
+
+100 items over 128 days; from day 100 on, demand shifts up 30%. A model
+is trained on the first 100 days and saved. Then 14 new days arrive and
+the model is brought up to date by:
+
+    stale        nothing (the day-100 model)
+    fine-tune    train(incremental=True): the saved model, new records only
+                 (plus lookback), 5 epochs max, replay of older sequences
+    no replay    the same with replay_ratio=0
+    full         a fresh model on all 114 days, 50 epochs max
+
+Each is scored by next-day MAE over the last 14 days (held out from all
+of them).
+
+Run from papadin-ai/:  python benchmarks/bench_lstm_fine_tune.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lstm_predictor import LSTMTrainer
+from stock_table import StockTable
+from benchmarks.synthetic import make_stock_records
+
+START = date(2025, 1, 1)
+DAYS, SHIFT_DAY, NEW_DAYS = 128, 100, 14
+
+
+def shifted_records():
+    records = make_stock_records(n_outlets=5, n_items=20, days=DAYS, start=START)
+    shift = (START + timedelta(days=SHIFT_DAY)).isoformat()
+    for record in records:
+        if record['tarikh'] >= shift:
+            record['order'] = round(record['order'] * 1.3)
+            record['stockIn'] = record['order'] + record['stockIn'] % 10
+    return records
+
+
+def holdout_mae(trainer, table, start):
+    """Next-day MAE over every target dated from `start` on"""
+    df = trainer.prepare_data(table)
+    values, targets, y, dates, _ = trainer._sequence_index(df)
+    keep = dates >= np.datetime64(start)
+    sequences = trainer.sequence_windows(values)[targets[keep] - trainer.sequence_length]
+    predicted = trainer.predict_sequences(sequences)
+    return float(np.mean(np.abs(predicted - y[keep])))
+
+
+def quietly(fn):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    torch.set_num_threads(os.cpu_count() or 1)
+    table = StockTable.from_records(shifted_records())
+    updated = START + timedelta(days=SHIFT_DAY + NEW_DAYS)
+    directory = tempfile.mkdtemp(prefix="papadin-bench-")
+
+    base = LSTMTrainer()
+    quietly(lambda: base.train(table.before(START + timedelta(days=SHIFT_DAY)), epochs=50, save=False))
+    quietly(lambda: base.save_model(directory, export=False))
+
+    def fine_tuned(**options):
+        trainer = LSTMTrainer()
+        quietly(lambda: trainer.load_model(directory))
+        _, metrics = quietly(lambda: trainer.train(table.before(updated), epochs=5, save=False,
+                                                   incremental=True, **options))
+        return trainer, metrics
+
+    runs = {
+        'stale': (base, None),
+        'fine-tune': fine_tuned(),
+        'no replay': fine_tuned(replay_ratio=0),
+    }
+    full = LSTMTrainer()
+    runs['full'] = (full, quietly(lambda: full.train(table.before(updated), epochs=50, save=False))[1])
+
+    print(f"\n🔁 LSTM update after {NEW_DAYS} new days ({len(table.before(updated))} records)")
+    print("=" * 66)
+    print(f"{'update':>10} {'wall s':>8} {'epochs':>7} {'sequences':>10} {'holdout MAE':>12}")
+    for name, (trainer, metrics) in runs.items():
+        mae = holdout_mae(trainer, table, updated)
+        if metrics is None:
+            print(f"{name:>10} {'-':>8} {'-':>7} {'-':>10} {mae:>12.2f}")
+            continue
+        sequences = metrics['train_samples'] + metrics['val_samples'] + metrics['test_samples']
+        print(f"{name:>10} {metrics['train_seconds']:>8.1f} {metrics['epochs_run']:>7} "
+              f"{sequences:>10} {mae:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# papadin-ai/benchmarks/bench_lstm_horizon.py
+"""
+Benchmark: 7-day LSTM forecast, iterated single-step vs multi-horizon head
+
+Trains a horizon=1 and a horizon=7 LSTM on the same history (all but the
+last 7 days of every item), then forecasts those 7 days for every item:
+
+    iterated   the horizon=1 model run 7 times, each prediction appended
+               as the next row (stockIn and baki carried forward, since
+               they are unknown in advance) and the features rebuilt
+    direct     the horizon=7 model, one forward pass
+
+and reports forecast time and MAE per day ahead against the actual orders.
+
+Run from papadin-ai/:  python benchmarks/bench_lstm_horizon.py
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lstm_predictor import LSTMTrainer
+from stock_table import StockTable
+from benchmarks.synthetic import make_stock_records
+
+HORIZON = 7
+REPEATS = 3
+
+
+def forecast_iterated(trainer, recents, steps):
+    """Next `steps` orders per item by feeding single-step predictions back"""
+    recents = [recent.copy() for recent in recents]
+    forecast = []
+    for _ in range(steps):
+        quantities = trainer.predict_batch(recents)
+        forecast.append(quantities)
+        for i, recent in enumerate(recents):
+            last = recent.iloc[-1]
+            row = {'tarikh': last['tarikh'] + pd.Timedelta(days=1), 'stockIn': last['stockIn'],
+                   'baki': last['baki'], 'order': quantities[i]}
+            recents[i] = pd.concat([recent.iloc[1:], pd.DataFrame([row])], ignore_index=True)
+    return np.column_stack(forecast)
+
+
+def timed(fn, repeats=REPEATS):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    torch.set_num_threads(os.cpu_count() or 1)
+    table = StockTable.from_records(make_stock_records(n_outlets=5, n_items=20, days=120))
+    cutoff = table.frame['tarikh'].max() - pd.Timedelta(days=HORIZON - 1)
+    history = table.before(cutoff)
+
+    trainers = {}
+    for horizon in (1, HORIZON):
+        trainer = LSTMTrainer(horizon=horizon)
+        with contextlib.redirect_stdout(io.StringIO()):
+            metrics = trainer.train(history, epochs=30, save=False)
+        trainers[horizon] = trainer
+        print(f"🏋️  horizon={horizon}: {metrics['epochs_run']} epochs, {metrics['train_seconds']:.1f}s")
+
+    window = trainers[1].sequence_length + trainers[1].LOOKBACK
+    recents, actual = [], []
+    for _, group in table.groups():
+        frame = group.frame[['tarikh', 'stockIn', 'baki', 'order']]
+        recents.append(frame[frame['tarikh'] < cutoff].tail(window).reset_index(drop=True))
+        actual.append(frame.loc[frame['tarikh'] >= cutoff, 'order'].to_numpy())
+    actual = np.array(actual, dtype=np.float64)
+
+    iterated_time, iterated = timed(lambda: forecast_iterated(trainers[1], recents, HORIZON))
+    direct_time, direct = timed(lambda: trainers[HORIZON].predict_batch(recents))
+
+    print(f"\n📅 {HORIZON}-day forecast for {len(recents)} items")
+    print("=" * 62)
+    print(f"{'method':>9} {'forecast ms':>12} {'MAE':>6}   MAE by day ahead")
+    for name, seconds, forecast in (('iterated', iterated_time, iterated), ('direct', direct_time, direct)):
+        errors = np.abs(forecast - actual)
+        by_day = " ".join(f"{error:.1f}" for error in errors.mean(axis=0))
+        print(f"{name:>9} {seconds * 1e3:>12.1f} {errors.mean():>6.2f}   {by_day}")
+    print(f"speedup {iterated_time / direct_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
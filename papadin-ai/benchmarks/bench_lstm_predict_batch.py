@@ -0,0 +1,66 @@
+# papadin-ai/benchmarks/bench_lstm_predict_batch.py
+"""
+Benchmark: per-item LSTM prepare_recent + predict loop vs predict_batch
+
+Measures /ml/predict-lstm's work for one outlet with 10, 100 and 500
+items (each item's last sequence_length + LOOKBACK raw rows given, as
+FeatureStateStore.recent returns them) and checks both give the same
+predictions.
+
+Run from papadin-ai/:  python benchmarks/bench_lstm_predict_batch.py
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lstm_predictor import LSTMTrainer
+from stock_table import StockTable
+from benchmarks.synthetic import make_stock_records
+
+REPEATS = 3
+
+
+def timed(fn, repeats=REPEATS):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    torch.set_num_threads(os.cpu_count() or 1)
+    trainer = LSTMTrainer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        trainer.train(make_stock_records(n_outlets=3, n_items=20, days=60), epochs=2, save=False)
+
+    table = StockTable.from_records(make_stock_records(n_outlets=1, n_items=500, days=40, seed=7))
+    window = trainer.sequence_length + trainer.LOOKBACK
+    recents = [
+        group.frame[['tarikh', 'stockIn', 'baki', 'order']].tail(window).reset_index(drop=True)
+        for _, group in table.groups()
+    ]
+
+    print("\n🧠 LSTM inference for one outlet: per-item loop vs predict_batch")
+    print("=" * 62)
+    print(f"{'items':>6} {'loop ms':>9} {'batch ms':>9} {'speedup':>8} {'identical':>10}")
+    for n in (10, 100, 500):
+        items = recents[:n]
+        loop_time, expected = timed(lambda: [trainer.predict(trainer.prepare_recent(r)) for r in items])
+        batch_time, actual = timed(lambda: trainer.predict_batch(items))
+        print(f"{n:>6} {loop_time * 1e3:>9.1f} {batch_time * 1e3:>9.2f} "
+              f"{loop_time / batch_time:>7.0f}x {str(np.array_equal(expected, actual)):>10}")
+
+
+if __name__ == "__main__":
+    main()
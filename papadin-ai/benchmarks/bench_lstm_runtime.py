@@ -0,0 +1,99 @@
+# papadin-ai/benchmarks/bench_lstm_runtime.py
+"""
+Benchmark: eager LSTM vs exported TorchScript graphs (float32 and int8)
+
+Trains a small LSTM, saves it (which exports both graphs) and loads each
+graph with LSTMRuntime.
+
+1. Parity on real sequences: max |prediction - eager| in order units
+   before rounding, and the share of rounded predictions that match.
+2. Latency (median ms per call) and throughput (sequences/s) at batch
+   sizes 1, 32 and 512.
+
+Run from papadin-ai/:  python benchmarks/bench_lstm_runtime.py
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lstm_predictor import LSTMTrainer
+from lstm_runtime import LSTMRuntime, GRAPH_FILES
+from benchmarks.synthetic import make_stock_records
+
+
+def per_call(fn, repeats):
+    """Median seconds per call over `repeats` timed calls"""
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def raw_outputs(predictor, scaled):
+    """Unrounded predictions in order units (eager trainer or runtime)"""
+    with torch.no_grad():
+        if isinstance(predictor, LSTMTrainer):
+            out = predictor._forward(scaled).numpy()
+            return predictor.scaler_y.inverse_transform(out.reshape(-1, 1)).ravel()
+        out = predictor.graph(scaled).reshape(-1).numpy().astype(np.float64)
+        return out * predictor.y_scale + predictor.y_mean
+
+
+def main():
+    torch.set_num_threads(os.cpu_count() or 1)
+    directory = tempfile.mkdtemp(prefix="papadin-bench-")
+    trainer = LSTMTrainer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        trainer.train(make_stock_records(n_outlets=3, n_items=20, days=60), epochs=5, save=False)
+    trainer.save_model(directory)
+
+    data = trainer.prepare_data(make_stock_records(n_outlets=2, n_items=50, days=40, seed=7))
+    sequences, _ = trainer.create_sequences(data)
+    sequences = sequences.astype(np.float64)
+    shape = sequences.shape
+    scaled = torch.as_tensor(
+        trainer.scaler_X.transform(sequences.reshape(-1, shape[-1])).reshape(shape), dtype=torch.float32
+    )
+
+    predictors = {'eager': trainer}
+    for precision in GRAPH_FILES:
+        predictors[precision] = LSTMRuntime(directory, precision=precision)
+
+    print(f"\n🧊 LSTM serving: eager vs TorchScript ({torch.get_num_threads()} threads, "
+          f"{len(sequences)} test sequences)")
+    print("=" * 72)
+    expected = raw_outputs(trainer, scaled)
+    for name, predictor in predictors.items():
+        if name == 'eager':
+            continue
+        actual = raw_outputs(predictor, scaled)
+        same = np.mean(np.maximum(0, np.round(actual)) == np.maximum(0, np.round(expected)))
+        size = os.path.getsize(os.path.join(directory, GRAPH_FILES[name])) / 1e3
+        print(f"{name:>5}: max |diff| {np.abs(actual - expected).max():.4f} units, "
+              f"{same:.1%} rounded predictions equal, graph {size:.0f} KB")
+
+    print(f"\n{'batch':>6} " + " ".join(f"{name + ' ms':>10} {'seq/s':>8}" for name in predictors))
+    for n in (1, 32, 512):
+        batch = sequences[:n]
+        cells = []
+        for predictor in predictors.values():
+            seconds = per_call(lambda: predictor.predict_sequences(batch), 200 if n < 512 else 20)
+            cells.append(f"{seconds * 1e3:>10.3f} {n / seconds:>8.0f}")
+        print(f"{n:>6} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# papadin-ai/benchmarks/bench_lstm_sequences.py
+"""
+Benchmark: LSTM sequence construction, per-position pandas loop vs
+strided windows
+
+Times LSTMTrainer.create_sequences against the previous
+group.iloc[i:i+L] loop and checks both return the same sequences and
+targets (the new path is float32). At 1M rows the loop is skipped
+(it takes many minutes) and the memory-mapped variant is timed too.
+
+Run from papadin-ai/:  python benchmarks/bench_lstm_sequences.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lstm_predictor import LSTMTrainer
+from stock_table import StockTable
+from benchmarks.synthetic import records_for_size
+
+
+def create_sequences_loop(trainer, data):
+    """The per-position loop the strided windows replaced (reference)"""
+    sequences, targets = [], []
+    for _, group in data.groupby(['outlet', 'item'], observed=True):
+        group = group.sort_values('tarikh')
+        if len(group) < trainer.sequence_length + 1:
+            continue
+        for i in range(len(group) - trainer.sequence_length):
+            sequences.append(group.iloc[i:i + trainer.sequence_length][trainer.feature_columns].values)
+            targets.append(group.iloc[i + trainer.sequence_length]['order'])
+    return np.array(sequences), np.array(targets)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    trainer = LSTMTrainer()
+    root = tempfile.mkdtemp(prefix="papadin-bench-")
+
+    print("\n🪟 create_sequences: pandas loop vs strided windows")
+    print("=" * 80)
+    print(f"{'rows':>9} {'sequences':>10} {'loop s':>8} {'windows s':>10} {'memmap s':>9} "
+          f"{'speedup':>8} {'identical':>10}")
+    for n_rows in (20_000, 100_000, 1_000_000):
+        table = StockTable.from_records(records_for_size(n_rows, n_outlets=20, days=100))
+        data = trainer.prepare_data(table)
+
+        window_time, (X, y) = timed(lambda: trainer.create_sequences(data))
+        path = os.path.join(root, f"sequences_{n_rows}.npy")
+        memmap_time, _ = timed(lambda: trainer.create_sequences(data, path=path))
+        if n_rows <= 100_000:
+            loop_time, (X_loop, y_loop) = timed(lambda: create_sequences_loop(trainer, data))
+            identical = (X_loop.shape == X.shape and np.array_equal(X_loop.astype(np.float32), X)
+                         and np.array_equal(y_loop, y))
+            loop, speedup = f"{loop_time:>8.2f}", f"{loop_time / window_time:>7.0f}x"
+        else:
+            identical, loop, speedup = '-', f"{'-':>8}", f"{'-':>8}"
+        print(f"{len(table):>9} {len(X):>10} {loop} {window_time:>10.3f} {memmap_time:>9.3f} "
+              f"{speedup} {str(identical):>10}")
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# papadin-ai/benchmarks/bench_model_artifacts.py
+"""
+Benchmark: pickled models vs memory-mapped .bin artifacts across workers
+
+Saves the Random Forest (100 and 300 trees), LSTM and recommendation
+engine in both formats, then starts 1 and 4 worker processes (like
+gunicorn workers) that each load all of them and serve one prediction.
+While all workers are alive it reads /proc/<pid>/smaps_rollup:
+
+    load s   model load time per worker (imports excluded)
+    RSS MB   resident memory added by loading + predicting, per worker
+    PSS MB   proportional set size summed over the workers (shared pages
+             are split between the processes that map them)
+    USS MB   private memory summed over the workers
+
+Run from papadin-ai/:  python benchmarks/bench_model_artifacts.py
+"""
+
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AI_DIR)
+
+
+def _memory():
+    """{'rss', 'pss', 'uss'} of this process in bytes"""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+
+def worker(root, trees):
+    """Load every model from `root`, predict once, report, wait, report"""
+    import torch
+    from ml_model import StockPredictor
+    from lstm_predictor import LSTMTrainer
+    from recommendation_engine import OrderRecommendationEngine
+    torch.set_num_threads(1)
+
+    with open(os.path.join(root, 'inputs.pkl'), 'rb') as f:
+        inputs = pickle.load(f)
+
+    before = _memory()
+    start = time.perf_counter()
+    rf = StockPredictor()
+    rf.load_model(os.path.join(root, f'rf{trees}'))
+    lstm = LSTMTrainer()
+    lstm.load_model(os.path.join(root, 'lstm'))
+    engine = OrderRecommendationEngine()
+    engine.load_model(os.path.join(root, 'recommendation'))
+    load_seconds = time.perf_counter() - start
+
+    rf.predict_batch(inputs['rows'])
+    lstm.predict(lstm.prepare_recent(inputs['recent']))
+    engine.get_all_recommendations(inputs['outlet'])
+
+    print(json.dumps({'load_seconds': load_seconds, 'rss_before': before['rss']}), flush=True)
+    sys.stdin.readline()  # parent measures once every worker is loaded
+    print(json.dumps(_memory()), flush=True)
+
+
+def build_artifacts(root):
+    """Train once, save each model as .bin and as the old pickle files"""
+    import torch
+    from benchmarks.synthetic import make_stock_records
+    from stock_table import StockTable
+    from ml_model import StockPredictor
+    from lstm_predictor import LSTMTrainer
+    from recommendation_engine import OrderRecommendationEngine
+
+    table = StockTable.from_records(make_stock_records(n_outlets=20, n_items=50, days=120))
+
+    rf = StockPredictor()
+    rf.train(table, save=False)
+    for trees in (100, 300):
+        if trees > len(rf.model.estimators_):
+            X = rf.scaler.transform(rf.create_features(rf.prepare_data(table))[rf.feature_columns])
+            rf._grow_forest(X, table.frame['order'].to_numpy(), trees - len(rf.model.estimators_), trees)
+            rf._compile()
+        rf.save_model(os.path.join(root, 'bin', f'rf{trees}'))
+        legacy = os.path.join(root, 'pickle', f'rf{trees}')
+        os.makedirs(legacy)
+        with open(os.path.join(legacy, 'stock_predictor.pkl'), 'wb') as f:
+            pickle.dump({'model': rf.model, 'scaler': rf.scaler}, f)
+        with open(os.path.join(legacy, 'label_encoders.pkl'), 'wb') as f:
+            pickle.dump({'encoders': rf.label_encoders, 'feature_columns': rf.feature_columns}, f)
+
+    lstm = LSTMTrainer()
+    lstm.train(table.for_outlet(table.frame['outlet'].cat.categories[0]), epochs=1, save=False)
+    lstm.save_model(os.path.join(root, 'bin', 'lstm'))
+    legacy = os.path.join(root, 'pickle', 'lstm')
+    os.makedirs(legacy)
+    torch.save({
+        'model_state_dict': lstm.model.state_dict(),
+        'feature_columns': lstm.feature_columns,
+        'sequence_length': lstm.sequence_length,
+        'input_size': lstm.model.lstm1.input_size
+    }, os.path.join(legacy, 'lstm_model.pth'))
+    with open(os.path.join(legacy, 'scalers.pkl'), 'wb') as f:
+        pickle.dump({'scaler_X': lstm.scaler_X, 'scaler_y': lstm.scaler_y}, f)
+
+    # Many outlets so the similarity matrix and profiles carry real weight
+    engine = OrderRecommendationEngine()
+    engine.train(make_stock_records(n_outlets=1500, n_items=60, days=2), save=False)
+    engine.save_model(os.path.join(root, 'bin', 'recommendation'))
+    legacy = os.path.join(root, 'pickle', 'recommendation')
+    os.makedirs(legacy)
+    with open(os.path.join(legacy, 'engine.pkl'), 'wb') as f:
+        pickle.dump({
+            'profiles': engine.outlet_profiles,
+            'similarity_matrix': engine.similarity_matrix,
+            'scaler': engine.scaler
+        }, f)
+
+    outlet = str(table.frame['outlet'].cat.categories[0])
+    inputs = {
+        'rows': rf.latest_features(table.for_outlet(outlet)),
+        'recent': next(table.groups())[1].frame.tail(21).reset_index(drop=True),
+        'outlet': next(iter(engine.outlet_profiles))
+    }
+    for fmt in ('bin', 'pickle'):
+        with open(os.path.join(root, fmt, 'inputs.pkl'), 'wb') as f:
+            pickle.dump(inputs, f)
+
+
+def dir_mb(path):
+    return sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(path) for name in names
+    ) / 1e6
+
+
+def run_workers(root, trees, n_workers):
+    procs = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--worker', root, str(trees)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, cwd=AI_DIR
+        )
+        for _ in range(n_workers)
+    ]
+
+    def last_json(proc):
+        while True:
+            line = proc.stdout.readline()
+            if not line:
+                raise RuntimeError("worker exited early")
+            if line.startswith('{'):
+                return json.loads(line)
+
+    loaded = [last_json(proc) for proc in procs]
+    for proc in procs:
+        proc.stdin.write('\n')
+        proc.stdin.flush()
+    memory = [last_json(proc) for proc in procs]
+    for proc in procs:
+        proc.wait()
+
+    n = len(procs)
+    return {
+        'load': sum(r['load_seconds'] for r in loaded) / n,
+        'rss': sum(m['rss'] - r['rss_before'] for m, r in zip(memory, loaded)) / n / 1e6,
+        'pss': sum(m['pss'] for m in memory) / 1e6,
+        'uss': sum(m['uss'] for m in memory) / 1e6
+    }
+
+
+def main():
+    root = tempfile.mkdtemp(prefix="papadin-bench-")
+    print("🏗️  Training and saving models in both formats...")
+    build_artifacts(root)
+
+    print("\n📦 Model artifacts: pickle vs memory-mapped .bin")
+    print("=" * 78)
+    for fmt in ('pickle', 'bin'):
+        sizes = ", ".join(
+            f"{name} {dir_mb(os.path.join(root, fmt, name)):.1f} MB"
+            for name in ('rf100', 'rf300', 'lstm', 'recommendation')
+        )
+        print(f"{fmt:>7}: {sizes}")
+
+    print(f"\n{'format':>7} {'RF trees':>9} {'workers':>8} {'load s':>8} "
+          f"{'RSS MB':>8} {'PSS MB':>8} {'USS MB':>8}")
+    for trees in (100, 300):
+        for fmt in ('pickle', 'bin'):
+            for n_workers in (1, 4):
+                r = run_workers(os.path.join(root, fmt), trees, n_workers)
+                print(f"{fmt:>7} {trees:>9} {n_workers:>8} {r['load']:>8.3f} "
+                      f"{r['rss']:>8.1f} {r['pss']:>8.1f} {r['uss']:>8.1f}")
+    print("\nRSS: per worker; PSS/USS: summed over all workers (whole process)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        worker(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,81 @@
+# papadin-ai/benchmarks/bench_model_backends.py
+"""
+Benchmark: Random Forest vs histogram gradient boosting StockPredictor
+
+Trains both backends on the same synthetic history at increasing sizes
+and reports, per backend:
+
+    fit s      StockPredictor.train wall time (features + fit + compile)
+    trees      forest size / boosting iterations kept by early stopping
+    1 row ms   StockPredictor.predict for one item (compiled path)
+    batch ms   predict_quantities for the latest row of every item
+    MB         size of the saved .bin artifact
+    MAE        on the newest 20% of rows (time-ordered holdout)
+
+Run from papadin-ai/:  python benchmarks/bench_model_backends.py
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_model import StockPredictor, BACKENDS
+from stock_table import StockTable
+from benchmarks.synthetic import make_stock_records
+
+# (outlets, items, days)
+SIZES = [(5, 20, 60), (10, 40, 90), (20, 50, 120)]
+
+
+def per_call(fn, repeats):
+    """Median seconds per call over `repeats` timed calls"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def run(backend, table, root):
+    predictor = StockPredictor(backend=backend)
+    start = time.perf_counter()
+    results = predictor.train(table, save=False)
+    fit = time.perf_counter() - start
+
+    latest = predictor.latest_features(table)
+    row = latest.iloc[0].to_dict()
+    single = per_call(lambda: predictor.predict(row['outlet'], row['item'], row), 200)
+    batch = per_call(lambda: predictor.predict_quantities(latest), 20)
+
+    directory = os.path.join(root, backend)
+    predictor.save_model(directory)
+    size = os.path.getsize(os.path.join(directory, 'stock_predictor.bin')) / 1e6
+    return {
+        'fit': fit, 'trees': results['trees'], 'single': single, 'batch': batch,
+        'rows': len(latest), 'mb': size, 'mae': results['mae']
+    }
+
+
+def main():
+    root = tempfile.mkdtemp(prefix="papadin-bench-")
+
+    print("\n🌲 StockPredictor backends: Random Forest vs histogram gradient boosting")
+    print("=" * 84)
+    print(f"{'records':>8} {'backend':>23} {'fit s':>7} {'trees':>6} {'1 row ms':>9} "
+          f"{'batch ms':>9} {'MB':>6} {'MAE':>6}")
+    for n_outlets, n_items, days in SIZES:
+        table = StockTable.from_records(make_stock_records(n_outlets=n_outlets, n_items=n_items, days=days))
+        for backend in BACKENDS:
+            r = run(backend, table, os.path.join(root, str(len(table))))
+            print(f"{len(table):>8} {backend:>23} {r['fit']:>7.1f} {r['trees']:>6} "
+                  f"{r['single'] * 1e3:>9.3f} {r['batch'] * 1e3:>9.2f} {r['mb']:>6.1f} {r['mae']:>6.2f}")
+    print("\nbatch: latest row of every (outlet, item) in one call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# papadin-ai/benchmarks/bench_predict_batch.py
+"""
+Benchmark: per-item StockPredictor.predict loop vs predict_batch
+
+Measures the inference stage of /ml/predict-all for one outlet with
+50, 500 and 5,000 items (features already built).
+
+Run from papadin-ai/:  python benchmarks/bench_predict_batch.py
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_model import StockPredictor
+from benchmarks.synthetic import make_stock_records
+
+REPEATS = 3
+
+
+def timed(fn, repeats=REPEATS):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    os.chdir(tempfile.mkdtemp(prefix="papadin-bench-"))
+
+    predictor = StockPredictor()
+    predictor.train(make_stock_records(n_outlets=5, n_items=50, days=60))
+
+    print("\n⚡ predict loop vs predict_batch (one outlet)")
+    print("=" * 64)
+    print(f"{'items':>6} {'loop ms':>10} {'batch ms':>10} {'speedup':>9} {'match':>7}")
+
+    for n_items in (50, 500, 5000):
+        records = make_stock_records(n_outlets=1, n_items=n_items, days=10, seed=n_items)
+        outlet = records[0]['outlet']
+        df = predictor.create_features(predictor.prepare_data(records))
+        latest_rows = df.groupby('item', observed=True).tail(1)
+
+        def loop():
+            return [
+                predictor.predict(outlet, row['item'], row)
+                for row in latest_rows.to_dict('records')
+            ]
+
+        # The per-item loop is slow enough that one run is representative
+        loop_time, loop_result = timed(loop, repeats=1)
+        batch_time, batch_result = timed(lambda: predictor.predict_batch(latest_rows))
+
+        print(f"{n_items:>6} {loop_time * 1000:>10.1f} {batch_time * 1000:>10.1f} "
+              f"{loop_time / batch_time:>8.1f}x {str(loop_result == batch_result):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# papadin-ai/benchmarks/bench_startup.py
+"""
+Benchmark: app startup with eagerly vs lazily imported ML backends
+
+Each measurement is a fresh Python process (WARMUP_BACKENDS=none, empty
+model registry) that reports:
+
+    startup s   time to import app.py and answer GET / (what a new
+                gunicorn worker pays before it can serve)
+    RSS MB      resident memory at that point
+    eager       the same, after importing and constructing torch, sklearn,
+                OpenCV/Tesseract and OpenAI up front as app.py used to
+
+and, per backend / model, the cold-start cost of its first use (import +
+construct + load) measured inside an already started lazy app.
+
+Run from papadin-ai/:  python benchmarks/bench_startup.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AI_DIR)
+
+FIRST_USE = ['openai', 'receipt_scanner', 'random_forest', 'anomaly', 'recommendation', 'lstm']
+
+
+def eager_imports():
+    """The module-level imports and constructors app.py used to run"""
+    from openai import OpenAI
+    from lstm_predictor import LSTMTrainer
+    from receipt_scanner import ReceiptScanner
+    from anomaly_detector import StockAnomalyDetector
+    from recommendation_engine import OrderRecommendationEngine
+    from ml_model import StockPredictor
+    OpenAI(api_key="sk-bench")
+    ReceiptScanner()
+    for factory in (StockPredictor, LSTMTrainer, StockAnomalyDetector, OrderRecommendationEngine):
+        factory()
+
+
+def worker(mode, name=None):
+    from model_registry import _rss_bytes
+
+    start = time.perf_counter()
+    if mode == 'eager':
+        eager_imports()
+    import app
+    app.init_serving()
+    app.app.test_client().get('/')
+    report = {'startup': time.perf_counter() - start, 'rss': _rss_bytes()}
+
+    if mode == 'first-use':
+        start = time.perf_counter()
+        if name in app.backends:
+            app.backends.get(name)
+        else:
+            app.model_registry.load(name)
+        report.update(first_use=time.perf_counter() - start, rss_delta=_rss_bytes() - report['rss'])
+    print(json.dumps(report), flush=True)
+
+
+def run(mode, name=None, repeats=3):
+    """Mean of each reported field over `repeats` fresh processes"""
+    env = {
+        **os.environ,
+        'WARMUP_BACKENDS': 'none',
+        'MODEL_REGISTRY_DIR': tempfile.mkdtemp(prefix="papadin-bench-"),
+        'OPENAI_API_KEY': 'sk-bench'
+    }
+    reports = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', mode] + ([name] if name else []),
+            capture_output=True, text=True, cwd=AI_DIR, env=env, check=True
+        ).stdout
+        reports.append(json.loads([line for line in output.splitlines() if line.startswith('{')][-1]))
+    return {key: sum(r[key] for r in reports) / repeats for key in reports[0]}
+
+
+def main():
+    print("\n🚀 App startup: eager vs lazy backend imports")
+    print("=" * 60)
+    print(f"{'imports':>8} {'startup s':>10} {'RSS MB':>8}")
+    results = {mode: run(mode) for mode in ('eager', 'lazy')}
+    for mode, result in results.items():
+        print(f"{mode:>8} {result['startup']:>10.2f} {result['rss'] / 1e6:>8.0f}")
+    print(f"speedup {results['eager']['startup'] / results['lazy']['startup']:.1f}x, "
+          f"{(results['eager']['rss'] - results['lazy']['rss']) / 1e6:.0f} MB less at startup")
+
+    print("\n🧊 Cold start of each backend on first use (lazy app)")
+    print("=" * 60)
+    print(f"{'backend':>16} {'first use s':>12} {'RSS +MB':>8}")
+    for name in FIRST_USE:
+        result = run('first-use', name)
+        print(f"{name:>16} {result['first_use']:>12.2f} {result['rss_delta'] / 1e6:>8.0f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == '--worker':
+        worker(*sys.argv[2:])
+    else:
+        main()
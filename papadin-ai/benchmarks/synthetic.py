@@ -0,0 +1,43 @@
+# papadin-ai/benchmarks/synthetic.py
+"""
+Synthetic stock records shaped like the stokOutlet collection
+"""
+
+import random
+from datetime import date, timedelta
+
+UNITS = ['PCS', 'KG', 'PACK', 'BTL']
+
+
+def make_stock_records(n_outlets=10, n_items=20, days=90, seed=42, start=date(2025, 1, 1)):
+    """One record per (outlet, item, day) with weekly seasonality and noise"""
+    rng = random.Random(seed)
+    records = []
+    for o in range(n_outlets):
+        outlet = f"outlet{o:03d}@papadin.com"
+        for i in range(n_items):
+            base = rng.randint(5, 60)
+            unit = UNITS[i % len(UNITS)]
+            for d in range(days):
+                day = start + timedelta(days=d)
+                weekend = 1.4 if day.weekday() >= 5 else 1.0
+                order = max(0, round(base * weekend + rng.gauss(0, base * 0.2)))
+                stock_in = order + rng.randint(0, 10)
+                records.append({
+                    'id': f"{o}-{i}-{d}",
+                    'tarikh': day.isoformat(),
+                    'outlet': outlet,
+                    'item': f"item{i:04d}",
+                    'unit': unit,
+                    'stockIn': stock_in,
+                    'baki': rng.randint(0, max(1, stock_in // 2)),
+                    'order': order,
+                    'remark': ''
+                })
+    return records
+
+
+def records_for_size(n_rows, n_outlets=10, days=90, seed=42):
+    """Roughly n_rows records spread over n_outlets and `days` days"""
+    n_items = max(1, n_rows // (n_outlets * days))
+    return make_stock_records(n_outlets=n_outlets, n_items=n_items, days=days, seed=seed)
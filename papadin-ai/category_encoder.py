@@ -0,0 +1,112 @@
+# papadin-ai/category_encoder.py
+"""
+Persistent categorical encoder
+Maps outlet/item/unit strings to integer codes with a plain dict. Code 0
+is reserved for values the encoder has never seen, so an unknown value
+only affects its own row, and new values get the next free code, so the
+vocabulary grows between retrains without changing existing codes.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _distinct(values):
+    """
+    (codes, labels): per-row index into `labels`, the distinct values as
+    strings. Missing values get code -1, which picks the trailing 'nan'
+    label (str(nan), as the old LabelEncoder path saw them).
+    """
+    codes, uniques = pd.factorize(pd.Series(values, copy=False), sort=False)
+    return codes, [str(value) for value in uniques] + ['nan']
+
+
+class CategoryEncoder:
+    """
+    Dictionary encoder for one categorical column
+
+    Args:
+        classes: initial vocabulary, coded 1, 2, ... in the given order
+    """
+
+    UNKNOWN = 0
+
+    def __init__(self, classes=()):
+        self.unknown = self.UNKNOWN
+        self.index = {}
+        self.next_code = self.UNKNOWN + 1
+        self.update(classes)
+
+    @classmethod
+    def from_label_encoder(cls, encoder):
+        """
+        Take over a fitted sklearn LabelEncoder (models saved before this
+        encoder existed) keeping its codes, so the loaded forest stays
+        valid. Its vocabulary starts at 0, so unknowns share code 0 with
+        the first class, as they always did for those models.
+        """
+        self = cls()
+        self.index = {str(value): code for code, value in enumerate(encoder.classes_)}
+        self.next_code = len(self.index)
+        return self
+
+    @classmethod
+    def coerce(cls, encoder):
+        """A CategoryEncoder as-is, or one converted from a LabelEncoder"""
+        if isinstance(encoder, cls):
+            return encoder
+        return cls.from_label_encoder(encoder)
+
+    def to_dict(self):
+        """JSON-serializable state (model artifact header)"""
+        return {'index': self.index, 'unknown': self.unknown, 'next_code': self.next_code}
+
+    @classmethod
+    def from_dict(cls, state):
+        self = cls()
+        self.index = dict(state['index'])
+        self.unknown = state['unknown']
+        self.next_code = state['next_code']
+        return self
+
+    @property
+    def classes(self):
+        """Known values in code order"""
+        return sorted(self.index, key=self.index.get)
+
+    def update(self, values):
+        """
+        Add the values not seen yet (in sorted order, for reproducible codes)
+
+        Returns the number of values added
+        """
+        codes, labels = _distinct(values)
+        if not (np.asarray(codes) < 0).any():
+            labels = labels[:-1]
+        new = sorted(set(labels) - self.index.keys())
+        for value in new:
+            self.index[value] = self.next_code
+            self.next_code += 1
+        return len(new)
+
+    def encode(self, values):
+        """
+        Codes of a whole column (Series, array or list): one dict lookup
+        per distinct value, then a single take over the rows
+        """
+        codes, labels = _distinct(values)
+        lookup = np.fromiter(
+            (self.index.get(label, self.unknown) for label in labels),
+            dtype=np.int64, count=len(labels)
+        )
+        return lookup[codes]
+
+    def encode_one(self, value):
+        """Code of a single value"""
+        return self.index.get(str(value), self.unknown)
+
+    def __contains__(self, value):
+        return str(value) in self.index
+
+    def __len__(self):
+        return len(self.index)
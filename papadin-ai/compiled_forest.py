@@ -0,0 +1,237 @@
+# papadin-ai/compiled_forest.py
+"""
+Compiled tree ensemble
+Flattens a fitted sklearn forest (or histogram gradient boosting model)
+into contiguous NumPy node arrays and evaluates it with a vectorized
+traversal, so predicting one row costs a few array operations instead of
+DataFrame construction, scaling and sklearn's per-call validation.
+
+A StandardScaler in front of the forest is folded into the thresholds:
+    (x - mean) / scale <= t   <=>   x <= t * scale + mean   (scale > 0)
+(rounded to the exact float64 boundary), so raw, unscaled feature rows
+go straight in.
+"""
+
+import numpy as np
+
+
+def _float32_boundary(threshold):
+    """
+    Largest float64 z with float32(z) <= threshold
+
+    sklearn trees compare float32 inputs, and a threshold may equal a
+    float32 training value exactly; comparing float64 inputs against this
+    boundary instead reproduces sklearn's decisions.
+    """
+    t32 = threshold.astype(np.float32)
+    below = np.where(t32 > threshold, np.nextafter(t32, np.float32(-np.inf)), t32)
+    above = np.nextafter(below, np.float32(np.inf))
+    middle = (below.astype(np.float64) + above.astype(np.float64)) / 2
+    # The midpoint itself rounds to even: down only if `below` is even
+    return np.where(below.view(np.int32) & 1, np.nextafter(middle, -np.inf), middle)
+
+
+def _ordered(z):
+    """float64 -> int64 keys in the same order (adjacent floats, adjacent keys)"""
+    bits = z.view(np.int64)
+    return np.where(bits < 0, np.int64(-2 ** 63) - bits, bits)
+
+
+def _from_ordered(keys):
+    return np.where(keys < 0, np.int64(-2 ** 63) - keys, keys).view(np.float64)
+
+
+def _fold_scaler(threshold, mean, scale):
+    """
+    Largest raw float64 z with (z - mean) / scale <= threshold, computed
+    the way StandardScaler.transform does. threshold * scale + mean can
+    be off by an ulp, which flips rows lying exactly on a split value.
+
+    Found by bracketing threshold * scale + mean and bisecting on the
+    float64 bit patterns: a mean much larger than z makes many floats
+    round to the same (z - mean), so stepping one ulp at a time may not
+    finish.
+    """
+    def fits(z):
+        return (z - mean) / scale <= threshold
+
+    z = threshold * scale + mean
+    step = 4 * (np.spacing(np.maximum(np.abs(z), np.abs(mean))) + np.spacing(np.abs(threshold)) * scale)
+    low, high = z - step, z + step
+    while True:
+        widen_low, widen_high = ~fits(low), fits(high)
+        if not (widen_low.any() or widen_high.any()):
+            break
+        step = step * 2
+        low = np.where(widen_low, z - step, low)
+        high = np.where(widen_high, z + step, high)
+
+    # fits(low) and not fits(high) throughout
+    low, high = _ordered(low), _ordered(high)
+    while True:
+        open_ = high - low > 1
+        if not open_.any():
+            break
+        middle = (low >> 1) + (high >> 1) + (low & high & 1)
+        below = fits(_from_ordered(middle))
+        low = np.where(open_ & below, middle, low)
+        high = np.where(open_ & ~below, middle, high)
+    return _from_ordered(low)
+
+
+class CompiledForest:
+    """
+    All trees' nodes in one set of arrays. Leaves point to themselves with
+    an infinite threshold, so every row can take the same number of steps.
+
+    Arrays (one entry per node):
+        feature: int32 feature index tested at the node
+        threshold: float64 split threshold on the raw feature
+        left, right: int32 global index of the child nodes
+        value: float64 prediction stored at the node (used at leaves)
+    roots: int32 index of each tree's root node
+
+    A row's prediction is bias + the mean (random forest) or the sum
+    (gradient boosting) of its leaf values.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, reduce='mean', bias=0.0):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.reduce = reduce
+        self.bias = float(bias)
+
+    @classmethod
+    def from_sklearn(cls, forest, scaler=None):
+        """
+        Args:
+            forest: fitted RandomForestRegressor / ExtraTreesRegressor
+                (single output)
+            scaler: fitted StandardScaler applied before the forest, or None
+        """
+        trees = []
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            trees.append((
+                tree.children_left < 0, tree.feature,
+                # sklearn trees compare float32 inputs
+                _float32_boundary(tree.threshold.astype(np.float64)),
+                tree.children_left, tree.children_right, tree.value[:, 0, 0], tree.max_depth
+            ))
+        return cls._build(trees, scaler, 'mean', 0.0)
+
+    @classmethod
+    def from_hist_gradient_boosting(cls, model, scaler=None):
+        """
+        Args:
+            model: fitted HistGradientBoostingRegressor (squared error loss,
+                numeric features only)
+            scaler: fitted StandardScaler applied before the model, or None
+        """
+        if model.loss != 'squared_error':
+            raise ValueError(f"Only squared_error loss can be compiled, got {model.loss}")
+        trees = []
+        for (predictor,) in model._predictors:
+            nodes = predictor.nodes
+            trees.append((
+                nodes['is_leaf'].astype(bool), nodes['feature_idx'],
+                nodes['num_threshold'].astype(np.float64),
+                nodes['left'], nodes['right'], nodes['value'], int(nodes['depth'].max())
+            ))
+        return cls._build(trees, scaler, 'sum', float(np.ravel(model._baseline_prediction)[0]))
+
+    @classmethod
+    def _build(cls, trees, scaler, reduce, bias):
+        """
+        Concatenate per-tree (leaf mask, feature, threshold, left, right,
+        value, depth) into global node arrays, folding in the scaler
+        """
+        parts = {name: [] for name in ('feature', 'threshold', 'left', 'right', 'value')}
+        roots, offset, max_depth = [], 0, 0
+        for leaf, feature, threshold, left, right, value, depth in trees:
+            ids = np.arange(len(leaf)) + offset
+            feature = np.where(leaf, 0, feature)
+            if scaler is not None:
+                mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(scaler.n_features_in_)
+                scale = scaler.scale_ if scaler.scale_ is not None else np.ones(scaler.n_features_in_)
+                threshold = _fold_scaler(threshold, mean[feature], scale[feature])
+
+            parts['feature'].append(feature)
+            parts['threshold'].append(np.where(leaf, np.inf, threshold))
+            parts['left'].append(np.where(leaf, ids, left + offset))
+            parts['right'].append(np.where(leaf, ids, right + offset))
+            parts['value'].append(value)
+            roots.append(offset)
+            offset += len(leaf)
+            max_depth = max(max_depth, depth)
+
+        return cls(
+            np.ascontiguousarray(np.concatenate(parts['feature']), dtype=np.int32),
+            np.ascontiguousarray(np.concatenate(parts['threshold']), dtype=np.float64),
+            np.ascontiguousarray(np.concatenate(parts['left']), dtype=np.int32),
+            np.ascontiguousarray(np.concatenate(parts['right']), dtype=np.int32),
+            np.ascontiguousarray(np.concatenate(parts['value']), dtype=np.float64),
+            np.asarray(roots, dtype=np.int32),
+            max_depth, reduce, bias
+        )
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+
+    def to_arrays(self, prefix):
+        """(arrays, meta) for model_artifacts.write_artifact, names prefixed"""
+        arrays = {f'{prefix}.{name}': getattr(self, name) for name in self.ARRAYS}
+        return arrays, {prefix: {'max_depth': self.max_depth, 'reduce': self.reduce, 'bias': self.bias}}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta, prefix):
+        """Forest over the (memory-mapped) arrays of to_arrays, not copied"""
+        info = meta[prefix]
+        return cls(*(arrays[f'{prefix}.{name}'] for name in cls.ARRAYS), info['max_depth'],
+                   info.get('reduce', 'mean'), info.get('bias', 0.0))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left,
+                                      self.right, self.value, self.roots))
+
+    def predict(self, X):
+        """
+        Prediction for each row: bias + mean or sum of the leaf values
+
+        Args:
+            X: raw feature rows, shape (n_rows, n_features) or (n_features,)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            return self._predict_row(X)[None]
+
+        rows = np.arange(len(X))[:, None]
+        node = np.repeat(self.roots[None], len(X), axis=0)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self._combine(self.value[node], axis=1)
+
+    def _predict_row(self, x):
+        node = self.roots
+        for _ in range(self.max_depth):
+            node = np.where(x[self.feature[node]] <= self.threshold[node],
+                            self.left[node], self.right[node])
+        return self._combine(self.value[node], axis=0)
+
+    def _combine(self, leaves, axis):
+        total = leaves.mean(axis=axis) if self.reduce == 'mean' else leaves.sum(axis=axis)
+        return total + self.bias if self.bias else total
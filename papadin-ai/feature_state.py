@@ -0,0 +1,335 @@
+# papadin-ai/feature_state.py
+"""
+Incremental per-item feature state
+Keeps the last few stockIn/baki/order values of every (outlet, item) in a
+fixed-size ring buffer with running sums, so a new stock record updates
+the features in O(1) and the latest feature row of an item is read
+without re-running feature engineering over its whole history.
+
+The rows match StockPredictor.create_features / LSTMTrainer.prepare_data
+on the full history: lags are read from the buffer and the rolling means
+from running sums over the same windows.
+"""
+
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from stock_table import StockTable
+
+# Column order inside the ring buffer
+STOCK_IN, BAKI, ORDER = 0, 1, 2
+# Rolling windows of `order` kept as running sums (StockPredictor features)
+ROLLING_WINDOWS = (7, 30)
+
+
+def _quantity(value):
+    """A stock quantity parsed the way StockTable does (bad/missing -> 0, float32)"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(number) else float(np.float32(number))
+
+
+def _date(value):
+    """tarikh as datetime64[ns] (NaT if missing or unparseable)"""
+    # Plain YYYY-MM-DD dates (what the app stores) skip the pandas parser
+    if isinstance(value, str) and len(value) == 10:
+        try:
+            return np.datetime64(value, 'ns')
+        except ValueError:
+            pass
+    parsed = pd.to_datetime(value, errors='coerce')
+    return np.datetime64('NaT', 'ns') if pd.isna(parsed) else np.datetime64(parsed.tz_localize(None), 'ns')
+
+
+def _key(record):
+    """(outlet, item) of a raw record, or None if either is missing"""
+    outlet, item = record.get('outlet'), record.get('item')
+    if outlet is None or item is None or outlet != outlet or item != item:
+        return None
+    return str(outlet), str(item)
+
+
+class ItemFeatureState:
+    """
+    Ring buffer of the most recent rows of one (outlet, item)
+
+    Args:
+        capacity: rows kept; must cover the longest window or lag read
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.values = np.zeros((capacity, 3), dtype=np.float32)
+        self.dates = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[ns]')
+        self.units = [None] * capacity
+        self.ids = [None] * capacity
+        self.count = 0
+        self.sums = {window: 0.0 for window in ROLLING_WINDOWS}
+
+    def accepts(self, tarikh):
+        """Whether a row dated `tarikh` goes after every buffered row"""
+        if self.count == 0:
+            return True
+        last = self.dates[(self.count - 1) % self.capacity]
+        if np.isnat(tarikh):
+            return bool(np.isnat(last))
+        return bool(np.isnat(last) or tarikh >= last)
+
+    def append(self, record_id, tarikh, unit, stock_in, baki, order):
+        """Add the next row in O(1), updating the running sums"""
+        order = float(order)
+        for window in ROLLING_WINDOWS:
+            self.sums[window] += order
+            if self.count >= window:
+                self.sums[window] -= float(self.values[(self.count - window) % self.capacity, ORDER])
+
+        slot = self.count % self.capacity
+        self.values[slot] = (stock_in, baki, order)
+        self.dates[slot] = tarikh
+        self.units[slot] = unit
+        self.ids[slot] = record_id
+        self.count += 1
+
+    def _slots(self, n):
+        n = min(n, self.count, self.capacity)
+        return np.arange(self.count - n, self.count) % self.capacity
+
+    def _value(self, lag, column):
+        """Value `lag` rows before the latest one (0 before the first row, like fillna)"""
+        if lag >= self.count:
+            return 0.0
+        return float(self.values[(self.count - 1 - lag) % self.capacity, column])
+
+    def feature_row(self):
+        """Latest StockPredictor feature row (last row of create_features)"""
+        stock_in, baki = self._value(0, STOCK_IN), self._value(0, BAKI)
+        return {
+            'unit': self.units[(self.count - 1) % self.capacity],
+            'stockIn': stock_in,
+            'baki': baki,
+            'order': self._value(0, ORDER),
+            'prev_order_1day': self._value(1, ORDER),
+            'prev_order_3day': self._value(3, ORDER),
+            'prev_order_7day': self._value(7, ORDER),
+            'avg_order_7day': self.sums[7] / min(self.count, 7),
+            'avg_order_30day': self.sums[30] / min(self.count, 30),
+            'prev_baki': self._value(1, BAKI),
+            'prev_stockIn': self._value(1, STOCK_IN),
+            'usage_rate': (stock_in - baki) / (stock_in + 1)
+        }
+
+    def recent(self, n):
+        """Last `n` rows (oldest first) as a frame of raw stock columns"""
+        slots = self._slots(n)
+        return pd.DataFrame({
+            'tarikh': self.dates[slots],
+            'stockIn': self.values[slots, STOCK_IN],
+            'baki': self.values[slots, BAKI],
+            'order': self.values[slots, ORDER]
+        })
+
+
+class FeatureStateStore:
+    """
+    Feature state of every (outlet, item), kept current from stock syncs
+
+    Each outlet's state carries the version of the stock snapshot it was
+    built from; the reads return it with the rows, taken under the same
+    lock, so results computed from them can be cached under that version
+    even while a newer snapshot is being applied.
+
+    Args:
+        capacity: rows buffered per item; the default covers the 30-day
+            rolling mean and a 14-step LSTM sequence plus its 7-day lags
+    """
+
+    def __init__(self, capacity=32):
+        if capacity < max(ROLLING_WINDOWS):
+            raise ValueError(f"capacity must be at least {max(ROLLING_WINDOWS)}")
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._outlets = {}
+        # Snapshot version per outlet (None: a rebuild of every outlet)
+        self._versions = {}
+
+    # ---------- updates ----------
+
+    def _load(self, table):
+        """States for every group of a StockTable (last `capacity` rows each)"""
+        frame = table.frame
+        offsets = table.group_offsets
+        outlet_codes = frame['outlet'].cat.codes.to_numpy()
+        item_codes = frame['item'].cat.codes.to_numpy()
+        outlets = frame['outlet'].cat.categories
+        items = frame['item'].cat.categories
+        values = frame[['stockIn', 'baki', 'order']].to_numpy(dtype=np.float32)
+        dates = frame['tarikh'].to_numpy(dtype='datetime64[ns]')
+        units = frame['unit'].astype(object).where(frame['unit'].notna(), None).tolist()
+        ids = frame['id'].tolist() if 'id' in frame else [None] * len(frame)
+
+        loaded = {}
+        for g in range(len(offsets) - 1):
+            start, end = offsets[g], offsets[g + 1]
+            if outlet_codes[start] < 0 or item_codes[start] < 0:
+                continue
+            # Same slots and sums as appending every row of the group
+            first = max(start, end - self.capacity)
+            slots = (np.arange(first, end) - start) % self.capacity
+            state = ItemFeatureState(self.capacity)
+            state.values[slots] = values[first:end]
+            state.dates[slots] = dates[first:end]
+            for slot, i in zip(slots.tolist(), range(first, end)):
+                state.units[slot] = units[i]
+                state.ids[slot] = ids[i]
+            state.count = end - start
+            order = values[first:end, ORDER].astype(np.float64)
+            for window in ROLLING_WINDOWS:
+                state.sums[window] = float(order[-window:].sum())
+            loaded[(outlets[outlet_codes[start]], items[item_codes[start]])] = state
+        return loaded
+
+    def rebuild(self, table, outlet=None, version=None):
+        """
+        Replace the state of one outlet (or of every outlet) from a table
+        of snapshot `version`
+        """
+        table = StockTable.coerce(table)
+        loaded = self._load(table)
+        by_outlet = {}
+        for (o, item), state in loaded.items():
+            by_outlet.setdefault(o, {})[item] = state
+        with self._lock:
+            if outlet is None:
+                self._outlets = by_outlet
+                self._versions = {None: version}
+            else:
+                self._outlets[outlet] = by_outlet.get(outlet, {})
+                self._versions[outlet] = version
+
+    def append(self, record):
+        """
+        Apply one new record in O(1)
+
+        Returns False if the record is dated before the item's latest row
+        (the item then needs a rebuild to keep rows in date order)
+        """
+        with self._lock:
+            return self._append(record)
+
+    def _append(self, record):
+        key = _key(record)
+        if key is None:
+            return True
+        tarikh = _date(record.get('tarikh'))
+        unit = record.get('unit')
+        items = self._outlets.setdefault(key[0], {})
+        state = items.get(key[1])
+        if state is None:
+            state = items[key[1]] = ItemFeatureState(self.capacity)
+        if not state.accepts(tarikh):
+            return False
+        state.append(
+            record.get('id'), tarikh, None if unit is None else str(unit),
+            _quantity(record.get('stockIn')), _quantity(record.get('baki')),
+            _quantity(record.get('order'))
+        )
+        return True
+
+    def on_sync(self, outlet, snapshot, changed, removed, full):
+        """
+        Listener for a (partitioned) stock cache: new records are appended,
+        items with edited, deleted or back-dated records are rebuilt from
+        the snapshot, and a full sync rebuilds the outlet
+
+        A delta is applied under one hold of the lock, so readers see the
+        state and version of one snapshot or the next, never a mix.
+        """
+        if full:
+            self.rebuild(snapshot.table, outlet, snapshot.version)
+            return
+
+        stale = {_key(record) for record in removed} - {None}
+        removed_ids = {record.get('id') for record in removed}
+        with self._lock:
+            for record in changed:
+                key = _key(record)
+                if key is None or key in stale:
+                    continue
+                if record.get('id') in removed_ids or not self._append(record):
+                    stale.add(key)
+
+            if stale:
+                records = [record for record in snapshot.records if _key(record) in stale]
+                loaded = self._load(StockTable.from_records(records))
+                for key in stale:
+                    items = self._outlets.setdefault(key[0], {})
+                    if key in loaded:
+                        items[key[1]] = loaded[key]
+                    else:
+                        items.pop(key[1], None)
+            self._versions[outlet] = snapshot.version
+
+    # ---------- reads ----------
+
+    def latest_row(self, outlet, item):
+        """Latest feature row of one item (dict), or None if unknown"""
+        with self._lock:
+            state = self._outlets.get(outlet, {}).get(item)
+            if state is None or state.count == 0:
+                return None
+            return {'outlet': outlet, 'item': item, **state.feature_row()}
+
+    def _version(self, outlet):
+        return self._versions.get(outlet, self._versions.get(None))
+
+    def version(self, outlet):
+        """Snapshot version the outlet's state was built from (None before any sync)"""
+        with self._lock:
+            return self._version(outlet)
+
+    def latest_rows(self, outlet):
+        """
+        (latest feature row of every item of an outlet sorted by item,
+        snapshot version they were built from)
+        """
+        with self._lock:
+            items = self._outlets.get(outlet, {})
+            rows = [
+                {'outlet': outlet, 'item': item, **items[item].feature_row()}
+                for item in sorted(items) if items[item].count
+            ]
+            version = self._version(outlet)
+        return pd.DataFrame(rows), version
+
+    def recent(self, outlet, item, n):
+        """Last `n` raw rows of one item (for the LSTM sequence builder)"""
+        with self._lock:
+            state = self._outlets.get(outlet, {}).get(item)
+            if state is None:
+                return None
+            return state.recent(n)
+
+    def item_counts(self, outlet):
+        """{item: rows seen} for one outlet"""
+        with self._lock:
+            return {item: state.count for item, state in self._outlets.get(outlet, {}).items()}
+
+    def histories(self, outlet, n):
+        """
+        ([(item, rows seen, last `n` raw rows)] for every item of an outlet
+        sorted by item, snapshot version they were built from)
+        """
+        with self._lock:
+            items = self._outlets.get(outlet, {})
+            histories = [(item, items[item].count, items[item].recent(n)) for item in sorted(items)]
+            version = self._version(outlet)
+        return histories, version
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(items) for items in self._outlets.values())
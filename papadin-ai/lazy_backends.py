@@ -0,0 +1,116 @@
+# papadin-ai/lazy_backends.py
+"""
+Lazily loaded backends
+Heavy subsystems (torch, sklearn, OpenCV/Tesseract, the OpenAI client) are
+imported and constructed on first use instead of when app.py is imported,
+so a worker that only serves /chat or /recommend/get never loads torch,
+and startup does not wait for any of them. warm_up() loads a chosen set on
+a background thread right after startup, so the first request that needs
+one usually finds it ready.
+"""
+
+import importlib
+import threading
+import time
+
+from model_registry import _rss_bytes
+
+
+def lazy_class(module, name):
+    """
+    Factory that imports `module` on its first call and constructs
+    `module.name(*args, **kwargs)` (e.g. a ModelRegistry factory)
+    """
+    def factory(*args, **kwargs):
+        return getattr(importlib.import_module(module), name)(*args, **kwargs)
+    factory.__qualname__ = f"lazy_class({module}.{name})"
+    return factory
+
+
+class Backend:
+    """Bookkeeping for one lazily loaded backend"""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.instance = None
+        self.status = 'pending'
+        self.error = None
+        self.load_seconds = None
+        self.rss_delta_bytes = None
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        return {
+            'status': self.status,
+            'load_seconds': self.load_seconds,
+            'rss_delta_bytes': self.rss_delta_bytes,
+            'error': self.error
+        }
+
+
+class BackendRegistry:
+    """Named backends, each imported and constructed once, on first get()"""
+
+    def __init__(self):
+        self._backends = {}
+
+    def register(self, name, loader):
+        """
+        Args:
+            loader: zero-argument callable doing the imports and returning
+                the backend instance
+        """
+        self._backends[name] = Backend(name, loader)
+
+    def __contains__(self, name):
+        return name in self._backends
+
+    def get(self, name):
+        """
+        The backend instance, loading it on this thread if nobody has yet;
+        concurrent callers wait for the one load. A failed load raises and
+        is retried by the next call.
+        """
+        backend = self._backends[name]
+        if backend.status != 'loaded':
+            with backend.lock:
+                if backend.status != 'loaded':
+                    self._load(backend)
+        return backend.instance
+
+    def _load(self, backend):
+        backend.status = 'loading'
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            instance = backend.loader()
+        except Exception as e:
+            backend.status, backend.error = 'error', str(e)
+            raise
+        rss_after = _rss_bytes()
+
+        backend.load_seconds = round(time.perf_counter() - start, 3)
+        if rss_before is not None and rss_after is not None:
+            backend.rss_delta_bytes = rss_after - rss_before
+        backend.instance, backend.status, backend.error = instance, 'loaded', None
+        print(f"✅ Loaded {backend.name} backend in {backend.load_seconds:.2f}s")
+
+    def warm_up(self, names=None, background=True):
+        """Load `names` (default: all) now, on a daemon thread by default"""
+        def load_all():
+            for name in names if names is not None else list(self._backends):
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"⚠️  Warm-up of {name} failed: {e}")
+
+        if not background:
+            load_all()
+            return None
+        thread = threading.Thread(target=load_all, name='backend-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        return {name: backend.to_dict() for name, backend in self._backends.items()}
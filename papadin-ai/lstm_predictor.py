@@ -6,12 +6,20 @@ Uses PyTorch to predict optimal order quantities based on historical patterns
 
 import torch
 import torch.nn as nn
+from torch.utils.data import BatchSampler, DataLoader, RandomSampler, TensorDataset
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
 import pickle
 import os
+import time
+
+from stock_table import StockTable, record_hashes
+from feature_kernels import GroupLayout, group_codes
+from metrics import stage
+from model_artifacts import write_artifact, read_artifact, scaler_arrays, scaler_from_arrays
+from lstm_runtime import LSTMRuntime, GRAPH_FILES, lstm_features, export_graphs
 
 class LSTMStockPredictor(nn.Module):
     """
@@ -21,10 +29,10 @@ class LSTMStockPredictor(nn.Module):
     - LSTM Layer 1: 128 units with dropout
     - LSTM Layer 2: 64 units with dropout  
     - Dense Layer: 32 units with ReLU
-    - Output: Single value (predicted order)
+    - Output: `horizon` values (predicted orders of the next horizon days)
     """
     
-    def __init__(self, input_size, hidden_size_1=128, hidden_size_2=64, dropout=0.3):
+    def __init__(self, input_size, hidden_size_1=128, hidden_size_2=64, dropout=0.3, horizon=1):
         super(LSTMStockPredictor, self).__init__()
         
         self.lstm1 = nn.LSTM(input_size, hidden_size_1, batch_first=True)
@@ -33,7 +41,7 @@ class LSTMStockPredictor(nn.Module):
         self.dropout2 = nn.Dropout(dropout)
         self.fc1 = nn.Linear(hidden_size_2, 32)
         self.relu = nn.ReLU()
-        self.fc2 = nn.Linear(32, 1)
+        self.fc2 = nn.Linear(32, horizon)
         
     def forward(self, x):
         lstm1_out, _ = self.lstm1(x)
@@ -48,45 +56,48 @@ class LSTMStockPredictor(nn.Module):
 
 
 class LSTMTrainer:
-    def __init__(self, sequence_length=14):
+    """
+    Args:
+        sequence_length: days of history per input sequence
+        horizon: days forecast by one forward pass (1 = next day only)
+    """
+    
+    def __init__(self, sequence_length=14, horizon=1):
         self.sequence_length = sequence_length
+        self.horizon = horizon
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self.model = None
         self.scaler_X = StandardScaler()
         self.scaler_y = StandardScaler()
         self.feature_columns = []
+        # Date of the newest record and hashed ids of all records trained on
+        # (where incremental training resumes)
+        self.trained_through = None
+        self.trained_ids = None
+        # Raw training sequences kept for replay when fine-tuning
+        self.replay_X = None
+        self.replay_y = None
+        self.replay_seen = 0
+        # Exported graph of the current weights, which predictions go
+        # through once save_model / load_model has one
+        self.runtime = None
         print(f"🖥️  Using device: {self.device}")
         
+    @stage('features', 'lstm')
     def prepare_data(self, stock_data):
-        """Engineer features from raw stock data"""
-        df = pd.DataFrame(stock_data)
-        df['tarikh'] = pd.to_datetime(df['tarikh'])
-        
-        for col in ['stockIn', 'baki', 'order']:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        
-        df = df.sort_values(['outlet', 'item', 'tarikh'])
+        """Engineer features from raw stock data (records or a shared StockTable)"""
+        # Typed columns, already sorted by outlet, item, tarikh
+        df = StockTable.coerce(stock_data).to_frame()
         
         # Feature engineering
-        features = []
-        for (outlet, item), group in df.groupby(['outlet', 'item']):
-            group = group.copy()
-            group['day_of_week'] = group['tarikh'].dt.dayofweek
-            group['is_weekend'] = (group['day_of_week'] >= 5).astype(int)
-            
-            # Lag features
-            for lag in [1, 3, 7]:
-                group[f'order_lag_{lag}'] = group['order'].shift(lag)
-                group[f'baki_lag_{lag}'] = group['baki'].shift(lag)
-            
-            # Rolling stats
-            for window in [3, 7]:
-                group[f'order_mean_{window}'] = group['order'].rolling(window, min_periods=1).mean()
-                group[f'baki_mean_{window}'] = group['baki'].rolling(window, min_periods=1).mean()
-            
-            features.append(group)
+        features = [
+            self._group_features(group.copy())
+            for _, group in df.groupby(['outlet', 'item'], observed=True)
+        ]
         
-        df_featured = pd.concat(features, ignore_index=True).fillna(0)
+        df_featured = pd.concat(features, ignore_index=True)
+        numeric = df_featured.select_dtypes('number').columns
+        df_featured[numeric] = df_featured[numeric].fillna(0)
         
         self.feature_columns = [
             'stockIn', 'baki', 'day_of_week', 'is_weekend',
@@ -98,102 +109,442 @@ class LSTMTrainer:
         
         return df_featured
     
-    def create_sequences(self, data):
-        """Convert to sequences for LSTM"""
-        sequences, targets = [], []
-        
-        for (outlet, item), group in data.groupby(['outlet', 'item']):
-            group = group.sort_values('tarikh')
-            if len(group) < self.sequence_length + 1:
-                continue
-            
-            for i in range(len(group) - self.sequence_length):
-                seq = group.iloc[i:i+self.sequence_length][self.feature_columns].values
-                target = group.iloc[i+self.sequence_length]['order']
-                sequences.append(seq)
-                targets.append(target)
-        
-        return np.array(sequences), np.array(targets)
+    @staticmethod
+    def _group_features(group):
+        """Calendar, lag and rolling features of one item's rows (in date order)"""
+        group['day_of_week'] = group['tarikh'].dt.dayofweek
+        group['is_weekend'] = (group['day_of_week'] >= 5).astype(int)
+        
+        # Lag features
+        for lag in [1, 3, 7]:
+            group[f'order_lag_{lag}'] = group['order'].shift(lag)
+            group[f'baki_lag_{lag}'] = group['baki'].shift(lag)
+        
+        # Rolling stats
+        for window in [3, 7]:
+            group[f'order_mean_{window}'] = group['order'].rolling(window, min_periods=1).mean()
+            group[f'baki_mean_{window}'] = group['baki'].rolling(window, min_periods=1).mean()
+        
+        return group
     
-    def train(self, stock_data, epochs=50, batch_size=32, learning_rate=0.001):
-        """Train the LSTM model"""
-        print("🚀 Starting LSTM training...")
-        
-        df = self.prepare_data(stock_data)
-        X_seq, y = self.create_sequences(df)
-        
-        if len(X_seq) < 50:
-            raise ValueError(f"Need at least 50 sequences, got {len(X_seq)}")
-        
-        print(f"📊 Created {len(X_seq)} sequences")
-        
-        # Split and scale
-        X_train, X_test, y_train, y_test = train_test_split(
-            X_seq, y, test_size=0.2, random_state=42, shuffle=False
-        )
-        
-        X_train_flat = X_train.reshape(-1, X_train.shape[-1])
-        X_test_flat = X_test.reshape(-1, X_test.shape[-1])
-        
-        X_train_scaled = self.scaler_X.fit_transform(X_train_flat).reshape(X_train.shape)
-        X_test_scaled = self.scaler_X.transform(X_test_flat).reshape(X_test.shape)
-        
-        y_train_scaled = self.scaler_y.fit_transform(y_train.reshape(-1, 1)).flatten()
-        y_test_scaled = self.scaler_y.transform(y_test.reshape(-1, 1)).flatten()
-        
-        # To tensors
-        X_train_t = torch.FloatTensor(X_train_scaled).to(self.device)
+    # Rows of history needed before a sequence so its lags and means are complete
+    LOOKBACK = 7
+    
+    @stage('features', 'lstm')
+    def prepare_recent(self, recent):
+        """
+        Features of an item's last rows (e.g. FeatureStateStore.recent with
+        sequence_length + LOOKBACK rows); the last sequence_length rows equal
+        those prepare_data builds from the full history
+        """
+        featured = self._group_features(recent.copy())
+        numeric = featured.select_dtypes('number').columns
+        featured[numeric] = featured[numeric].fillna(0)
+        return featured
+    
+    def sequence_windows(self, values):
+        """
+        Zero-copy strided view of every run of sequence_length consecutive
+        rows of `values` (n_rows, n_features): window i is rows i .. i+L-1
+        """
+        return sliding_window_view(values, (self.sequence_length, values.shape[1]))[:, 0]
+    
+    # Sequences gathered / scaled per step when building the training set
+    CHUNK_SIZE = 65536
+    
+    # Training sequences kept in the artifact for replay during fine-tuning
+    REPLAY_SIZE = 1024
+    
+    def _sequence_index(self, data):
+        """
+        Float32 feature rows of `data` grouped and in date order, plus the
+        row index, target(s) and date of every sequence's first target, and
+        the positions in `data` of its rows, window then targets
+        (n, sequence_length + horizon)
+        """
+        codes = group_codes(data)
+        order = np.lexsort((data['tarikh'].to_numpy(), codes))
+        if np.array_equal(order, np.arange(len(order))):
+            order = slice(None)  # prepare_data output: grouped, in date order
+        layout = GroupLayout(codes[order])
+        values = np.ascontiguousarray(data[self.feature_columns].to_numpy(dtype=np.float32)[order])
+        
+        # A row starts a target once its group has sequence_length rows
+        # before it and horizon - 1 rows after it
+        sizes = np.diff(layout.offsets)
+        remaining = np.repeat(sizes, sizes) - layout.position
+        targets = np.flatnonzero((layout.position >= self.sequence_length) & (remaining >= self.horizon)
+                                 & ~layout.ungrouped)
+        spans = targets if self.horizon == 1 else targets[:, None] + np.arange(self.horizon)
+        y = data['order'].to_numpy(dtype=np.float64)[order][spans]
+        dates = data['tarikh'].to_numpy()[order][targets]
+        rows = np.arange(len(data))[order][targets[:, None] + np.arange(-self.sequence_length, self.horizon)]
+        return values, targets, y, dates, rows
+    
+    def create_sequences(self, data, path=None):
+        """
+        Convert to sequences for LSTM: each run of sequence_length rows of an
+        (outlet, item) group, with the group's next `horizon` orders as the
+        target
+        
+        Sequences are gathered from strided windows over one contiguous
+        float32 feature array; the targets are the rows right after the
+        window, so a window needs `horizon` more rows of its group after it.
+        
+        Args:
+            data: prepare_data output
+            path: optional .npy file the sequences are streamed into, chunk
+                by chunk (returned as a memory map), for datasets that
+                would not fit in RAM
+        
+        Returns:
+            (sequences (n, sequence_length, n_features) float32, targets (n,)
+            or (n, horizon) when horizon > 1)
+        """
+        values, targets, y, _, _ = self._sequence_index(data)
+        starts = targets - self.sequence_length
+        shape = (len(targets), self.sequence_length, len(self.feature_columns))
+        
+        if path is None:
+            if len(targets) == 0:
+                return np.empty(shape, dtype=np.float32), y
+            return self.sequence_windows(values)[starts], y
+        
+        sequences = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=shape)
+        if len(targets):
+            windows = self.sequence_windows(values)
+            for i in range(0, len(starts), self.CHUNK_SIZE):
+                sequences[i:i + self.CHUNK_SIZE] = windows[starts[i:i + self.CHUNK_SIZE]]
+            sequences.flush()
+        return sequences, y
+    
+    def _incremental_sequences(self, table, replay_ratio):
+        """
+        Sequences for fine-tuning: those with a new record (see _new_rows)
+        in their window or targets, built from the new rows plus the rows
+        around them those sequences and their features need (in target
+        date order), preceded by `replay_ratio` times as many sequences
+        from the replay sample
+        
+        Returns:
+            (sequences, targets, number of replayed sequences)
+        """
+        recent = table.near(self._new_rows(table.frame), self.sequence_length + self.LOOKBACK + self.horizon - 1,
+                            self.sequence_length + self.horizon - 1)
+        if not len(recent):
+            raise ValueError(f"No new records since {self.trained_through.date()}")
+        df = self.prepare_data(recent)
+        values, targets, y, dates, rows = self._sequence_index(df)
+        new = np.flatnonzero(self._new_rows(df)[rows].any(axis=1))
+        new = new[np.argsort(dates[new], kind='stable')]
+        X_new = self.sequence_windows(values)[targets[new] - self.sequence_length]
+        
+        n_replay = 0 if self.replay_X is None else min(len(self.replay_X), int(round(len(new) * replay_ratio)))
+        if n_replay == 0:
+            return X_new, y[new], 0
+        picks = np.sort(np.random.default_rng(self.replay_seen).choice(len(self.replay_X), n_replay, replace=False))
+        return (np.concatenate([self.replay_X[picks], X_new]),
+                np.concatenate([self.replay_y[picks], y[new]]), n_replay)
+    
+    def _new_rows(self, frame):
+        """
+        Rows not trained on yet: those whose record id was not in the data
+        of the last training run, so records that arrive late with an older
+        tarikh count too. Rows without an id (or a model saved before ids
+        were kept) count if dated after trained_through. Edits to records
+        already trained on are not picked up; a full run is.
+        """
+        new = (frame['tarikh'] > self.trained_through).to_numpy(copy=True)
+        if self.trained_ids is None or 'id' not in frame.columns:
+            return new
+        has_id = frame['id'].notna().to_numpy()
+        new[has_id] = ~np.isin(record_hashes(frame['id'][has_id]), self.trained_ids)
+        return new
+    
+    def _update_replay(self, X, y):
+        """
+        Reservoir-sample raw training sequences into the replay set, so it
+        stays a uniform sample of every sequence trained on so far
+        """
+        rng = np.random.default_rng(self.replay_seen)
+        if self.replay_X is None:
+            self.replay_X, self.replay_y = X[:0].copy(), y[:0].copy()
+        n_old = len(self.replay_X)
+        replay_X = np.array(self.replay_X, dtype=np.float32)
+        replay_y = np.array(self.replay_y, dtype=np.float64)
+        
+        # Free slots take new sequences; each old slot is then replaced with
+        # probability len(X) / (sequences seen including X)
+        fill = rng.choice(len(X), min(self.REPLAY_SIZE - n_old, len(X)), replace=False)
+        replace = np.flatnonzero(rng.random(n_old) < len(X) / (self.replay_seen + len(X)))
+        picks = rng.integers(0, len(X), len(replace))
+        replay_X[replace], replay_y[replace] = X[picks], y[picks]
+        self.replay_X = np.concatenate([replay_X, X[fill]])
+        self.replay_y = np.concatenate([replay_y, y[fill]])
+        self.replay_seen += len(X)
+    
+    def _scale_sequences(self, X_train, X_test, fit=True):
+        """
+        Fit scaler_X on the training sequences' rows (unless fine-tuning,
+        where the scalers stay fixed) and scale both sets in place, a chunk
+        at a time (memory-mapped sequences stay on disk)
+        """
+        train_rows = X_train.reshape(-1, X_train.shape[-1])
+        if fit:
+            self.scaler_X = StandardScaler()
+            for i in range(0, len(train_rows), self.CHUNK_SIZE):
+                self.scaler_X.partial_fit(train_rows[i:i + self.CHUNK_SIZE])
+        for rows in (train_rows, X_test.reshape(-1, X_test.shape[-1])):
+            for i in range(0, len(rows), self.CHUNK_SIZE):
+                rows[i:i + self.CHUNK_SIZE] = self.scaler_X.transform(rows[i:i + self.CHUNK_SIZE])
+    
+    def train(self, stock_data, epochs=50, batch_size=32, learning_rate=0.001, progress=None, save=True,
+              sequences_path=None, patience=5, min_delta=1e-4, checkpoint_dir=None, checkpoint_every=1,
+              resume=True, num_threads=None, horizon=None, incremental=False, replay_ratio=1.0):
+        """
+        Train the LSTM model
+        
+        With horizon > 1 the output layer has one unit per day and each
+        sequence is trained on the next `horizon` orders, so a whole
+        forecast comes out of one forward pass.
+        
+        Shuffled mini-batches; after every epoch the model is scored on the
+        last 10% of the training sequences. The learning rate halves when
+        that validation loss plateaus, and training stops once it has not
+        improved by `min_delta` for `patience` epochs, keeping the best
+        weights (`epochs` is the upper bound).
+        
+        progress: optional callback(**fields) per epoch
+        save: write artifacts to models/lstm (False when publishing to the registry)
+        sequences_path: optional .npy file to hold the training sequences as
+            a memory map instead of in RAM (see create_sequences)
+        checkpoint_dir: write a resumable checkpoint there every
+            `checkpoint_every` epochs; it is removed once training completes
+        resume: continue from the checkpoint in checkpoint_dir if it was
+            written for the same training data and settings
+        num_threads: torch CPU threads while training (default: unchanged)
+        horizon: days to forecast (default: the trainer's horizon)
+        incremental: fine-tune the loaded model instead of training a new
+            one, on the sequences holding records the last training run did
+            not have (see _new_rows) plus a replay sample
+            of older ones; the scalers stay fixed and the newest 20% of the
+            new sequences are held out for the metrics. Falls back to a
+            full training run if no model with the same horizon is loaded.
+        replay_ratio: replayed older sequences per new one when fine-tuning
+        """
+        if horizon is not None:
+            self.horizon = int(horizon)
+        threads = torch.get_num_threads()
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        try:
+            return self._train(stock_data, epochs, batch_size, learning_rate, progress, save,
+                               sequences_path, patience, min_delta, checkpoint_dir, checkpoint_every, resume,
+                               incremental, replay_ratio)
+        finally:
+            torch.set_num_threads(threads)
+    
+    def _train(self, stock_data, epochs, batch_size, learning_rate, progress, save,
+               sequences_path, patience, min_delta, checkpoint_dir, checkpoint_every, resume,
+               incremental, replay_ratio):
+        progress = progress or (lambda **fields: None)
+        progress(stage='preparing')
+        start = time.perf_counter()
+        # The weights are about to change; until they are exported again,
+        # predictions go through the eager model
+        self.runtime = None
+        table = StockTable.coerce(stock_data)
+        mode = 'full'
+        if (incremental and self.model is not None and self.trained_through is not None
+                and self.model.fc2.out_features == self.horizon):
+            mode = 'incremental'
+        print(f"🚀 Starting LSTM training ({mode})...")
+        
+        if mode == 'full':
+            X_seq, y = self.create_sequences(self.prepare_data(table), path=sequences_path)
+            n_replay = 0
+            if len(X_seq) < 50:
+                raise ValueError(f"Need at least 50 sequences, got {len(X_seq)}")
+        else:
+            X_seq, y, n_replay = self._incremental_sequences(table, replay_ratio)
+            if len(X_seq) - n_replay < 10:
+                raise ValueError(f"Need at least 10 new sequences since {self.trained_through.date()}, "
+                                 f"got {len(X_seq) - n_replay}")
+        
+        print(f"📊 Created {len(X_seq)} sequences ({n_replay} replayed)")
+        
+        # Split (last 20% of the sequences for testing, unshuffled: when
+        # fine-tuning, the newest 20% of the new ones) and scale in place
+        n_test = int(np.ceil((len(X_seq) - n_replay) * 0.2))
+        X_train, X_test = X_seq[:-n_test], X_seq[-n_test:]
+        y_train, y_test = y[:-n_test], y[-n_test:]
+        if mode == 'full':
+            self.replay_X, self.replay_y, self.replay_seen = None, None, 0
+        self._update_replay(X_train[n_replay:], y_train[n_replay:])
+        self._scale_sequences(X_train, X_test, fit=(mode == 'full'))
+        
+        # One scaler column per forecast day
+        if mode == 'full':
+            self.scaler_y = StandardScaler().fit(y_train.reshape(len(y_train), -1))
+        y_train_scaled = self.scaler_y.transform(y_train.reshape(len(y_train), -1))
+        
+        # To tensors (sharing the sequence arrays' memory on CPU); the last
+        # 10% of the training sequences validate each epoch
+        n_val = max(1, int(len(X_train) * 0.1))
+        X_train_t = torch.from_numpy(X_train).to(self.device)
         y_train_t = torch.FloatTensor(y_train_scaled).to(self.device)
-        X_test_t = torch.FloatTensor(X_test_scaled).to(self.device)
-        y_test_t = torch.FloatTensor(y_test_scaled).to(self.device)
+        X_fit_t, y_fit_t = X_train_t[:-n_val], y_train_t[:-n_val]
+        X_val_t, y_val_t = X_train_t[-n_val:], y_train_t[-n_val:]
+        X_test_t = torch.from_numpy(X_test).to(self.device)
+        
+        # Whole shuffled batches are gathered with one index per batch
+        generator = torch.Generator().manual_seed(42)
+        dataset = TensorDataset(X_fit_t, y_fit_t)
+        loader = DataLoader(
+            dataset, batch_size=None,
+            sampler=BatchSampler(RandomSampler(dataset, generator=generator), batch_size, drop_last=False)
+        )
         
-        # Initialize model
-        self.model = LSTMStockPredictor(input_size=X_train.shape[2]).to(self.device)
+        # Initialize model (fine-tuning continues from a copy of the loaded
+        # weights, which are views of the artifact file)
+        model = LSTMStockPredictor(input_size=X_train.shape[2], horizon=self.horizon)
+        if mode == 'incremental':
+            model.load_state_dict(self.model.state_dict())
+        self.model = model.to(self.device)
         criterion = nn.MSELoss()
         optimizer = torch.optim.Adam(self.model.parameters(), lr=learning_rate)
+        scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(optimizer, mode='min', factor=0.5, patience=2)
+        
+        state = {'epoch': 0, 'best_loss': float('inf'), 'best_epoch': 0, 'best_state': None, 'bad_epochs': 0}
+        if mode == 'incremental':
+            # Fine-tuning never ends on weights that validate worse than the loaded ones
+            state.update(best_loss=criterion(self._forward(X_val_t), y_val_t).item(),
+                         best_state={k: v.detach().clone() for k, v in self.model.state_dict().items()})
+        fingerprint = {
+            'train_samples': len(X_fit_t), 'val_samples': n_val, 'batch_size': batch_size,
+            'learning_rate': learning_rate, 'horizon': self.horizon, 'mode': mode,
+            'scaler_mean': self.scaler_X.mean_.tolist()
+        }
+        checkpoint_path = os.path.join(checkpoint_dir, "lstm_checkpoint.pt") if checkpoint_dir else None
+        if checkpoint_path and resume:
+            self._resume(checkpoint_path, fingerprint, optimizer, scheduler, generator, state)
         
         # Training loop
-        print(f"\n🏋️  Training for {epochs} epochs...")
-        for epoch in range(epochs):
+        print(f"\n🏋️  Training for up to {epochs} epochs...")
+        stopped_early = False
+        for epoch in range(state['epoch'], epochs):
             self.model.train()
-            for i in range(0, len(X_train_t), batch_size):
-                batch_X = X_train_t[i:i+batch_size]
-                batch_y = y_train_t[i:i+batch_size]
-                
-                outputs = self.model(batch_X).squeeze()
+            epoch_loss, n_batches = 0.0, 0
+            for batch_X, batch_y in loader:
+                outputs = self.model(batch_X)
                 loss = criterion(outputs, batch_y)
                 
                 optimizer.zero_grad()
                 loss.backward()
                 optimizer.step()
+                epoch_loss += loss.item()
+                n_batches += 1
             
+            val_loss = criterion(self._forward(X_val_t), y_val_t).item()
+            scheduler.step(val_loss)
+            state['epoch'] = epoch + 1
+            if val_loss < state['best_loss'] - min_delta:
+                state.update(best_loss=val_loss, best_epoch=epoch + 1, bad_epochs=0,
+                             best_state={k: v.detach().clone() for k, v in self.model.state_dict().items()})
+            else:
+                state['bad_epochs'] += 1
+            stopped_early = state['bad_epochs'] >= patience
+            
+            progress(stage='training', epoch=epoch + 1, epochs=epochs,
+                     loss=round(epoch_loss / max(1, n_batches), 5), val_loss=round(val_loss, 5),
+                     lr=optimizer.param_groups[0]['lr'])
             if (epoch + 1) % 10 == 0:
-                self.model.eval()
-                with torch.no_grad():
-                    test_pred = self.model(X_test_t).squeeze()
-                    test_loss = criterion(test_pred, y_test_t).item()
-                print(f"Epoch [{epoch+1}/{epochs}] - Test Loss: {test_loss:.4f}")
+                print(f"Epoch [{epoch+1}/{epochs}] - Validation Loss: {val_loss:.4f}")
+            
+            if checkpoint_path and ((epoch + 1) % checkpoint_every == 0 or stopped_early):
+                self._write_checkpoint(checkpoint_path, fingerprint, optimizer, scheduler, generator, state)
+            if stopped_early:
+                print(f"⏹️  Early stop at epoch {epoch + 1}: best validation loss "
+                      f"{state['best_loss']:.4f} at epoch {state['best_epoch']}")
+                break
+        
+        if state['best_state'] is not None:
+            self.model.load_state_dict(state['best_state'])
         
         # Final metrics
-        self.model.eval()
-        with torch.no_grad():
-            test_pred_scaled = self.model(X_test_t).squeeze().cpu().numpy()
-            test_pred = self.scaler_y.inverse_transform(test_pred_scaled.reshape(-1, 1)).flatten()
+        progress(stage='evaluating')
+        test_pred = self.scaler_y.inverse_transform(self._forward(X_test_t).cpu().numpy())
+        y_test = y_test.reshape(test_pred.shape)
         
+        # Over every forecast day; per day as well for multi-day horizons
         mae = np.mean(np.abs(y_test - test_pred))
         rmse = np.sqrt(np.mean((y_test - test_pred) ** 2))
         r2 = 1 - (np.sum((y_test - test_pred) ** 2) / np.sum((y_test - np.mean(y_test)) ** 2))
+        train_seconds = time.perf_counter() - start
         
-        print(f"\n✅ Training Complete!")
+        self.trained_through = table.frame['tarikh'].max()
+        self.trained_ids = None
+        if 'id' in table.frame.columns:
+            self.trained_ids = np.unique(record_hashes(table.frame['id'].dropna()))
+        print(f"\n✅ Training Complete! ({mode}, {state['epoch']} epochs, {train_seconds:.1f}s)")
         print(f"📈 MAE: {mae:.2f}, RMSE: {rmse:.2f}, R²: {r2:.4f}")
         
-        self.save_model()
+        if save:
+            progress(stage='saving')
+            self.save_model()
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
         
         return {'mae': float(mae), 'rmse': float(rmse), 'r2': float(r2),
-                'train_samples': len(X_train), 'test_samples': len(X_test)}
+                'train_samples': len(X_fit_t), 'val_samples': n_val, 'test_samples': len(X_test),
+                'epochs_run': state['epoch'], 'best_epoch': state['best_epoch'],
+                'stopped_early': stopped_early, 'train_seconds': round(train_seconds, 2),
+                'horizon': self.horizon, 'mae_by_day': np.abs(y_test - test_pred).mean(axis=0).round(4).tolist(),
+                'mode': mode, 'replay_samples': n_replay, 'trained_through': str(self.trained_through.date())}
+    
+    def _forward(self, X, batch_size=4096):
+        """Scaled model outputs (n, horizon) for many sequences, eval mode, in batches"""
+        if self.model.training:
+            self.model.eval()
+        with torch.no_grad():
+            return torch.cat([self.model(X[i:i + batch_size]) for i in range(0, len(X), batch_size)])
+    
+    def _write_checkpoint(self, path, fingerprint, optimizer, scheduler, generator, state):
+        """Everything needed to continue training after the last finished epoch"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        torch.save({
+            'fingerprint': fingerprint,
+            'model': self.model.state_dict(),
+            'optimizer': optimizer.state_dict(),
+            'scheduler': scheduler.state_dict(),
+            'generator': generator.get_state(),
+            'rng': torch.get_rng_state(),  # dropout masks
+            'state': state
+        }, tmp_path)
+        os.replace(tmp_path, path)  # a crash mid-write keeps the previous checkpoint
+    
+    def _resume(self, path, fingerprint, optimizer, scheduler, generator, state):
+        """Restore a checkpoint written for the same data and settings"""
+        if not os.path.exists(path):
+            return
+        checkpoint = torch.load(path, map_location=self.device, weights_only=False)
+        saved = checkpoint['fingerprint']
+        if {k: v for k, v in saved.items() if k != 'scaler_mean'} != \
+                {k: v for k, v in fingerprint.items() if k != 'scaler_mean'} \
+                or not np.allclose(saved['scaler_mean'], fingerprint['scaler_mean']):
+            print("⚠️  Checkpoint is for different data or settings, training from scratch")
+            return
+        self.model.load_state_dict(checkpoint['model'])
+        optimizer.load_state_dict(checkpoint['optimizer'])
+        scheduler.load_state_dict(checkpoint['scheduler'])
+        generator.set_state(checkpoint['generator'])
+        torch.set_rng_state(checkpoint['rng'])
+        state.update(checkpoint['state'])
+        print(f"↩️  Resuming from epoch {state['epoch']}")
     
     def predict(self, recent_data):
-        """Predict next order quantity"""
+        """Predict next order quantity (a list of `horizon` quantities if horizon > 1)"""
         if self.model is None:
             self.load_model()
         
@@ -202,37 +553,153 @@ class LSTMTrainer:
         sequence_scaled = self.scaler_X.transform(sequence.reshape(-1, sequence.shape[-1])).reshape(1, *sequence.shape)
         sequence_tensor = torch.FloatTensor(sequence_scaled).to(self.device)
         
-        with torch.no_grad():
-            pred_scaled = self.model(sequence_tensor).squeeze().cpu().numpy()
-            prediction = self.scaler_y.inverse_transform([[pred_scaled]])[0][0]
+        with torch.no_grad(), stage('inference', 'lstm'):
+            pred_scaled = self.model(sequence_tensor).cpu().numpy()
+            predictions = self.scaler_y.inverse_transform(pred_scaled)[0]
         
-        return max(0, round(prediction))
+        if self.horizon > 1:
+            return [max(0, round(prediction)) for prediction in predictions]
+        return max(0, round(predictions[0]))
     
-    def save_model(self):
-        os.makedirs("models/lstm", exist_ok=True)
-        torch.save({
-            'model_state_dict': self.model.state_dict(),
+    def predict_batch(self, recents):
+        """
+        Next order quantity of many items in one forward pass
+        
+        Features of all items are built together with the group kernels,
+        each item's last sequence_length rows stacked into one
+        (n_items, sequence_length, n_features) batch. Nothing on the
+        trainer is modified, so one instance can serve concurrent requests.
+        
+        Args:
+            recents: each item's last rows (raw tarikh/stockIn/baki/order
+                frames, e.g. FeatureStateStore.recent with
+                sequence_length + LOOKBACK rows), oldest first
+        
+        Returns:
+            int array of rounded, non-negative predictions, one per item,
+            or (n_items, horizon) with a multi-day horizon
+        """
+        if self.model is None:
+            self.load_model()
+        if len(recents) == 0:
+            return self.predict_sequences([])
+        
+        lengths = np.array([len(recent) for recent in recents])
+        if (lengths < self.sequence_length).any():
+            raise ValueError(f"Every item needs at least {self.sequence_length} rows")
+        
+        with stage('features', 'lstm'):
+            values = lstm_features(pd.concat(recents, ignore_index=True), lengths, self.feature_columns)
+            ends = np.cumsum(lengths)
+            sequences = self.sequence_windows(values)[ends - self.sequence_length]
+        return self.predict_sequences(sequences)
+    
+    def predict_sequences(self, sequences, batch_size=1024):
+        """
+        Rounded, non-negative predictions for raw (unscaled) sequences of
+        shape (n, sequence_length, n_features): scaling, forward passes and
+        inverse scaling each done once over the whole batch. Shape (n,), or
+        (n, horizon) if horizon > 1.
+        """
+        if self.runtime is not None:
+            with stage('inference', 'lstm'):
+                return self.runtime.predict_sequences(sequences, batch_size)
+        if len(sequences) == 0:
+            return np.zeros((0, self.horizon) if self.horizon > 1 else 0, dtype=int)
+        
+        shape = sequences.shape
+        scaled = self.scaler_X.transform(sequences.reshape(-1, shape[-1])).reshape(shape)
+        with stage('inference', 'lstm'):
+            outputs = self._forward(torch.as_tensor(scaled, dtype=torch.float32).to(self.device), batch_size)
+            predicted = self.scaler_y.inverse_transform(outputs.cpu().numpy())
+        if self.horizon == 1:
+            predicted = predicted.ravel()
+        return np.maximum(0, np.round(predicted)).astype(int)
+    
+    def save_model(self, directory="models/lstm", export=True):
+        """
+        Weights and scalers as raw arrays in one memory-mappable artifact;
+        with export, also the frozen float32 and int8 TorchScript graphs,
+        and predictions go through the float32 one from then on
+        """
+        arrays = {
+            f'weights.{name}': tensor.detach().cpu().numpy()
+            for name, tensor in self.model.state_dict().items()
+        }
+        meta = {
             'feature_columns': self.feature_columns,
             'sequence_length': self.sequence_length,
-            'input_size': self.model.lstm1.input_size
-        }, "models/lstm/lstm_model.pth")
-        
-        with open("models/lstm/scalers.pkl", 'wb') as f:
-            pickle.dump({'scaler_X': self.scaler_X, 'scaler_y': self.scaler_y}, f)
+            'input_size': self.model.lstm1.input_size,
+            'horizon': self.horizon,
+            'trained_through': self.trained_through.isoformat() if self.trained_through is not None else None,
+            'replay_seen': self.replay_seen
+        }
+        if self.replay_X is not None:
+            arrays.update({'replay.X': self.replay_X, 'replay.y': self.replay_y})
+        if self.trained_ids is not None:
+            arrays['trained.ids'] = self.trained_ids
+        for part in (scaler_arrays(self.scaler_X, 'scaler_X'), scaler_arrays(self.scaler_y, 'scaler_y')):
+            arrays.update(part[0])
+            meta.update(part[1])
+        write_artifact(os.path.join(directory, "lstm_model.bin"), arrays, meta)
+        
+        if export:
+            parity = export_graphs(self.model, directory, self.sequence_length, len(self.feature_columns))
+            # Parity in order units: scaled outputs times the target scale
+            units = float(self.scaler_y.scale_[0])
+            print("🧊 Exported TorchScript graphs, max |diff| vs eager: " + ", ".join(
+                f"{precision} {error * units:.4f}" for precision, error in parity.items()
+            ))
+            self.runtime = LSTMRuntime(directory)
         
         print("💾 LSTM model saved!")
     
-    def load_model(self):
-        checkpoint = torch.load("models/lstm/lstm_model.pth", map_location=self.device)
+    def load_model(self, directory="models/lstm"):
+        artifact_path = os.path.join(directory, "lstm_model.bin")
+        if not os.path.exists(artifact_path):
+            self._load_legacy(directory)
+            print("✅ LSTM model loaded!")
+            return
+        
+        arrays, meta = read_artifact(artifact_path)
+        self.feature_columns = meta['feature_columns']
+        self.sequence_length = meta['sequence_length']
+        self.horizon = meta.get('horizon', 1)
+        self.trained_through = pd.Timestamp(meta['trained_through']) if meta.get('trained_through') else None
+        self.replay_X, self.replay_y = arrays.get('replay.X'), arrays.get('replay.y')
+        self.replay_seen = meta.get('replay_seen', 0)
+        self.trained_ids = arrays.get('trained.ids')
+        self.scaler_X = scaler_from_arrays(arrays, meta, 'scaler_X')
+        self.scaler_y = scaler_from_arrays(arrays, meta, 'scaler_y')
+        
+        # assign=True makes the parameters the mapped arrays themselves
+        # (on CPU), so workers share the weight pages instead of copying
+        state = {
+            name[len('weights.'):]: torch.from_numpy(array)
+            for name, array in arrays.items() if name.startswith('weights.')
+        }
+        model = LSTMStockPredictor(meta['input_size'], horizon=self.horizon)
+        model.load_state_dict(state, assign=True)
+        self.model = model.to(self.device)
+        self.model.eval()
+        # Artifacts saved with export=False have no graph to serve from
+        has_graph = os.path.exists(os.path.join(directory, GRAPH_FILES['fp32']))
+        self.runtime = LSTMRuntime(directory) if has_graph else None
+        
+        print("✅ LSTM model loaded!")
+    
+    def _load_legacy(self, directory):
+        """Models saved with torch.save + pickle before the .bin artifact"""
+        checkpoint = torch.load(os.path.join(directory, "lstm_model.pth"), map_location=self.device)
         self.feature_columns = checkpoint['feature_columns']
         self.sequence_length = checkpoint['sequence_length']
+        self.horizon = 1
         self.model = LSTMStockPredictor(checkpoint['input_size']).to(self.device)
         self.model.load_state_dict(checkpoint['model_state_dict'])
         self.model.eval()
+        self.runtime = None
         
-        with open("models/lstm/scalers.pkl", 'rb') as f:
+        with open(os.path.join(directory, "scalers.pkl"), 'rb') as f:
             scalers = pickle.load(f)
             self.scaler_X = scalers['scaler_X']
             self.scaler_y = scalers['scaler_y']
-        
-        print("✅ LSTM model loaded!")
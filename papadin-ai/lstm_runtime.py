@@ -0,0 +1,147 @@
+# papadin-ai/lstm_runtime.py
+"""
+Inference-only LSTM runtime
+LSTMTrainer.save_model exports the trained network as frozen TorchScript
+graphs next to its .bin artifact: a float32 trace and a dynamically
+int8-quantized one (LSTM and Linear weights stored as int8, activations
+quantized on the fly). LSTMRuntime loads a graph plus the scalers and
+feature settings from the artifact header and serves predictions with
+torch.jit, NumPy and the feature kernels only - no nn.Module definition,
+sklearn or training code is imported. A trainer that saved or loaded
+the graphs predicts through an LSTMRuntime too, so /ml/predict-lstm is
+served by the float32 graph.
+
+Usage:
+    runtime = LSTMRuntime("models/lstm")  # or precision='int8'
+    quantities = runtime.predict_batch(recents)
+"""
+
+import copy
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import torch
+from numpy.lib.stride_tricks import sliding_window_view
+
+from feature_kernels import GroupLayout
+from model_artifacts import read_artifact
+
+GRAPH_FILES = {'fp32': "lstm_model.ts", 'int8': "lstm_model_int8.ts"}
+
+
+def lstm_features(frame, lengths, feature_columns):
+    """
+    LSTM feature rows of consecutive item frames (LSTMTrainer.prepare_recent
+    for all of them at once): raw tarikh/stockIn/baki/order rows, `lengths`
+    rows per item, oldest first. Returns a float64 (n_rows, n_features)
+    array in `feature_columns` order.
+    """
+    layout = GroupLayout(np.repeat(np.arange(len(lengths)), lengths))
+    order = frame['order'].to_numpy(dtype=np.float64)
+    baki = frame['baki'].to_numpy(dtype=np.float64)
+    day_of_week = pd.DatetimeIndex(frame['tarikh']).dayofweek.to_numpy()
+
+    columns = {
+        'stockIn': frame['stockIn'].to_numpy(dtype=np.float64),
+        'baki': baki,
+        'day_of_week': day_of_week,
+        'is_weekend': (day_of_week >= 5).astype(int)
+    }
+    for lag in [1, 3, 7]:
+        columns[f'order_lag_{lag}'] = layout.shift(order, lag)
+        columns[f'baki_lag_{lag}'] = layout.shift(baki, lag)
+    for window in [3, 7]:
+        columns[f'order_mean_{window}'] = layout.rolling_mean(order, window)
+        columns[f'baki_mean_{window}'] = layout.rolling_mean(baki, window)
+
+    values = np.column_stack([columns[col] for col in feature_columns]).astype(np.float64)
+    return np.nan_to_num(values, nan=0.0)
+
+
+def export_graphs(model, directory, sequence_length, n_features, probe_size=256):
+    """
+    Trace `model` (eval mode) to frozen float32 and int8 TorchScript
+    graphs in `directory`
+
+    Returns the parity check: {precision: max |graph - eager| over
+    `probe_size` random standardized sequences}, in scaled output units
+    """
+    model = copy.deepcopy(model).cpu().eval()
+    example = torch.zeros(1, sequence_length, n_features)
+    quantized = torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.LSTM, torch.nn.Linear}, dtype=torch.qint8
+    )
+
+    probe = torch.randn(probe_size, sequence_length, n_features, generator=torch.Generator().manual_seed(0))
+    parity = {}
+    with torch.no_grad():
+        expected = model(probe)
+        for precision, module in (('fp32', model), ('int8', quantized)):
+            with warnings.catch_warnings():
+                # the LSTM's shape checks are constant for any batch size
+                warnings.simplefilter('ignore', torch.jit.TracerWarning)
+                graph = torch.jit.freeze(torch.jit.trace(module, example))
+            torch.jit.save(graph, os.path.join(directory, GRAPH_FILES[precision]))
+            parity[precision] = float((graph(probe) - expected).abs().max())
+    return parity
+
+
+class LSTMRuntime:
+    """
+    Serves an exported LSTM graph
+
+    Args:
+        directory: model directory written by LSTMTrainer.save_model
+        precision: 'fp32', or 'int8' for the quantized graph (a quarter of
+            the size; on CPUs without fast int8 kernels it is not faster)
+    """
+
+    def __init__(self, directory="models/lstm", precision='fp32'):
+        if precision not in GRAPH_FILES:
+            raise ValueError(f"Unknown precision: {precision}. Choose from {', '.join(GRAPH_FILES)}")
+        arrays, meta = read_artifact(os.path.join(directory, "lstm_model.bin"))
+        self.precision = precision
+        self.feature_columns = meta['feature_columns']
+        self.sequence_length = meta['sequence_length']
+        self.horizon = meta.get('horizon', 1)
+        self.x_mean, self.x_scale = arrays['scaler_X.mean_'], arrays['scaler_X.scale_']
+        self.y_mean, self.y_scale = arrays['scaler_y.mean_'], arrays['scaler_y.scale_']
+        self.graph = torch.jit.load(os.path.join(directory, GRAPH_FILES[precision]), map_location='cpu')
+
+    def predict_sequences(self, sequences, batch_size=1024):
+        """
+        Rounded, non-negative predictions for raw (unscaled) sequences of
+        shape (n, sequence_length, n_features); (n, horizon) if horizon > 1
+        """
+        if len(sequences) == 0:
+            return np.zeros((0, self.horizon) if self.horizon > 1 else 0, dtype=int)
+
+        scaled = torch.as_tensor((sequences - self.x_mean) / self.x_scale, dtype=torch.float32)
+        with torch.no_grad():
+            outputs = torch.cat([
+                self.graph(scaled[i:i + batch_size]) for i in range(0, len(scaled), batch_size)
+            ])
+        predicted = outputs.numpy().astype(np.float64) * self.y_scale + self.y_mean
+        if self.horizon == 1:
+            predicted = predicted.ravel()
+        return np.maximum(0, np.round(predicted)).astype(int)
+
+    def predict_batch(self, recents):
+        """
+        Next order quantity of many items (see LSTMTrainer.predict_batch)
+
+        Args:
+            recents: each item's last raw rows, at least sequence_length
+        """
+        if len(recents) == 0:
+            return self.predict_sequences([])
+
+        lengths = np.array([len(recent) for recent in recents])
+        if (lengths < self.sequence_length).any():
+            raise ValueError(f"Every item needs at least {self.sequence_length} rows")
+
+        values = lstm_features(pd.concat(recents, ignore_index=True), lengths, self.feature_columns)
+        windows = sliding_window_view(values, (self.sequence_length, values.shape[1]))[:, 0]
+        return self.predict_sequences(windows[np.cumsum(lengths) - self.sequence_length])
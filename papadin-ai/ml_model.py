@@ -1,36 +1,112 @@
 # papadin-ai/ml_model.py
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import pickle
 import os
+import time
 from datetime import datetime, timedelta
 
+from stock_table import StockTable
+from feature_kernels import GroupLayout, group_codes
+from compiled_forest import CompiledForest
+from category_encoder import CategoryEncoder
+from model_artifacts import (
+    write_artifact, read_artifact, scaler_arrays, scaler_from_arrays,
+    forest_arrays, forest_from_arrays
+)
+from metrics import stage
+
+def _to_float(value):
+    """A numeric input the way pd.to_numeric(errors='coerce') + nan_to_num reads it"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if np.isnan(number) else number
+
+
+def _random_forest(n_jobs):
+    return RandomForestRegressor(
+        n_estimators=100,
+        max_depth=10,
+        min_samples_split=5,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+
+def _hist_gradient_boosting(n_jobs):
+    # Boosting rounds are chosen by early stopping on a 10% validation split;
+    # threads come from OpenMP, not n_jobs
+    return HistGradientBoostingRegressor(
+        max_iter=500,
+        learning_rate=0.1,
+        early_stopping=True,
+        validation_fraction=0.1,
+        n_iter_no_change=20,
+        random_state=42
+    )
+
+# Model backend name -> factory(n_jobs) of an unfitted sklearn regressor
+BACKENDS = {
+    'random_forest': _random_forest,
+    'hist_gradient_boosting': _hist_gradient_boosting
+}
+
+
 class StockPredictor:
-    def __init__(self):
+    def __init__(self, n_jobs=-1, backend='random_forest'):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}. Choose from {', '.join(BACKENDS)}")
+        self.n_jobs = n_jobs  # Cores for fitting/predicting (-1 = all)
+        self.backend = backend
         self.model = None
         self.scaler = StandardScaler()
-        self.label_encoders = {}
+        self.label_encoders = {}  # column -> CategoryEncoder
         self.feature_columns = []
+        self.compiled = None  # flat-array copy of model + scaler for fast inference
+        self.artifact_path = "models/stock_predictor.bin"
+        # Pickle files of models saved before the .bin artifact (load only)
         self.model_path = "models/stock_predictor.pkl"
         self.encoders_path = "models/label_encoders.pkl"
-        
-    def prepare_data(self, stock_data):
+    
+    @property
+    def model(self):
         """
-        Convert raw stock data to ML-ready format
+        The sklearn model. After load_model a random forest is rebuilt
+        from the artifact only when first needed (incremental training,
+        very large batches); predictions run on the memory-mapped compiled
+        forest. Gradient boosting artifacts hold only the compiled trees.
         """
-        df = pd.DataFrame(stock_data)
+        if self._model is None and self._forest_source is not None:
+            self._model = forest_from_arrays(*self._forest_source, 'forest')
+            self._forest_source = None
+        return self._model
+    
+    @model.setter
+    def model(self, forest):
+        self._model = forest
+        self._forest_source = None
+    
+    def _ensure_loaded(self):
+        if self.compiled is None and self.model is None:
+            self.load_model()
         
-        # CRITICAL FIX: Convert numeric columns FIRST
-        numeric_cols = ['stockIn', 'baki', 'order']
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    CATEGORICAL_COLUMNS = ['outlet', 'item', 'unit']
+    
+    @stage('features', 'random_forest')
+    def prepare_data(self, stock_data, fit=False):
+        """
+        Convert raw stock data (records or a shared StockTable) to ML-ready format
         
-        # Convert date to datetime
-        df['tarikh'] = pd.to_datetime(df['tarikh'])
+        Args:
+            fit: add outlets/items/units not seen yet to the encoders
+                (training); otherwise they are encoded as unknown
+        """
+        # Typed, sorted columns come from the shared table; only add new columns
+        df = StockTable.coerce(stock_data).to_frame()
         
         # Extract time-based features
         df['day_of_week'] = df['tarikh'].dt.dayofweek  # 0=Monday, 6=Sunday
@@ -38,104 +114,144 @@ class StockPredictor:
         df['month'] = df['tarikh'].dt.month
         df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
         
-        # Encode categorical features
-        categorical_cols = ['outlet', 'item', 'unit']
-        for col in categorical_cols:
+        # Encode categorical features (unseen values -> reserved code, per row)
+        for col in self.CATEGORICAL_COLUMNS:
             if col not in self.label_encoders:
-                self.label_encoders[col] = LabelEncoder()
-                df[f'{col}_encoded'] = self.label_encoders[col].fit_transform(df[col].astype(str))
-            else:
-                # Handle new values gracefully
-                try:
-                    df[f'{col}_encoded'] = self.label_encoders[col].transform(df[col].astype(str))
-                except ValueError:
-                    # New category not seen during training
-                    df[f'{col}_encoded'] = 0
+                self.label_encoders[col] = CategoryEncoder()
+            encoder = self.label_encoders[col]
+            if fit or len(encoder) == 0:
+                encoder.update(df[col])
+            df[f'{col}_encoded'] = encoder.encode(df[col])
         
         return df
     
+    @stage('features', 'random_forest')
     def create_features(self, df):
         """
         Create features for prediction
         """
-        # Sort by outlet, item, and date
-        df = df.sort_values(['outlet', 'item', 'tarikh'])
+        # Rows arrive sorted by outlet, item, and date from StockTable, so the
+        # kernels work on contiguous groups without re-sorting
+        layout = GroupLayout(group_codes(df, ('outlet', 'item')))
+        order = df['order'].to_numpy()
         
         # Create lag features (previous days' data)
-        df['prev_order_1day'] = df.groupby(['outlet', 'item'])['order'].shift(1)
-        df['prev_order_3day'] = df.groupby(['outlet', 'item'])['order'].shift(3)
-        df['prev_order_7day'] = df.groupby(['outlet', 'item'])['order'].shift(7)
+        df['prev_order_1day'] = layout.shift(order, 1)
+        df['prev_order_3day'] = layout.shift(order, 3)
+        df['prev_order_7day'] = layout.shift(order, 7)
         
         # Rolling averages
-        df['avg_order_7day'] = df.groupby(['outlet', 'item'])['order'].transform(
-            lambda x: x.rolling(window=7, min_periods=1).mean()
-        )
-        df['avg_order_30day'] = df.groupby(['outlet', 'item'])['order'].transform(
-            lambda x: x.rolling(window=30, min_periods=1).mean()
-        )
+        df['avg_order_7day'] = layout.rolling_mean(order, window=7)
+        df['avg_order_30day'] = layout.rolling_mean(order, window=30)
         
         # Stock level features
-        df['prev_baki'] = df.groupby(['outlet', 'item'])['baki'].shift(1)
-        df['prev_stockIn'] = df.groupby(['outlet', 'item'])['stockIn'].shift(1)
+        df['prev_baki'] = layout.shift(df['baki'].to_numpy(), 1)
+        df['prev_stockIn'] = layout.shift(df['stockIn'].to_numpy(), 1)
         
         # Usage rate
         df['usage_rate'] = (df['stockIn'] - df['baki']) / (df['stockIn'] + 1)
         
-        # Fill NaN values
-        df = df.fillna(0)
+        # Fill NaN values (numeric only: categorical columns can't take 0)
+        numeric = df.select_dtypes('number').columns
+        df[numeric] = df[numeric].fillna(0)
         
         return df
     
-    def train(self, stock_data):
+    FEATURE_COLUMNS = [
+        'outlet_encoded', 'item_encoded', 'unit_encoded',
+        'day_of_week', 'day_of_month', 'month', 'is_weekend',
+        'prev_order_1day', 'prev_order_3day', 'prev_order_7day',
+        'avg_order_7day', 'avg_order_30day',
+        'prev_baki', 'prev_stockIn', 'stockIn', 'baki',
+        'usage_rate'
+    ]
+    
+    def train(self, stock_data, progress=None, save=True, incremental=False,
+              window_days=30, new_trees=25, max_trees=100, backend=None):
         """
         Train the prediction model
+        
+        Args:
+            stock_data: raw records or a shared StockTable
+            progress: optional callback(**fields) for job status updates
+            save: write artifacts to the default paths (the model registry
+                passes False and publishes a version instead)
+            incremental: keep the loaded forest and its scaler and
+                warm-start `new_trees` trees on the last `window_days` of
+                data; falls back to a full refit if there is no forest yet
+            window_days: days of newest data the new trees are fitted on
+            new_trees: trees added per incremental run
+            max_trees: forest size cap; the oldest trees beyond it are
+                retired (max_trees == initial size keeps the size constant,
+                a large value only grows the forest)
+            backend: 'random_forest' or 'hist_gradient_boosting' (default:
+                keep the current one); switching backends, or incremental
+                training of a gradient boosting model, does a full refit
+        
+        Both modes hold out the newest 20% of the training rows (by date)
+        for the reported metrics.
         """
+        progress = progress or (lambda **fields: None)
+        start = time.perf_counter()
+        if backend is not None and backend != self.backend:
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown backend: {backend}. Choose from {', '.join(BACKENDS)}")
+            self.backend, self.model, self.compiled = backend, None, None
+        # Only a random forest can warm-start more trees
+        mode = 'full'
+        if incremental and self.backend == 'random_forest' and self.model is not None:
+            mode = 'incremental'
+        
+        progress(stage='preparing')
         print("🔄 Preparing data...")
-        df = self.prepare_data(stock_data)
-        df = self.create_features(df)
+        if mode == 'full':
+            self.scaler = StandardScaler()
+        # New outlets/items/units get new codes; known ones keep theirs, so
+        # the existing trees stay valid and new trees learn the new codes
+        known = sum(len(encoder) for encoder in self.label_encoders.values())
+        df = self.create_features(self.prepare_data(stock_data, fit=True))
+        new_categories = sum(len(encoder) for encoder in self.label_encoders.values()) - known
         
         # Select features for training
-        self.feature_columns = [
-            'outlet_encoded', 'item_encoded', 'unit_encoded',
-            'day_of_week', 'day_of_month', 'month', 'is_weekend',
-            'prev_order_1day', 'prev_order_3day', 'prev_order_7day',
-            'avg_order_7day', 'avg_order_30day',
-            'prev_baki', 'prev_stockIn', 'stockIn', 'baki',
-            'usage_rate'
-        ]
+        self.feature_columns = list(self.FEATURE_COLUMNS)
         
         # Remove rows with insufficient history
-        df_train = df[df['prev_order_7day'] > 0].copy()
+        df_train = df[df['prev_order_7day'] > 0]
+        if mode == 'incremental':
+            cutoff = df_train['tarikh'].max() - pd.Timedelta(days=window_days)
+            df_train = df_train[df_train['tarikh'] > cutoff]
         
         if len(df_train) < 10:
             raise ValueError("Insufficient data for training. Need at least 10 records with history.")
         
-        X = df_train[self.feature_columns]
-        y = df_train['order']
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
-        
-        print(f"📊 Training with {len(X_train)} samples...")
+        # Time-ordered split: evaluate on the newest rows, never on the past
+        df_train = df_train.sort_values('tarikh', kind='stable')
+        n_test = max(1, int(len(df_train) * 0.2))
+        X_train = df_train[self.feature_columns].iloc[:-n_test]
+        y_train = df_train['order'].iloc[:-n_test]
+        X_test = df_train[self.feature_columns].iloc[-n_test:]
+        y_test = df_train['order'].iloc[-n_test:]
+        
+        print(f"📊 Training {self.backend} ({mode}) with {len(X_train)} samples...")
+        progress(stage='fitting', mode=mode, samples=len(X_train))
+        
+        if mode == 'full':
+            # Scale features
+            X_train_scaled = self.scaler.fit_transform(X_train)
+            
+            # Train the backend's model
+            self.model = BACKENDS[self.backend](self.n_jobs)
+            self.model.fit(X_train_scaled, y_train)
+            added, retired = len(self._trees()), 0
+        else:
+            # Existing trees split on scaled values, so the scaler stays fixed
+            X_train_scaled = self.scaler.transform(X_train)
+            added, retired = self._grow_forest(X_train_scaled, y_train, new_trees, max_trees)
         
-        # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         
-        # Train Random Forest model
-        self.model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=10,
-            min_samples_split=5,
-            random_state=42,
-            n_jobs=-1
-        )
-        
-        self.model.fit(X_train_scaled, y_train)
-        
         # Evaluate
+        progress(stage='evaluating')
         y_pred = self.model.predict(X_test_scaled)
         mae = mean_absolute_error(y_test, y_pred)
         rmse = np.sqrt(mean_squared_error(y_test, y_pred))
@@ -143,176 +259,347 @@ class StockPredictor:
         
         # Calculate accuracy as percentage
         accuracy = max(0, (1 - mae / y_test.mean()) * 100) if y_test.mean() > 0 else 0
+        train_seconds = time.perf_counter() - start
         
-        print(f"\n✅ Model trained successfully!")
+        print(f"\n✅ Model trained successfully ({mode}, {train_seconds:.1f}s)!")
         print(f"📈 Performance Metrics:")
         print(f"   - Accuracy: {accuracy:.1f}%")
         print(f"   - MAE (Mean Absolute Error): {mae:.2f}")
         print(f"   - RMSE (Root Mean Squared Error): {rmse:.2f}")
         print(f"   - R² Score: {r2:.2f}")
         
+        self._compile()
+        
         # Save model
-        self.save_model()
+        if save:
+            progress(stage='saving')
+            self.save_model()
         
         return {
-            'accuracy': round(accuracy, 1),
-            'mae': round(mae, 2),
-            'rmse': round(rmse, 2),
-            'r2': round(r2, 2),
+            'accuracy': round(float(accuracy), 1),
+            'mae': round(float(mae), 2),
+            'rmse': round(float(rmse), 2),
+            'r2': round(float(r2), 2),
             'training_samples': len(X_train),
-            'test_samples': len(X_test)
+            'test_samples': len(X_test),
+            'mode': mode,
+            'backend': self.backend,
+            'train_seconds': round(train_seconds, 2),
+            'trees': len(self._trees()),
+            'trees_added': added,
+            'trees_retired': retired,
+            'new_categories': new_categories
         }
     
-    def predict(self, outlet, item, current_data):
+    def _trees(self):
+        """Fitted trees: forest estimators or boosting iterations"""
+        if self.backend == 'hist_gradient_boosting':
+            return self.model._predictors
+        return self.model.estimators_
+    
+    def _compile(self):
+        """Flat-array forest with the scaler folded in"""
+        if self.backend == 'hist_gradient_boosting':
+            self.compiled = CompiledForest.from_hist_gradient_boosting(self.model, self.scaler)
+        else:
+            self.compiled = CompiledForest.from_sklearn(self.model, self.scaler)
+    
+    def _grow_forest(self, X, y, new_trees, max_trees):
+        """
+        Retire the oldest trees beyond max_trees, then warm-start new_trees
+        trees on (X, y). Trees are kept oldest first, so retirement is a
+        slice off the front. Returns (added, retired).
+        """
+        n_old = len(self.model.estimators_)
+        retired = min(n_old, max(0, n_old + new_trees - max_trees))
+        self.model.estimators_ = self.model.estimators_[retired:]
+        self.model.set_params(
+            warm_start=True,
+            n_estimators=len(self.model.estimators_) + new_trees,
+            n_jobs=self.n_jobs
+        )
+        self.model.fit(X, y)
+        self.model.set_params(warm_start=False)
+        return new_trees, retired
+    
+    # Numeric inputs taken from the latest feature row of each item
+    INPUT_COLUMNS = [
+        'prev_order_1day', 'prev_order_3day', 'prev_order_7day',
+        'avg_order_7day', 'avg_order_30day',
+        'prev_baki', 'prev_stockIn', 'stockIn', 'baki'
+    ]
+    
+    # Up to this many rows the compiled forest beats sklearn's predict;
+    # larger batches amortise sklearn's fixed per-call cost better
+    COMPILED_MAX_ROWS = 512
+    
+    def predict(self, outlet, item, current_data, as_of=None):
         """
         Predict next order quantity
         
         Args:
             outlet: outlet email
             item: item name
-            current_data: dict with current stock info
+            current_data: dict with current stock info (e.g. the latest
+                feature row from FeatureStateStore.latest_row)
+            as_of: day being ordered for (calendar features), default today
         """
-        if self.model is None:
-            self.load_model()
+        self._ensure_loaded()
         
-        # CRITICAL FIX: Convert all numeric values to float
-        def safe_float(value, default=0):
-            try:
-                return float(value)
-            except (ValueError, TypeError):
-                return default
+        if self.compiled is None:
+            row = {**current_data, 'outlet': outlet, 'item': item}
+            return self.predict_batch(pd.DataFrame([row]), as_of=as_of)[0]
         
-        # Create feature dict with type conversion
+        # Single row: build the feature vector directly, no DataFrame
+        now = datetime.now() if as_of is None else pd.Timestamp(as_of)
+        unit = current_data.get('unit')
         features = {
-            'outlet': str(outlet),
-            'item': str(item),
-            'unit': str(current_data.get('unit', 'PCS')),
-            'day_of_week': datetime.now().weekday(),
-            'day_of_month': datetime.now().day,
-            'month': datetime.now().month,
-            'is_weekend': 1 if datetime.now().weekday() >= 5 else 0,
-            'prev_order_1day': safe_float(current_data.get('prev_order_1day', 0)),
-            'prev_order_3day': safe_float(current_data.get('prev_order_3day', 0)),
-            'prev_order_7day': safe_float(current_data.get('prev_order_7day', 0)),
-            'avg_order_7day': safe_float(current_data.get('avg_order_7day', 0)),
-            'avg_order_30day': safe_float(current_data.get('avg_order_30day', 0)),
-            'prev_baki': safe_float(current_data.get('prev_baki', 0)),
-            'prev_stockIn': safe_float(current_data.get('prev_stockIn', 0)),
-            'stockIn': safe_float(current_data.get('stockIn', 0)),
-            'baki': safe_float(current_data.get('baki', 0)),
+            'day_of_week': now.weekday(),
+            'day_of_month': now.day,
+            'month': now.month,
+            'is_weekend': 1 if now.weekday() >= 5 else 0
         }
-        
-        # Calculate usage rate
+        for col in self.INPUT_COLUMNS:
+            features[col] = _to_float(current_data.get(col))
         features['usage_rate'] = (features['stockIn'] - features['baki']) / (features['stockIn'] + 1)
+        categories = {'outlet': str(outlet), 'item': str(item),
+                      'unit': 'PCS' if unit is None or unit != unit else str(unit)}
+        for col, value in categories.items():
+            encoder = self.label_encoders.get(col)
+            features[f'{col}_encoded'] = encoder.encode_one(value) if encoder else CategoryEncoder.UNKNOWN
+        
+        with stage('inference', 'random_forest'):
+            x = np.array([features[col] for col in self.feature_columns], dtype=np.float64)
+            predictions = np.maximum(0, np.round(self.compiled.predict(x))).astype(int)
+        
+        columns = {col: np.array([value]) for col, value in features.items()}
+        return self._format_predictions([item], predictions, columns)[0]
+    
+    def predict_batch(self, latest_rows, as_of=None):
+        """
+        Predict next order quantity for many items in one scale+predict pass
         
-        # Encode categorical features
-        for col in ['outlet', 'item', 'unit']:
-            if col in self.label_encoders:
-                try:
-                    features[f'{col}_encoded'] = self.label_encoders[col].transform([features[col]])[0]
-                except:
-                    features[f'{col}_encoded'] = 0
-            else:
-                features[f'{col}_encoded'] = 0
+        Args:
+            latest_rows: DataFrame with one row per (outlet, item) holding
+                outlet, item, unit and the INPUT_COLUMNS features (e.g. the
+                last row of each group from create_features)
+            as_of: day being ordered for (calendar features): one date, or
+                one per row; default today
+        
+        Returns:
+            list of prediction dicts, in row order
+        """
+        self._ensure_loaded()
         
-        # Create feature vector
-        X = pd.DataFrame([features])[self.feature_columns]
+        if len(latest_rows) == 0:
+            return []
         
-        # Scale features
-        X_scaled = self.scaler.transform(X)
+        features = self._batch_features(latest_rows, as_of)
+        predictions = self._predict_features(features)
+        return self._format_predictions(latest_rows['item'].tolist(), predictions, features)
+    
+    def predict_quantities(self, latest_rows, as_of=None):
+        """Predicted order quantities only (int array, row order), e.g. for backtests"""
+        self._ensure_loaded()
         
-        # Predict
-        prediction = self.model.predict(X_scaled)[0]
-        prediction = max(0, round(prediction))  # Ensure non-negative integer
+        if len(latest_rows) == 0:
+            return np.zeros(0, dtype=int)
+        return self._predict_features(self._batch_features(latest_rows, as_of))
+    
+    def latest_features(self, stock_data, as_of=None):
+        """
+        Last feature row of each (outlet, item) from the history dated
+        before `as_of` (all of it if None), for predict_batch
+        """
+        table = StockTable.coerce(stock_data)
+        if as_of is not None:
+            table = table.before(as_of)
+        df = self.create_features(self.prepare_data(table))
+        latest = df.iloc[table.group_offsets[1:] - 1]
+        return latest[latest['outlet'].notna() & latest['item'].notna()].reset_index(drop=True)
+    
+    def _batch_features(self, latest_rows, as_of):
+        """Model inputs for predict_batch, one row per item"""
+        n = len(latest_rows)
+        days = pd.DatetimeIndex(np.broadcast_to(
+            pd.to_datetime(datetime.now() if as_of is None else as_of), n
+        ))
+        features = pd.DataFrame(index=range(n))
+        
+        # Categorical inputs (the encoders compare them as strings)
+        features['outlet'] = latest_rows['outlet'].to_numpy()
+        features['item'] = latest_rows['item'].to_numpy()
+        unit = latest_rows['unit'] if 'unit' in latest_rows else pd.Series('PCS', index=latest_rows.index)
+        features['unit'] = unit.astype(object).fillna('PCS').to_numpy()
+        
+        # Calendar features are for the day being ordered for
+        features['day_of_week'] = days.dayofweek.to_numpy()
+        features['day_of_month'] = days.day.to_numpy()
+        features['month'] = days.month.to_numpy()
+        features['is_weekend'] = (features['day_of_week'] >= 5).astype(int)
         
-        # Calculate confidence
-        confidence = self._calculate_confidence(prediction, features)
+        # CRITICAL FIX: Convert all numeric values to float
+        for col in self.INPUT_COLUMNS:
+            if col in latest_rows:
+                values = pd.to_numeric(latest_rows[col], errors='coerce').to_numpy(dtype=float)
+                features[col] = np.nan_to_num(values, nan=0.0)
+            else:
+                features[col] = 0.0
         
-        return {
-            'item': item,
-            'prediction': int(prediction),
-            'confidence': int(confidence),
-            'current_baki': int(features['baki']),
-            'recommendation': self._generate_recommendation(prediction, features)
-        }
+        # Calculate usage rate
+        features['usage_rate'] = (features['stockIn'] - features['baki']) / (features['stockIn'] + 1)
+        
+        # Encode categorical features (unseen values -> reserved code, per row)
+        for col in self.CATEGORICAL_COLUMNS:
+            encoder = self.label_encoders.get(col)
+            if encoder is not None:
+                features[f'{col}_encoded'] = encoder.encode(features[col])
+            else:
+                features[f'{col}_encoded'] = CategoryEncoder.UNKNOWN
+        
+        return features
+    
+    def _predict_features(self, features):
+        """Rounded, non-negative predictions from one predict pass"""
+        with stage('inference', 'random_forest'):
+            # sklearn only for big batches, and only if its forest is in memory
+            if self.compiled is not None and (len(features) <= self.COMPILED_MAX_ROWS or self._model is None):
+                raw = self.compiled.predict(features[self.feature_columns].to_numpy(dtype=np.float64))
+            else:
+                raw = self.model.predict(self.scaler.transform(features[self.feature_columns]))
+            return np.maximum(0, np.round(raw)).astype(int)
+    
+    def _format_predictions(self, items, predictions, features):
+        """Prediction dicts; `features` maps column name -> per-row values"""
+        confidence = self._calculate_confidence(predictions, features)
+        recommendations = self._generate_recommendation(predictions, features)
+        current_baki = np.asarray(features['baki']).astype(int)
+        n = len(items)
+        
+        return [
+            {
+                'item': items[i],
+                'prediction': int(predictions[i]),
+                'confidence': int(confidence[i]),
+                'current_baki': int(current_baki[i]),
+                'recommendation': recommendations[i]
+            }
+            for i in range(n)
+        ]
     
-    def _calculate_confidence(self, prediction, features):
+    def _calculate_confidence(self, predictions, features):
         """
-        Calculate confidence score based on data quality
+        Calculate confidence scores based on data quality (vectorized)
         """
-        confidence = 85  # Base confidence
+        avg_7 = np.asarray(features['avg_order_7day'])
+        avg_30 = np.asarray(features['avg_order_30day'])
+        
+        confidence = np.full(len(predictions), 85)  # Base confidence
         
         # Increase confidence if we have good historical data
-        if features.get('avg_order_30day', 0) > 0:
-            confidence += 10
-        elif features.get('avg_order_7day', 0) > 0:
-            confidence += 5
+        confidence += np.where(avg_30 > 0, 10, np.where(avg_7 > 0, 5, 0))
         
         # Reduce if prediction is very different from average
-        avg = features.get('avg_order_7day', 0)
-        if avg > 0:
-            deviation = abs(prediction - avg) / avg
-            if deviation > 0.5:
-                confidence -= 15
-            elif deviation > 0.3:
-                confidence -= 10
-        
-        return max(60, min(95, confidence))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deviation = np.where(avg_7 > 0, np.abs(predictions - avg_7) / avg_7, 0)
+        confidence -= np.where(deviation > 0.5, 15, np.where(deviation > 0.3, 10, 0))
+        
+        return np.clip(confidence, 60, 95)
     
-    def _generate_recommendation(self, prediction, features):
+    RECOMMENDATION_TEMPLATES = [
+        "⚠️ URGENT: Very low stock! Order {prediction} units immediately.",
+        "⚠️ Low stock. Recommend ordering {prediction} units soon.",
+        "📦 Stock adequate. Consider ordering {prediction} units.",
+        "✅ Stock sufficient. Current level covers demand.",
+        "✅ Stock level good. Predicted order: {prediction} units."
+    ]
+    
+    def _generate_recommendation(self, predictions, features):
         """
-        Generate human-readable recommendation
+        Generate human-readable recommendations (template picked vectorized)
         """
-        current_baki = features.get('baki', 0)
-        
-        if current_baki < prediction * 0.3:
-            return f"⚠️ URGENT: Very low stock! Order {prediction} units immediately."
-        elif current_baki < prediction * 0.6:
-            return f"⚠️ Low stock. Recommend ordering {prediction} units soon."
-        elif current_baki < prediction:
-            return f"📦 Stock adequate. Consider ordering {prediction} units."
-        elif current_baki > prediction * 2:
-            return f"✅ Stock sufficient. Current level covers demand."
-        else:
-            return f"✅ Stock level good. Predicted order: {prediction} units."
+        current_baki = np.asarray(features['baki'])
+        
+        template_idx = np.select(
+            [
+                current_baki < predictions * 0.3,
+                current_baki < predictions * 0.6,
+                current_baki < predictions,
+                current_baki > predictions * 2
+            ],
+            [0, 1, 2, 3],
+            default=4
+        )
+        
+        templates = self.RECOMMENDATION_TEMPLATES
+        return [templates[t].format(prediction=p) for t, p in zip(template_idx, predictions)]
+    
+    def _artifact_paths(self, directory):
+        paths = (self.artifact_path, self.model_path, self.encoders_path)
+        if directory is None:
+            return paths
+        return tuple(os.path.join(directory, os.path.basename(path)) for path in paths)
     
-    def save_model(self):
+    def save_model(self, directory=None):
         """
-        Save trained model and encoders
+        Save the trained model as one memory-mappable artifact: forest
+        nodes, compiled forest and scaler as raw arrays, encoders and
+        settings in the header (to `directory` instead of the default
+        path if given). Gradient boosting models are saved as their
+        compiled trees only; they are refitted in full, never warm-started.
         """
-        os.makedirs("models", exist_ok=True)
-        
-        with open(self.model_path, 'wb') as f:
-            pickle.dump({
-                'model': self.model,
-                'scaler': self.scaler
-            }, f)
-        
-        with open(self.encoders_path, 'wb') as f:
-            pickle.dump({
-                'encoders': self.label_encoders,
-                'feature_columns': self.feature_columns
-            }, f)
-        
-        print(f"💾 Model saved to {self.model_path}")
+        artifact_path = self._artifact_paths(directory)[0]
+        
+        arrays, meta = forest_arrays(self.model, 'forest') if self.backend == 'random_forest' else ({}, {})
+        meta['backend'] = self.backend
+        for part in (scaler_arrays(self.scaler, 'scaler'), self.compiled.to_arrays('compiled')):
+            arrays.update(part[0])
+            meta.update(part[1])
+        meta['feature_columns'] = self.feature_columns
+        meta['encoders'] = {col: encoder.to_dict() for col, encoder in self.label_encoders.items()}
+        write_artifact(artifact_path, arrays, meta)
+        
+        print(f"💾 Model saved to {artifact_path}")
     
-    def load_model(self):
+    def load_model(self, directory=None):
         """
-        Load trained model and encoders
+        Load trained model and encoders: the .bin artifact is mapped, not
+        read; models saved as pickles before it are still loaded
         """
-        if not os.path.exists(self.model_path):
+        artifact_path, model_path, encoders_path = self._artifact_paths(directory)
+        if os.path.exists(artifact_path):
+            arrays, meta = read_artifact(artifact_path)
+            self.scaler = scaler_from_arrays(arrays, meta, 'scaler')
+            self.compiled = CompiledForest.from_arrays(arrays, meta, 'compiled')
+            self.label_encoders = {
+                col: CategoryEncoder.from_dict(state) for col, state in meta['encoders'].items()
+            }
+            self.feature_columns = meta['feature_columns']
+            self.backend = meta.get('backend', 'random_forest')
+            self._model = None
+            self._forest_source = (arrays, meta) if 'forest' in meta else None
+            print("✅ Model loaded successfully")
+            return
+        
+        if not os.path.exists(model_path):
             raise FileNotFoundError("Model not found. Please train the model first.")
         
-        with open(self.model_path, 'rb') as f:
+        with open(model_path, 'rb') as f:
             data = pickle.load(f)
+            self.backend = 'random_forest'
             self.model = data['model']
             self.scaler = data['scaler']
         
-        with open(self.encoders_path, 'rb') as f:
+        with open(encoders_path, 'rb') as f:
             data = pickle.load(f)
-            self.label_encoders = data['encoders']
+            # Older artifacts hold sklearn LabelEncoders; keep their codes
+            self.label_encoders = {
+                col: CategoryEncoder.coerce(encoder) for col, encoder in data['encoders'].items()
+            }
             self.feature_columns = data['feature_columns']
         
+        self._compile()
+        
         print("✅ Model loaded successfully")
 
 
@@ -0,0 +1,238 @@
+# papadin-ai/model_artifacts.py
+"""
+Memory-mapped model artifacts
+A model's numeric arrays are written as raw buffers, each aligned to 64
+bytes, after a small JSON header. Loading maps the file copy-on-write
+(mmap mode 'c') and returns array views into it, so nothing is
+unpickled or copied: the load costs about the same for any model size,
+and every worker process serving the same version shares the page-cache
+pages instead of holding its own copy.
+
+File layout:
+    8 bytes   magic b'PAPADIN\\x01'
+    8 bytes   header length (little-endian uint64)
+    header    JSON {"meta": {...}, "arrays": {name: {dtype, shape, offset}}}
+    buffers   raw array bytes; offsets count from the first 64-byte
+              boundary after the header
+
+Helpers below turn fitted StandardScalers and sklearn forests into
+(arrays, meta) pairs and back.
+"""
+
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC = b'PAPADIN\x01'
+ALIGNMENT = 64
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_artifact(path, arrays, meta=None):
+    """
+    Write {name: ndarray} plus JSON-serializable `meta` to `path`
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        layout[name] = {
+            'dtype': np.lib.format.dtype_to_descr(array.dtype),
+            'shape': list(array.shape),
+            'offset': offset
+        }
+        offset += array.nbytes
+
+    header = json.dumps({'meta': meta or {}, 'arrays': layout}).encode()
+    base = _aligned(len(MAGIC) + 8 + len(header))
+
+    # Written beside `path` and renamed over it: a loaded artifact is still
+    # mapped, and rewriting that file in place would fault its readers
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(base + layout[name]['offset'])
+                f.write(array.tobytes())
+            f.truncate(_aligned(base + offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp creates it owner-only
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_artifact(path):
+    """
+    Map `path` and return (arrays, meta); the arrays are copy-on-write
+    views of the file (writes stay private to this process)
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a model artifact: {path}")
+        (length,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(length))
+    base = _aligned(len(MAGIC) + 8 + length)
+
+    mapped = np.memmap(path, dtype=np.uint8, mode='c')
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.lib.format.descr_to_dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+        count = int(np.prod(shape, dtype=np.int64))
+        start = base + entry['offset']
+        buffer = mapped[start:start + count * dtype.itemsize]
+        arrays[name] = buffer.view(dtype).reshape(shape)
+    return arrays, header['meta']
+
+
+def _json_value(value):
+    """numpy scalars -> Python scalars for the JSON header"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# ---------- StandardScaler ----------
+
+def scaler_arrays(scaler, prefix):
+    """Arrays and meta of a fitted StandardScaler, names prefixed"""
+    arrays, meta = {}, {
+        'params': scaler.get_params(),
+        'n_features_in_': int(scaler.n_features_in_)
+    }
+    for attr in ('mean_', 'var_', 'scale_'):
+        value = getattr(scaler, attr, None)
+        if value is not None:
+            arrays[f'{prefix}.{attr}'] = value
+    seen = scaler.n_samples_seen_
+    if isinstance(seen, np.ndarray):
+        arrays[f'{prefix}.n_samples_seen_'] = seen
+    else:
+        meta['n_samples_seen_'] = int(seen)
+    if hasattr(scaler, 'feature_names_in_'):
+        meta['feature_names_in_'] = [str(name) for name in scaler.feature_names_in_]
+    return arrays, {prefix: meta}
+
+
+def scaler_from_arrays(arrays, meta, prefix):
+    from sklearn.preprocessing import StandardScaler
+
+    info = meta[prefix]
+    scaler = StandardScaler(**info['params'])
+    scaler.n_features_in_ = info['n_features_in_']
+    for attr in ('mean_', 'var_', 'scale_'):
+        setattr(scaler, attr, arrays.get(f'{prefix}.{attr}'))
+    scaler.n_samples_seen_ = arrays.get(f'{prefix}.n_samples_seen_', info.get('n_samples_seen_'))
+    if 'feature_names_in_' in info:
+        scaler.feature_names_in_ = np.asarray(info['feature_names_in_'], dtype=object)
+    return scaler
+
+
+# ---------- sklearn forests ----------
+
+# Fitted attributes of a forest / its trees besides the estimators and nodes
+# (the last four are IsolationForest's)
+_FOREST_ATTRS = ('n_features_in_', 'n_outputs_', '_n_samples', '_n_samples_bootstrap',
+                 'offset_', 'max_samples_', '_max_samples', '_max_features')
+_TREE_ATTRS = ('n_features_in_', 'n_outputs_', 'max_features_')
+
+
+def forest_arrays(forest, prefix):
+    """
+    Arrays and meta of a fitted single-output regression forest or an
+    IsolationForest: every tree's node records and values concatenated,
+    with per-tree counts (and an IsolationForest's per-tree feature
+    subsets and per-node path lengths alongside)
+    """
+    trees = [estimator.tree_ for estimator in forest.estimators_]
+    states = [tree.__getstate__() for tree in trees]
+    first = forest.estimators_[0]
+    tree_params = first.get_params()
+    tree_params.pop('random_state')
+
+    arrays = {
+        f'{prefix}.nodes': np.concatenate([state['nodes'] for state in states]),
+        f'{prefix}.values': np.concatenate([state['values'] for state in states]),
+        f'{prefix}.node_counts': np.array([state['node_count'] for state in states], dtype=np.int64),
+        f'{prefix}.max_depths': np.array([state['max_depth'] for state in states], dtype=np.int64),
+        f'{prefix}.random_states': np.array(
+            [estimator.random_state for estimator in forest.estimators_], dtype=np.int64
+        )
+    }
+    if hasattr(forest, 'estimators_features_'):
+        arrays.update({
+            f'{prefix}.estimators_features': np.array(forest.estimators_features_, dtype=np.int64),
+            f'{prefix}.seeds': np.asarray(forest._seeds),
+            f'{prefix}.decision_path_lengths': np.concatenate(forest._decision_path_lengths),
+            f'{prefix}.average_path_lengths': np.concatenate(forest._average_path_length_per_tree)
+        })
+    params = {key: _json_value(value) for key, value in forest.get_params(deep=False).items() if key != 'estimator'}
+    meta = {
+        'class': type(forest).__name__,
+        'params': params,
+        'attrs': {attr: _json_value(getattr(forest, attr)) for attr in _FOREST_ATTRS if hasattr(forest, attr)},
+        'tree_class': type(first).__name__,
+        'tree_params': {key: _json_value(value) for key, value in tree_params.items()},
+        'tree_attrs': {attr: _json_value(getattr(first, attr)) for attr in _TREE_ATTRS},
+        'tree_args': [int(trees[0].n_features), [int(c) for c in trees[0].n_classes], int(trees[0].n_outputs)]
+    }
+    return arrays, {prefix: meta}
+
+
+def forest_from_arrays(arrays, meta, prefix):
+    """
+    Rebuild the sklearn forest. Trees copy their nodes into memory they
+    own, so this is only done when the sklearn object is actually needed.
+    """
+    from sklearn import ensemble, tree as sk_tree
+    from sklearn.tree._tree import Tree
+
+    info = meta[prefix]
+    forest = getattr(ensemble, info['class'])(**info['params'])
+    for attr, value in info['attrs'].items():
+        setattr(forest, attr, value)
+    tree_class = getattr(sk_tree, info['tree_class'])
+    forest.estimator_ = tree_class()
+
+    n_features, n_classes, n_outputs = info['tree_args']
+    nodes, values = arrays[f'{prefix}.nodes'], arrays[f'{prefix}.values']
+    offsets = np.concatenate([[0], np.cumsum(arrays[f'{prefix}.node_counts'])])
+    estimators = []
+    for i, seed in enumerate(arrays[f'{prefix}.random_states'].tolist()):
+        estimator = tree_class(**info['tree_params'], random_state=seed)
+        for attr, value in info['tree_attrs'].items():
+            setattr(estimator, attr, value)
+        start, end = offsets[i], offsets[i + 1]
+        tree = Tree(n_features, np.asarray(n_classes, dtype=np.intp), n_outputs)
+        tree.__setstate__({
+            'max_depth': int(arrays[f'{prefix}.max_depths'][i]),
+            'node_count': int(end - start),
+            'nodes': np.ascontiguousarray(nodes[start:end]),
+            'values': np.ascontiguousarray(values[start:end])
+        })
+        estimator.tree_ = tree
+        estimators.append(estimator)
+    forest.estimators_ = estimators
+
+    if f'{prefix}.estimators_features' in arrays:
+        forest.estimators_features_ = list(np.array(arrays[f'{prefix}.estimators_features']))
+        forest._seeds = np.array(arrays[f'{prefix}.seeds'])
+        forest._sample_weight = None
+        for attr, name in (('_decision_path_lengths', 'decision_path_lengths'),
+                           ('_average_path_length_per_tree', 'average_path_lengths')):
+            per_node = arrays[f'{prefix}.{name}']
+            setattr(forest, attr, tuple(np.array(per_node[offsets[i]:offsets[i + 1]])
+                                        for i in range(len(estimators))))
+    return forest
@@ -0,0 +1,284 @@
+# papadin-ai/model_registry.py
+"""
+Versioned model registry
+Each trained model is published as an immutable version directory and
+made current by atomically rewriting a LATEST pointer. Serving code asks
+the registry for the current instance; a new version is loaded off the
+request path and swapped in, so in-flight requests keep the instance
+they already hold. A model nobody warmed up is loaded on its first get().
+
+Layout:
+    models/registry/<name>/<version>/...   artifacts written by save_model(dir)
+    models/registry/<name>/LATEST          current version id
+"""
+
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+def _rss_bytes():
+    """Resident set size of this process (Linux), or None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _dir_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+class ModelEntry:
+    """Registry bookkeeping for one model name"""
+
+    def __init__(self, name, factory, legacy_load):
+        self.name = name
+        self.factory = factory
+        self.legacy_load = legacy_load
+        self.instance = None
+        self.version = None
+        self.status = 'pending'
+        self.error = None
+        self.loaded_at = None
+        self.load_seconds = None
+        self.artifact_bytes = None
+        self.rss_delta_bytes = None
+        self.loaded = threading.Event()
+
+    def to_dict(self):
+        return {
+            'status': self.status,
+            'version': self.version,
+            'loaded_at': self.loaded_at,
+            'load_seconds': self.load_seconds,
+            'artifact_bytes': self.artifact_bytes,
+            'rss_delta_bytes': self.rss_delta_bytes,
+            'error': self.error
+        }
+
+
+class ModelRegistry:
+    """
+    Args:
+        root: directory holding the per-model version directories
+        keep_versions: versions kept on disk per model (older ones pruned)
+    """
+
+    def __init__(self, root="models/registry", keep_versions=3):
+        self.root = root
+        self.keep_versions = keep_versions
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def register(self, name, factory, legacy_load=True):
+        """
+        Args:
+            factory: zero-argument callable creating an untrained instance
+            legacy_load: if no version was ever published, fall back to the
+                instance's load_model() default paths
+        """
+        self._entries[name] = ModelEntry(name, factory, legacy_load)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def on_publish(self, callback):
+        """callback(name, version) after a new version is swapped in"""
+        self._listeners.append(callback)
+
+    def create(self, name, from_current=False):
+        """
+        A fresh instance for training a new version: untrained, or with
+        from_current=True loaded from the served version (for incremental
+        training; the served instance itself is never modified). Falls back
+        to an untrained instance if no version exists yet.
+        """
+        entry = self._entries[name]
+        instance = entry.factory()
+        if from_current:
+            version = entry.version or self.latest_version(name)
+            try:
+                if version is None or version == 'legacy':
+                    instance.load_model()
+                else:
+                    instance.load_model(os.path.join(self._model_dir(name), version))
+            except FileNotFoundError:
+                instance = entry.factory()
+        return instance
+
+    def _claim(self, entry):
+        """True for the one caller that should load a never-loaded model"""
+        with self._lock:
+            if entry.status != 'pending':
+                return False
+            entry.status = 'loading'
+            return True
+
+    def load(self, name, timeout=30):
+        """
+        Make sure `name` has been loaded (or found missing): the first
+        caller loads it on its own thread, later callers wait for that load
+        """
+        entry = self._entries[name]
+        if self._claim(entry):
+            self.refresh(name)
+        entry.loaded.wait(timeout)
+
+    # ---------- publishing ----------
+
+    def _model_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def latest_version(self, name):
+        try:
+            with open(os.path.join(self._model_dir(name), 'LATEST')) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, name, instance, activate=True):
+        """
+        Save `instance` as a new immutable version and point LATEST at it
+
+        Safe to call from worker processes; the serving process picks the
+        version up with refresh(). Returns the version id.
+        """
+        version = datetime.now().strftime('%Y%m%dT%H%M%S') + '-' + uuid.uuid4().hex[:6]
+        model_dir = self._model_dir(name)
+        tmp_dir = os.path.join(model_dir, f'.tmp-{version}')
+
+        instance.save_model(tmp_dir)
+        os.replace(tmp_dir, os.path.join(model_dir, version))
+
+        pointer_tmp = os.path.join(model_dir, f'.LATEST-{version}')
+        with open(pointer_tmp, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer_tmp, os.path.join(model_dir, 'LATEST'))
+
+        print(f"📦 Published {name} version {version}")
+        self._prune(name, keep=version)
+
+        if activate and name in self._entries:
+            self._swap(name, instance, version, load_seconds=0.0, rss_delta=None)
+        return version
+
+    def _prune(self, name, keep):
+        model_dir = self._model_dir(name)
+        versions = sorted(
+            v for v in os.listdir(model_dir)
+            if not v.startswith('.') and v != 'LATEST'
+        )
+        current = self._entries[name].version if name in self._entries else None
+        for old in versions[:-self.keep_versions]:
+            if old not in (keep, current):
+                shutil.rmtree(os.path.join(model_dir, old), ignore_errors=True)
+
+    # ---------- loading ----------
+
+    def _swap(self, name, instance, version, load_seconds, rss_delta):
+        entry = self._entries[name]
+        version_dir = os.path.join(self._model_dir(name), version) if version != 'legacy' else None
+        with self._lock:
+            entry.instance = instance
+            entry.version = version
+            entry.status = 'loaded'
+            entry.error = None
+            entry.loaded_at = time.time()
+            entry.load_seconds = round(load_seconds, 3)
+            entry.rss_delta_bytes = rss_delta
+            entry.artifact_bytes = _dir_bytes(version_dir) if version_dir else None
+        entry.loaded.set()
+        for callback in self._listeners:
+            callback(name, version)
+
+    def refresh(self, name):
+        """Load LATEST for `name` if it differs from the served version"""
+        entry = self._entries[name]
+        version = self.latest_version(name)
+        if version is None and entry.version is None and entry.legacy_load:
+            version = 'legacy'
+        if version is None or version == entry.version:
+            with self._lock:
+                if entry.instance is None:
+                    entry.status = 'missing'
+            entry.loaded.set()
+            return entry.version
+
+        with self._lock:
+            if entry.instance is None:
+                entry.status = 'loading'
+
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            instance = entry.factory()
+            if version == 'legacy':
+                instance.load_model()
+            else:
+                instance.load_model(os.path.join(self._model_dir(name), version))
+        except Exception as e:
+            missing = isinstance(e, FileNotFoundError)
+            with self._lock:
+                if entry.instance is None:
+                    entry.status = 'missing' if missing else 'error'
+                entry.error = None if missing else str(e)
+            entry.loaded.set()
+            return entry.version
+
+        rss_after = _rss_bytes()
+        rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        self._swap(name, instance, version, time.perf_counter() - start, rss_delta)
+        print(f"✅ Loaded {name} version {version}")
+        return version
+
+    def warm_start(self, background=True, names=None):
+        """Load the latest version of `names` (default: every registered model)"""
+        def load_all():
+            for name in names if names is not None else list(self._entries):
+                self.load(name)
+
+        if not background:
+            load_all()
+            return None
+        thread = threading.Thread(target=load_all, name='model-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    # ---------- serving ----------
+
+    def get(self, name, timeout=30):
+        """
+        Current instance of `name`; loads it on first use or waits for an
+        in-progress warm-up load. Treat the instance as read-only: it may
+        be shared by many requests.
+        """
+        return self.get_versioned(name, timeout)[0]
+
+    def get_versioned(self, name, timeout=30):
+        """(instance, version) read together, for caches keyed on the version"""
+        entry = self._entries[name]
+        if entry.instance is None:
+            self.load(name, timeout)
+        with self._lock:
+            instance, version = entry.instance, entry.version
+        if instance is None:
+            raise FileNotFoundError(f"Model '{name}' not found. Please train the model first.")
+        return instance, version
+
+    def version(self, name):
+        return self._entries[name].version
+
+    def status(self):
+        return {name: entry.to_dict() for name, entry in self._entries.items()}
@@ -0,0 +1,131 @@
+# papadin-ai/parallel_training.py
+"""
+Parallel training of all models
+Trains Random Forest, LSTM, anomaly detector and recommendation engine
+concurrently in a process pool from one prepared StockTable, giving each
+process a CPU budget so sklearn n_jobs and torch threads don't
+oversubscribe the machine
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+MODELS = ['random_forest', 'lstm', 'anomaly', 'recommendation']
+
+
+def cpu_budgets(models, total_cpus=None):
+    """
+    Split the available cores between models
+
+    The anomaly detector and recommendation engine are light and get one
+    core each; the rest is shared by the Random Forest and the LSTM.
+    """
+    total = total_cpus or os.cpu_count() or 1
+    budgets = {name: 1 for name in models}
+    heavy = [name for name in ('random_forest', 'lstm') if name in models]
+    spare = max(0, total - len(models))
+    for i, name in enumerate(heavy):
+        budgets[name] += spare // len(heavy) + (1 if i < spare % len(heavy) else 0)
+    return budgets
+
+
+def _limit_threads(n_threads, torch_threads=False):
+    """Cap BLAS/OpenMP (and optionally torch) threads in this worker process"""
+    # numpy is already loaded by unpickling the table, so env vars are too late
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(n_threads)
+    if torch_threads:
+        import torch
+        torch.set_num_threads(n_threads)
+
+
+def train_one(name, stock_table, n_threads, registry_root, options=None):
+    """
+    Train one model in a worker process and publish it to the registry
+
+    Returns (name, result, wall_seconds); result is the model's metrics
+    dict (plus the published 'version') or {'error': ...}
+    """
+    _limit_threads(n_threads, torch_threads=(name == 'lstm'))
+    options = options or {}
+    start = time.perf_counter()
+
+    try:
+        if name == 'random_forest':
+            from ml_model import StockPredictor
+            model = StockPredictor(n_jobs=n_threads)
+            result = model.train(stock_table, save=False)
+        elif name == 'lstm':
+            from lstm_predictor import LSTMTrainer
+            model = LSTMTrainer()
+            result = model.train(stock_table, epochs=options.get('lstm_epochs', 30), save=False)
+        elif name == 'anomaly':
+            from anomaly_detector import StockAnomalyDetector
+            model = StockAnomalyDetector(n_jobs=n_threads)
+            result = model.train(stock_table, save=False)
+        elif name == 'recommendation':
+            from recommendation_engine import OrderRecommendationEngine
+            model = OrderRecommendationEngine()
+            result = model.train(stock_table, save=False)
+        else:
+            raise ValueError(f"Unknown model: {name}")
+
+        from model_registry import ModelRegistry
+        result = {**result, 'version': ModelRegistry(registry_root).publish(name, model, activate=False)}
+    except Exception as e:
+        result = {"error": str(e)}
+
+    return name, result, time.perf_counter() - start
+
+
+def train_all_parallel(stock_table, registry_root, models=None, total_cpus=None, options=None, progress=None):
+    """
+    Train `models` concurrently, one process each
+
+    Args:
+        stock_table: StockTable prepared once and shipped to every worker
+        registry_root: ModelRegistry root the workers publish versions to
+        models: subset of MODELS (default: all)
+        total_cpus: cores to divide between workers (default: os.cpu_count())
+        options: e.g. {'lstm_epochs': 30}
+        progress: optional callback(**fields) for job status updates
+
+    Returns:
+        (results, timing) where timing has per-model wall seconds, the
+        total wall time and the speedup (sum of per-model times / total)
+    """
+    progress = progress or (lambda **fields: None)
+    models = list(models or MODELS)
+    budgets = cpu_budgets(models, total_cpus)
+
+    results, wall_times = {}, {}
+    start = time.perf_counter()
+    progress(stage='training', running=models, cpu_budgets=budgets)
+
+    # spawn: forking a process that already runs torch/Flask threads is unsafe
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=len(models), mp_context=context) as pool:
+        futures = [
+            pool.submit(train_one, name, stock_table, budgets[name], registry_root, options)
+            for name in models
+        ]
+        for future in as_completed(futures):
+            name, result, seconds = future.result()
+            results[name] = result
+            wall_times[name] = round(seconds, 2)
+            progress(completed=sorted(wall_times), running=[m for m in models if m not in wall_times])
+
+    total = time.perf_counter() - start
+    summed = sum(wall_times.values())
+    timing = {
+        'per_model_seconds': wall_times,
+        'cpu_budgets': budgets,
+        'total_seconds': round(total, 2),
+        'sum_model_seconds': round(summed, 2),
+        'speedup': round(summed / total, 2) if total > 0 else None
+    }
+    print(f"⚡ Trained {len(models)} models in {total:.1f}s "
+          f"(sum of model times {summed:.1f}s, speedup {timing['speedup']}x)")
+    return results, timing
@@ -5,11 +5,75 @@ Uses collaborative filtering to recommend optimal orders based on similar outlet
 """
 
 import numpy as np
-import pandas as pd
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.preprocessing import StandardScaler
 import pickle
 import os
+from collections.abc import Mapping
+
+from stock_table import StockTable
+from metrics import stage
+from model_artifacts import write_artifact, read_artifact, scaler_arrays, scaler_from_arrays
+
+
+class ProfileTable(Mapping):
+    """
+    Read-only {outlet: {feature: value}} over a dense (outlet x feature)
+    matrix, used for profiles loaded from a memory-mapped artifact
+    """
+    
+    def __init__(self, outlets, features, values, present):
+        self.outlets = {outlet: i for i, outlet in enumerate(outlets)}
+        self.features = {feature: j for j, feature in enumerate(features)}
+        self.feature_names = list(features)
+        self.values = values
+        self.present = present
+    
+    @classmethod
+    def from_profiles(cls, profiles):
+        """Dense copy of a dict of profile dicts (missing features marked absent)"""
+        outlets = list(profiles)
+        features = sorted({feature for profile in profiles.values() for feature in profile})
+        index = {feature: j for j, feature in enumerate(features)}
+        values = np.zeros((len(outlets), len(features)))
+        present = np.zeros((len(outlets), len(features)), dtype=bool)
+        for i, outlet in enumerate(outlets):
+            for feature, value in profiles[outlet].items():
+                values[i, index[feature]] = value
+                present[i, index[feature]] = True
+        return cls(outlets, features, values, present)
+    
+    def __getitem__(self, outlet):
+        i = self.outlets[outlet]
+        return _ProfileRow(self, i)
+    
+    def __iter__(self):
+        return iter(self.outlets)
+    
+    def __len__(self):
+        return len(self.outlets)
+
+
+class _ProfileRow(Mapping):
+    """One outlet's profile as a read-only mapping"""
+    
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+    
+    def __getitem__(self, feature):
+        j = self.table.features[feature]
+        if not self.table.present[self.row, j]:
+            raise KeyError(feature)
+        return float(self.table.values[self.row, j])
+    
+    def __iter__(self):
+        names = self.table.feature_names
+        return (names[j] for j in np.flatnonzero(self.table.present[self.row]))
+    
+    def __len__(self):
+        return int(self.table.present[self.row].sum())
+
 
 class OrderRecommendationEngine:
     """
@@ -21,29 +85,26 @@ class OrderRecommendationEngine:
         self.outlet_profiles = {}
         self.similarity_matrix = None
         
+    @stage('features', 'recommendation')
     def build_outlet_profiles(self, stock_data):
-        """Build profiles for each outlet"""
-        df = pd.DataFrame(stock_data)
-        df['tarikh'] = pd.to_datetime(df['tarikh'])
+        """Build profiles for each outlet (records or a shared StockTable)"""
+        df = StockTable.coerce(stock_data).frame
         
-        for col in ['stockIn', 'baki', 'order']:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        # One pass over the (outlet, item) groups instead of filtering per outlet
+        stats = df.groupby(['outlet', 'item'], observed=True).agg(
+            avg_order=('order', 'mean'),
+            avg_baki=('baki', 'mean'),
+            volatility=('order', 'std')
+        )
         
         profiles = {}
         
-        for outlet in df['outlet'].unique():
-            outlet_data = df[df['outlet'] == outlet]
-            
+        for (outlet, item), row in stats.iterrows():
             # Calculate profile features
-            profile = {}
-            for item in outlet_data['item'].unique():
-                item_data = outlet_data[outlet_data['item'] == item]
-                
-                profile[f'{item}_avg_order'] = item_data['order'].mean()
-                profile[f'{item}_avg_baki'] = item_data['baki'].mean()
-                profile[f'{item}_volatility'] = item_data['order'].std()
-            
-            profiles[outlet] = profile
+            profile = profiles.setdefault(outlet, {})
+            profile[f'{item}_avg_order'] = float(row['avg_order'])
+            profile[f'{item}_avg_baki'] = float(row['avg_baki'])
+            profile[f'{item}_volatility'] = float(row['volatility'])
         
         return profiles
     
@@ -75,8 +136,8 @@ class OrderRecommendationEngine:
         
         return outlets
     
-    def train(self, stock_data):
-        """Build recommendation system"""
+    def train(self, stock_data, save=True):
+        """Build recommendation system (save=False when publishing to the registry)"""
         print("💡 Building recommendation engine...")
         
         self.outlet_profiles = self.build_outlet_profiles(stock_data)
@@ -84,7 +145,8 @@ class OrderRecommendationEngine:
         
         print(f"✅ Built profiles for {len(outlets)} outlets")
         
-        self.save_model()
+        if save:
+            self.save_model()
         
         return {
             'success': True,
@@ -92,6 +154,7 @@ class OrderRecommendationEngine:
             'avg_similarity': float(np.mean(self.similarity_matrix))
         }
     
+    @stage('inference', 'recommendation')
     def get_recommendations(self, outlet, item, current_baki, top_k=3):
         """Get ordering recommendations based on similar outlets"""
         if outlet not in self.outlet_profiles:
@@ -171,27 +234,41 @@ class OrderRecommendationEngine:
             'recommendations': all_recommendations
         }
     
-    def save_model(self):
-        """Save recommendation engine"""
-        os.makedirs("models/recommendation", exist_ok=True)
-        with open("models/recommendation/engine.pkl", 'wb') as f:
-            pickle.dump({
-                'profiles': self.outlet_profiles,
-                'similarity_matrix': self.similarity_matrix,
-                'scaler': self.scaler
-            }, f)
+    def save_model(self, directory="models/recommendation"):
+        """Save recommendation engine (profiles and similarity as raw arrays)"""
+        profiles = self.outlet_profiles
+        if not isinstance(profiles, ProfileTable):
+            profiles = ProfileTable.from_profiles(profiles)
+        arrays = {
+            'similarity_matrix': self.similarity_matrix,
+            'profile_values': profiles.values,
+            'profile_present': profiles.present
+        }
+        meta = {'outlets': list(profiles.outlets), 'features': profiles.feature_names}
+        scaler_data, scaler_meta = scaler_arrays(self.scaler, 'scaler')
+        arrays.update(scaler_data)
+        meta.update(scaler_meta)
+        write_artifact(os.path.join(directory, "engine.bin"), arrays, meta)
         print("💾 Recommendation engine saved!")
     
-    def load_model(self):
-        """Load recommendation engine"""
-        with open("models/recommendation/engine.pkl", 'rb') as f:
-            data = pickle.load(f)
-            self.outlet_profiles = data['profiles']
-            self.similarity_matrix = data['similarity_matrix']
-            self.scaler = data['scaler']
+    def load_model(self, directory="models/recommendation"):
+        """Load recommendation engine (memory-mapped; older pickles still load)"""
+        artifact_path = os.path.join(directory, "engine.bin")
+        if os.path.exists(artifact_path):
+            arrays, meta = read_artifact(artifact_path)
+            self.outlet_profiles = ProfileTable(
+                meta['outlets'], meta['features'], arrays['profile_values'], arrays['profile_present']
+            )
+            self.similarity_matrix = arrays['similarity_matrix']
+            self.scaler = scaler_from_arrays(arrays, meta, 'scaler')
+        else:
+            with open(os.path.join(directory, "engine.pkl"), 'rb') as f:
+                data = pickle.load(f)
+                self.outlet_profiles = data['profiles']
+                self.similarity_matrix = data['similarity_matrix']
+                self.scaler = data['scaler']
         print("✅ Recommendation engine loaded!")
 
-
 if __name__ == "__main__":
     print("💡 Smart Ordering Recommendation Engine")
     print("=" * 50)
@@ -0,0 +1,94 @@
+# papadin-ai/result_cache.py
+"""
+Prediction result cache
+LRU + TTL cache for endpoint responses, keyed by (endpoint, model, outlet,
+data version, model version, params). Between stock updates and model
+publishes the same dashboard request is answered from memory.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Args:
+        maxsize: entries kept before least recently used ones are evicted
+        ttl: seconds an entry stays valid even if nothing invalidates it
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(endpoint, model, outlet, data_version, model_version, *params):
+        return (endpoint, model, outlet, data_version, model_version) + tuple(params)
+
+    def get(self, key):
+        """Cached value or None (counts a hit or a miss)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _drop(self, match):
+        with self._lock:
+            stale = [key for key in self._entries if match(key)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def invalidate_outlet(self, outlet):
+        """
+        Drop entries for `outlet` and cross-outlet entries (outlet None),
+        whose answer also depends on that outlet's data
+        """
+        return self._drop(lambda key: key[2] in (outlet, None))
+
+    def invalidate_model(self, model):
+        """Drop entries computed with any version of `model`"""
+        return self._drop(lambda key: key[1] == model)
+
+    def clear(self):
+        return self._drop(lambda key: True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
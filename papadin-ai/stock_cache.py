@@ -0,0 +1,220 @@
+# papadin-ai/stock_cache.py
+"""
+In-process stock snapshot cache
+Keeps a versioned copy of the stokOutlet collection and syncs only the
+records that changed since the last sync (/get-stock?since=...)
+"""
+
+import functools
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+from stock_table import StockTable
+
+# Shared across caches so a version number is never reused, even when an
+# outlet partition is evicted and rebuilt (result caches key on it)
+_versions = itertools.count(1)
+
+
+class StockSnapshot:
+    """
+    Immutable view of the stock records at one version
+    """
+
+    def __init__(self, records, version, synced_at):
+        self.records = records
+        self.version = version
+        self.synced_at = synced_at
+        self._table = None
+
+    @property
+    def table(self):
+        """Typed StockTable for this version, parsed once on first use"""
+        if self._table is None:
+            self._table = StockTable.from_records(self.records, self.version)
+        return self._table
+
+    def __len__(self):
+        return len(self.records)
+
+
+class StockSnapshotCache:
+    """
+    Versioned, TTL-based cache of stock records with delta sync
+
+    Args:
+        fetch: callable(since=None) -> dict with 'data', optional 'deleted'
+            and 'syncedAt' (the /get-stock response body)
+        ttl: seconds a snapshot is served before a delta sync is attempted
+        full_resync_interval: seconds between full re-downloads, which also
+            repairs anything a delta may have missed (e.g. legacy records
+            without an updatedAt field)
+    """
+
+    def __init__(self, fetch, ttl=30, full_resync_interval=600):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.full_resync_interval = full_resync_interval
+
+        self._lock = threading.Lock()
+        self._records_by_id = {}
+        self._snapshot = StockSnapshot([], 0, None)
+        self._watermark = None
+        # -inf, not 0.0: time.monotonic() may itself be below the ttl on a
+        # freshly booted host, which would skip the first sync
+        self._last_sync = float('-inf')
+        self._last_full_sync = float('-inf')
+        self._listeners = []
+
+    def on_change(self, callback):
+        """
+        callback(snapshot, changed, removed, full) after each sync that
+        produced a new version; `removed` holds the previous copies of
+        edited and deleted records (empty on a full sync)
+        """
+        self._listeners.append(callback)
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def get(self):
+        """Return the current snapshot, syncing first if it is stale"""
+        now = time.monotonic()
+        if now - self._last_sync < self.ttl:
+            return self._snapshot
+
+        with self._lock:
+            # Another thread may have synced while we waited for the lock
+            now = time.monotonic()
+            if now - self._last_sync >= self.ttl:
+                self._sync(now)
+            return self._snapshot
+
+    def get_records(self):
+        """Return the current list of stock records (shared, do not mutate)"""
+        return self.get().records
+
+    def invalidate(self):
+        """Force the next get() to sync"""
+        with self._lock:
+            self._last_sync = float('-inf')
+
+    def _sync(self, now):
+        full = (
+            self._watermark is None
+            or now - self._last_full_sync >= self.full_resync_interval
+        )
+
+        try:
+            body = self.fetch() if full else self.fetch(since=self._watermark)
+        except Exception as e:
+            # Serve the last good snapshot rather than an empty list
+            print(f"Error syncing stock: {e}")
+            return
+
+        changed = body.get('data', []) or []
+        deleted = body.get('deleted', []) or []
+
+        removed = []
+        if full:
+            records_by_id = {r.get('id', i): r for i, r in enumerate(changed)}
+            dirty = records_by_id != self._records_by_id
+            self._last_full_sync = now
+        else:
+            records_by_id = dict(self._records_by_id)
+            for record in changed:
+                previous = records_by_id.get(record.get('id'))
+                if previous is not None:
+                    removed.append(previous)
+                records_by_id[record.get('id')] = record
+            # A record in `changed` still exists: its tombstone is from a
+            # move to another outlet (and back), not a deletion
+            upserted = {record.get('id') for record in changed}
+            for record_id in deleted:
+                if record_id in upserted:
+                    continue
+                previous = records_by_id.pop(record_id, None)
+                if previous is not None:
+                    removed.append(previous)
+            dirty = bool(changed or deleted)
+
+        self._watermark = body.get('syncedAt') or self._watermark
+        self._last_sync = now
+
+        if dirty:
+            self._records_by_id = records_by_id
+            self._snapshot = StockSnapshot(
+                list(records_by_id.values()),
+                next(_versions),
+                self._watermark,
+            )
+            mode = "full" if full else "delta"
+            print(f"🔄 Stock {mode} sync: {len(changed)} changed, {len(deleted)} deleted "
+                  f"-> v{self._snapshot.version} ({len(self._snapshot)} records)")
+            for callback in self._listeners:
+                try:
+                    callback(self._snapshot, changed, removed, full)
+                except Exception as e:
+                    print(f"Error in stock change listener: {e}")
+
+
+class PartitionedStockCache:
+    """
+    One StockSnapshotCache per outlet, each fetched, versioned and
+    invalidated independently (/get-stock?outlet=...)
+
+    Args:
+        fetch: callable(outlet, since=None) -> /get-stock response body
+        max_partitions: least recently used outlets beyond this are dropped
+    """
+
+    def __init__(self, fetch, ttl=30, full_resync_interval=600, max_partitions=256):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.full_resync_interval = full_resync_interval
+        self.max_partitions = max_partitions
+
+        self._lock = threading.Lock()
+        self._partitions = OrderedDict()
+        self._listeners = []
+
+    def on_change(self, callback):
+        """callback(outlet, snapshot, changed, removed, full) after a partition sync"""
+        self._listeners.append(callback)
+
+    def partition(self, outlet):
+        """The cache for one outlet, created on first use"""
+        with self._lock:
+            cache = self._partitions.get(outlet)
+            if cache is None:
+                cache = StockSnapshotCache(
+                    lambda since=None: self.fetch(outlet, since=since),
+                    ttl=self.ttl,
+                    full_resync_interval=self.full_resync_interval
+                )
+                for callback in self._listeners:
+                    cache.on_change(functools.partial(callback, outlet))
+                self._partitions[outlet] = cache
+                while len(self._partitions) > self.max_partitions:
+                    self._partitions.popitem(last=False)
+            else:
+                self._partitions.move_to_end(outlet)
+            return cache
+
+    def get(self, outlet):
+        """Current snapshot of one outlet's records"""
+        return self.partition(outlet).get()
+
+    def invalidate(self, outlet=None):
+        """Force a re-sync of one outlet, or of every outlet if None"""
+        with self._lock:
+            caches = list(self._partitions.values()) if outlet is None else [self._partitions.get(outlet)]
+        for cache in caches:
+            if cache is not None:
+                cache.invalidate()
+
+    def __len__(self):
+        return len(self._partitions)
@@ -0,0 +1,134 @@
+# papadin-ai/stock_table.py
+"""
+Shared typed columnar stock table
+Parses raw stock records once per data version so every model reads the
+same pre-sorted, typed frame instead of re-parsing the list of dicts
+"""
+
+import numpy as np
+import pandas as pd
+
+from metrics import stage
+
+CATEGORICAL_COLUMNS = ['outlet', 'item', 'unit']
+NUMERIC_COLUMNS = ['stockIn', 'baki', 'order']
+SORT_COLUMNS = ['outlet', 'item', 'tarikh']
+
+
+def record_hashes(ids):
+    """Stable uint64 hash of each record id (the same in every process)"""
+    return pd.util.hash_array(np.asarray(ids, dtype=str).astype(object))
+
+
+class StockTable:
+    """
+    Read-only typed view of stock records
+
+    - outlet/item/unit: category dtype (lexically ordered categories)
+    - tarikh: datetime64
+    - stockIn/baki/order: float32
+    - rows sorted by (outlet, item, tarikh), with `group_offsets` marking
+      where each (outlet, item) group starts; group g spans
+      rows group_offsets[g]:group_offsets[g + 1]
+    """
+
+    def __init__(self, frame, version=None):
+        self.frame = frame
+        self.version = version
+
+        outlet_codes = frame['outlet'].cat.codes.to_numpy()
+        item_codes = frame['item'].cat.codes.to_numpy()
+        if len(frame):
+            new_group = np.empty(len(frame), dtype=bool)
+            new_group[0] = True
+            new_group[1:] = (outlet_codes[1:] != outlet_codes[:-1]) | (item_codes[1:] != item_codes[:-1])
+            starts = np.flatnonzero(new_group)
+        else:
+            starts = np.empty(0, dtype=np.int64)
+        self.group_offsets = np.append(starts, len(frame)).astype(np.int64)
+        self._outlet_codes = outlet_codes
+
+    @classmethod
+    @stage('parse', 'stock_table')
+    def from_records(cls, records, version=None):
+        """Parse a list of raw stock dicts into a typed, sorted table"""
+        df = pd.DataFrame(records)
+        for col in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS + ['tarikh']:
+            if col not in df.columns:
+                df[col] = np.nan
+
+        columns = {}
+        if 'id' in df.columns:
+            columns['id'] = df['id']
+        columns['tarikh'] = pd.to_datetime(df['tarikh'])
+        for col in CATEGORICAL_COLUMNS:
+            values = df[col].where(df[col].isna(), df[col].astype(str))
+            columns[col] = pd.Categorical(values, categories=sorted(values.dropna().unique()))
+        for col in NUMERIC_COLUMNS:
+            columns[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(np.float32)
+
+        frame = pd.DataFrame(columns, index=df.index)
+        # Missing keys sort first so outlet codes stay monotonic for searchsorted
+        frame = frame.sort_values(SORT_COLUMNS, kind='stable', na_position='first').reset_index(drop=True)
+        return cls(frame, version)
+
+    @classmethod
+    def coerce(cls, stock_data):
+        """Accept either a StockTable or a raw list of records"""
+        if isinstance(stock_data, cls):
+            return stock_data
+        return cls.from_records(stock_data)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def n_groups(self):
+        return len(self.group_offsets) - 1
+
+    def to_frame(self):
+        """
+        Shallow copy of the frame: callers may add columns, but must not
+        modify the existing ones in place
+        """
+        return self.frame.copy(deep=False)
+
+    def for_outlet(self, outlet):
+        """Contiguous sub-table holding one outlet's rows"""
+        categories = self.frame['outlet'].cat.categories
+        if outlet not in categories:
+            return StockTable(self.frame.iloc[0:0], self.version)
+
+        code = categories.get_loc(outlet)
+        start, end = np.searchsorted(self._outlet_codes, [code, code + 1])
+        return StockTable(self.frame.iloc[start:end].reset_index(drop=True), self.version)
+
+    def before(self, day):
+        """Sub-table of the rows dated before `day` (still sorted and grouped)"""
+        keep = self.frame['tarikh'] < pd.Timestamp(day)
+        return StockTable(self.frame[keep].reset_index(drop=True), self.version)
+
+    def near(self, rows, before_rows=0, after_rows=0):
+        """
+        Sub-table of the flagged `rows` (one bool per row) plus up to
+        `before_rows` earlier and `after_rows` later rows of the same group
+        around each (still sorted and grouped); groups with no flagged rows
+        are left out
+        """
+        if not len(self.frame):
+            return self
+        flagged = np.concatenate([[0], np.cumsum(rows, dtype=np.int64)])
+        sizes = np.diff(self.group_offsets)
+        position = np.arange(len(self.frame))
+        low = np.maximum(position - after_rows, np.repeat(self.group_offsets[:-1], sizes))
+        high = np.minimum(position + before_rows + 1, np.repeat(self.group_offsets[1:], sizes))
+        keep = flagged[high] > flagged[low]
+        return StockTable(self.frame[keep].reset_index(drop=True), self.version)
+
+    def groups(self):
+        """Yield ((outlet, item), sub-table) for each group in sorted order"""
+        for g in range(self.n_groups):
+            start, end = self.group_offsets[g], self.group_offsets[g + 1]
+            rows = self.frame.iloc[start:end].reset_index(drop=True)
+            key = (rows['outlet'].iat[0], rows['item'].iat[0])
+            yield key, StockTable(rows, self.version)
@@ -0,0 +1,7 @@
+# papadin-ai/tests/conftest.py
+"""Tests import the papadin-ai modules the way app.py does (flat, from papadin-ai/)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
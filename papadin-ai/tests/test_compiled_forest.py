@@ -0,0 +1,77 @@
+# papadin-ai/tests/test_compiled_forest.py
+"""CompiledForest predicts exactly what the sklearn model it was built from does"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from compiled_forest import CompiledForest
+
+
+def features(n, seed=0):
+    """
+    Integer-valued stock-like columns, plus one that is mostly around 1e6
+    and sometimes 0: its splits near 0 sit far below the mean, where many
+    raw floats scale to the same value
+    """
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.integers(0, 60, n),
+        rng.integers(0, 20, n),
+        rng.integers(0, 7, n),
+        rng.normal(25, 8, n).round(1),
+        np.where(rng.random(n) < 0.2, 0, 1e6 + rng.integers(0, 500, n))
+    ]).astype(np.float64)
+    y = X[:, 0] * 0.7 + X[:, 1] - 3 * (X[:, 4] == 0) + rng.normal(0, 2, n)
+    return X, y
+
+
+def boundary_rows(compiled, X):
+    """
+    Rows of X with one feature set exactly on, and one float above and
+    below, each split of the compiled forest (and the naive
+    threshold-only rows around it are covered by the neighbours)
+    """
+    splits = np.flatnonzero(np.isfinite(compiled.threshold))
+    picks = np.random.default_rng(1).choice(splits, min(len(splits), 400), replace=False)
+    rows = []
+    for node in picks:
+        z = compiled.threshold[node]
+        for value in (np.nextafter(z, -np.inf), z, np.nextafter(z, np.inf)):
+            row = X[node % len(X)].copy()
+            row[compiled.feature[node]] = value
+            rows.append(row)
+    return np.array(rows)
+
+
+def parity_rows(compiled, X):
+    return np.concatenate([X, boundary_rows(compiled, X)])
+
+
+@pytest.mark.parametrize('scaled', [True, False])
+def test_random_forest_parity(scaled):
+    X, y = features(2000)
+    scaler = StandardScaler().fit(X) if scaled else None
+    forest = RandomForestRegressor(n_estimators=20, max_depth=12, random_state=42)
+    forest.fit(scaler.transform(X) if scaled else X, y)
+    compiled = CompiledForest.from_sklearn(forest, scaler)
+
+    rows = parity_rows(compiled, features(500, seed=2)[0])
+    expected = forest.predict(scaler.transform(rows) if scaled else rows)
+    np.testing.assert_allclose(compiled.predict(rows), expected, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose([compiled.predict(row)[0] for row in rows[-30:]], expected[-30:],
+                               rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize('scaled', [True, False])
+def test_hist_gradient_boosting_parity(scaled):
+    X, y = features(2000)
+    scaler = StandardScaler().fit(X) if scaled else None
+    model = HistGradientBoostingRegressor(max_iter=50, random_state=42)
+    model.fit(scaler.transform(X) if scaled else X, y)
+    compiled = CompiledForest.from_hist_gradient_boosting(model, scaler)
+
+    rows = parity_rows(compiled, features(500, seed=2)[0])
+    expected = model.predict(scaler.transform(rows) if scaled else rows)
+    np.testing.assert_allclose(compiled.predict(rows), expected, rtol=1e-12, atol=1e-9)
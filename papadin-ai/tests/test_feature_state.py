@@ -0,0 +1,48 @@
+# papadin-ai/tests/test_feature_state.py
+"""Feature store reads come with the snapshot version they were built from"""
+
+import threading
+
+from feature_state import FeatureStateStore
+from stock_cache import StockSnapshot
+
+OUTLET = 'outlet000@papadin.com'
+
+
+def record(item, day, order=10):
+    return {
+        'id': f"{item}-{day}", 'outlet': OUTLET, 'item': item, 'unit': 'PCS',
+        'tarikh': f"2025-01-{day:02d}", 'stockIn': order, 'baki': 0, 'order': order
+    }
+
+
+def test_rows_and_version_come_from_one_snapshot():
+    store = FeatureStateStore()
+    first = [record(f"item{i:04d}", 1) for i in range(5)]
+    store.on_sync(OUTLET, StockSnapshot(first, 1, None), first, [], True)
+    rows, version = store.latest_rows(OUTLET)
+    assert (len(rows), version) == (5, 1)
+
+    # The cache publishes version 2 before its listeners run: until the
+    # store has applied it, reads still report version 1
+    added = [record(f"item{i:04d}", 2) for i in range(5, 2005)]
+    second = StockSnapshot(first + added, 2, None)
+    assert store.version(OUTLET) == 1
+
+    seen = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            rows, version = store.latest_rows(OUTLET)
+            seen.append((len(rows), version))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    store.on_sync(OUTLET, second, added, [], False)
+    done.set()
+    reader.join()
+
+    assert set(seen) <= {(5, 1), (2005, 2)}
+    histories, version = store.histories(OUTLET, 3)
+    assert (len(histories), version) == (2005, 2)
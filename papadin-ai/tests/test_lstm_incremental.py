@@ -0,0 +1,68 @@
+# papadin-ai/tests/test_lstm_incremental.py
+"""Incremental LSTM fine-tuning picks up every record it has not trained on"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_stock_records
+from lstm_predictor import LSTMTrainer
+from stock_table import StockTable
+
+START = date(2025, 1, 1)
+LATE_DAY = 30
+
+
+def test_late_back_dated_records_are_fine_tuned_on(tmp_path):
+    records = make_stock_records(n_outlets=2, n_items=5, days=40, start=START)
+    late_day = (START + timedelta(days=LATE_DAY)).isoformat()
+    on_time = [record for record in records if record['tarikh'] != late_day]
+
+    trainer = LSTMTrainer()
+    trainer.train(StockTable.from_records(on_time), epochs=1, save=False)
+    trainer.save_model(str(tmp_path), export=False)
+
+    # The day-30 reports arrive after training, older than trained_through
+    fine_tuner = LSTMTrainer()
+    fine_tuner.load_model(str(tmp_path))
+    assert fine_tuner.trained_through.date() == START + timedelta(days=39)
+    table = StockTable.from_records(records)
+    metrics = fine_tuner.train(table, epochs=1, save=False, incremental=True, replay_ratio=0)
+
+    # Every sequence whose window or target holds a late record: targets
+    # from day 30 to day 30 + sequence_length (the last day is 39), per item
+    new_sequences = 10 * (39 - LATE_DAY + 1)
+    assert metrics['mode'] == 'incremental'
+    assert metrics['train_samples'] + metrics['val_samples'] + metrics['test_samples'] == new_sequences
+
+    with pytest.raises(ValueError, match="No new records"):
+        fine_tuner.train(table, epochs=1, save=False, incremental=True)
+
+
+def test_near_keeps_flagged_rows_and_their_neighbours_per_group():
+    records = make_stock_records(n_outlets=1, n_items=3, days=10, start=START)
+    table = StockTable.from_records(records)
+    flagged = np.zeros(len(table), dtype=bool)
+    flagged[[5, 12]] = True  # day 5 of item 0, day 2 of item 1
+
+    near = table.near(flagged, before_rows=2, after_rows=1)
+    kept = [(row.item, row.tarikh.day - 1) for row in near.frame.itertuples()]
+    assert kept == [('item0000', 3), ('item0000', 4), ('item0000', 5), ('item0000', 6),
+                    ('item0001', 0), ('item0001', 1), ('item0001', 2), ('item0001', 3)]
+    assert near.n_groups == 2
+    assert len(table.near(np.zeros(len(table), dtype=bool), 5, 5)) == 0
+
+
+def test_replay_reservoir_stays_bounded_and_uniform():
+    trainer = LSTMTrainer()
+    trainer.REPLAY_SIZE = 100
+    for batch in range(20):
+        X = np.full((50, 2, 1), batch, dtype=np.float32)
+        trainer._update_replay(X, np.full(50, batch, dtype=np.float64))
+
+    assert len(trainer.replay_X) == len(trainer.replay_y) == 100
+    assert trainer.replay_seen == 1000
+    # Each batch is 5% of everything seen: no batch should dominate
+    counts = np.bincount(trainer.replay_y.astype(int), minlength=20)
+    assert counts.max() <= 20 and (counts > 0).sum() >= 12
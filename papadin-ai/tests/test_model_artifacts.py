@@ -0,0 +1,121 @@
+# papadin-ai/tests/test_model_artifacts.py
+"""Models saved as memory-mapped artifacts load back to the same predictions"""
+
+import os
+
+import numpy as np
+import pytest
+
+from anomaly_detector import StockAnomalyDetector
+from benchmarks.synthetic import make_stock_records
+from lstm_predictor import LSTMTrainer
+from lstm_runtime import LSTMRuntime
+from ml_model import StockPredictor
+from model_artifacts import read_artifact, write_artifact
+from stock_table import StockTable
+
+
+@pytest.fixture(scope='module')
+def table():
+    return StockTable.from_records(make_stock_records(n_outlets=3, n_items=10, days=40))
+
+
+def lstm_recents(trainer, table):
+    window = trainer.sequence_length + trainer.LOOKBACK
+    return [group.frame.tail(window).reset_index(drop=True) for _, group in table.groups()]
+
+
+def test_overwriting_a_mapped_artifact_keeps_its_readers_valid(tmp_path):
+    path = str(tmp_path / "model.bin")
+    write_artifact(path, {'weights': np.arange(1 << 16, dtype=np.float64)}, {'version': 1})
+    arrays, meta = read_artifact(path)
+
+    # Shorter than the mapped file: rewriting it in place would fault
+    write_artifact(path, {'weights': np.zeros(8)}, {'version': 2})
+    assert arrays['weights'][-1] == (1 << 16) - 1
+    assert meta == {'version': 1}
+    assert read_artifact(path)[1] == {'version': 2}
+    assert os.listdir(tmp_path) == ['model.bin']
+
+
+def test_stock_predictor_round_trip_and_save_over_loaded(table, tmp_path):
+    predictor = StockPredictor()
+    predictor.train(table, save=False)
+    predictor.save_model(str(tmp_path))
+    latest = predictor.latest_features(table)
+    expected = predictor.predict_quantities(latest)
+
+    loaded = StockPredictor()
+    loaded.load_model(str(tmp_path))
+    np.testing.assert_array_equal(loaded.predict_quantities(latest), expected)
+
+    # Fine-tune the loaded model and save it where it was mapped from
+    loaded.train(table, save=False, incremental=True)
+    updated = loaded.predict_quantities(latest)
+    loaded.save_model(str(tmp_path))
+    np.testing.assert_array_equal(loaded.predict_quantities(latest), updated)
+
+    reloaded = StockPredictor()
+    reloaded.load_model(str(tmp_path))
+    np.testing.assert_array_equal(reloaded.predict_quantities(latest), updated)
+
+
+def test_lstm_round_trip_and_save_over_loaded(table, tmp_path):
+    trainer = LSTMTrainer()
+    trainer.train(table, epochs=1, save=False)
+    trainer.save_model(str(tmp_path))
+    recents = lstm_recents(trainer, table)
+    expected = trainer.predict_batch(recents)
+
+    loaded = LSTMTrainer()
+    loaded.load_model(str(tmp_path))
+    np.testing.assert_array_equal(loaded.predict_batch(recents), expected)
+    np.testing.assert_array_equal(loaded.replay_X, trainer.replay_X)
+    assert loaded.trained_through == trainer.trained_through
+
+    # The loaded weights are the mapped arrays themselves (assign=True)
+    loaded.save_model(str(tmp_path))
+    np.testing.assert_array_equal(loaded.predict_batch(recents), expected)
+
+    reloaded = LSTMTrainer()
+    reloaded.load_model(str(tmp_path))
+    np.testing.assert_array_equal(reloaded.predict_batch(recents), expected)
+
+
+def test_lstm_serves_through_its_exported_graph(table, tmp_path):
+    trainer = LSTMTrainer()
+    trainer.train(table, epochs=1, save=False)
+    recents = lstm_recents(trainer, table)
+    eager = trainer.predict_batch(recents)
+
+    graph_dir, plain_dir = str(tmp_path / "graph"), str(tmp_path / "plain")
+    trainer.save_model(graph_dir)
+    served = LSTMRuntime(graph_dir).predict_batch(recents)
+    np.testing.assert_array_equal(trainer.predict_batch(recents), served)
+    assert np.abs(served - eager).max() <= 1  # float32 graph vs eager, rounded
+
+    loaded = LSTMTrainer()
+    loaded.load_model(graph_dir)
+    np.testing.assert_array_equal(loaded.predict_batch(recents), served)
+
+    # Fine-tuning changes the weights, so it stops serving the old graph
+    loaded.train(table, epochs=1, save=False)
+    assert loaded.runtime is None
+    loaded.save_model(plain_dir, export=False)
+    plain = LSTMTrainer()
+    plain.load_model(plain_dir)
+    assert plain.runtime is None
+    np.testing.assert_array_equal(plain.predict_batch(recents), loaded.predict_batch(recents))
+
+
+def test_anomaly_detector_round_trip(table, tmp_path):
+    detector = StockAnomalyDetector()
+    detector.train(table, save=False)
+    detector.save_model(str(tmp_path))
+    assert os.listdir(tmp_path) == ['detector.bin']
+
+    loaded = StockAnomalyDetector()
+    loaded.load_model(str(tmp_path))
+    X = detector.scaler.transform(detector.prepare_features(table)[detector.features])
+    np.testing.assert_array_equal(loaded.model.score_samples(X), detector.model.score_samples(X))
+    assert loaded.detect(table) == detector.detect(table)
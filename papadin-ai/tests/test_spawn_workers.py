@@ -0,0 +1,44 @@
+# papadin-ai/tests/test_spawn_workers.py
+"""
+Training and backtest pools spawn workers that re-run the main module;
+with the service started as `python app.py`, that is app.py itself, and
+its serving setup (caches, warm-up threads, model loading) must not run
+in the workers
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('torch', 'sklearn', 'cv2', 'openai', 'lstm_predictor', 'ml_model')
+
+
+def probe():
+    """What a spawned worker has loaded once it is ready for work"""
+    main = sys.modules['__mp_main__']
+    return {
+        'main_file': getattr(main, '__file__', None),
+        'stock_cache': getattr(main, 'stock_cache', 'missing'),
+        'threads': sorted(thread.name for thread in threading.enumerate()),
+        'modules': sorted(name for name in HEAVY_MODULES if name in sys.modules)
+    }
+
+
+def test_spawned_workers_skip_serving_setup(monkeypatch, tmp_path):
+    # Make this process look like `python app.py` to multiprocessing
+    main = sys.modules['__main__']
+    monkeypatch.setattr(main, '__file__', os.path.join(AI_DIR, 'app.py'), raising=False)
+    monkeypatch.setattr(main, '__spec__', None, raising=False)
+    monkeypatch.setenv('WARMUP_BACKENDS', 'all')
+    monkeypatch.setenv('MODEL_REGISTRY_DIR', str(tmp_path))
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        report = pool.submit(probe).result(timeout=120)
+
+    assert report['main_file'] == os.path.join(AI_DIR, 'app.py')
+    assert report['stock_cache'] is None
+    assert not {'model-warmup', 'backend-warmup'} & set(report['threads'])
+    assert report['modules'] == []
@@ -0,0 +1,121 @@
+# papadin-ai/tests/test_stock_cache.py
+"""Delta sync of the stock caches against a fake /get-stock"""
+
+import itertools
+
+import stock_cache
+from stock_cache import PartitionedStockCache, StockSnapshotCache
+
+
+class FakeStockBackend:
+    """
+    stokOutlet + stokOutletDeleted with the server's write rules: writes
+    stamp updatedAt, deletes and outlet moves leave a tombstone keyed by id
+    """
+
+    def __init__(self):
+        self.clock = itertools.count(1)
+        self.records = {}
+        self.tombstones = {}
+        self.fetches = []
+
+    def put(self, record_id, outlet, order):
+        previous = self.records.get(record_id)
+        if previous is not None and previous['outlet'] != outlet:
+            self.tombstones[record_id] = {'outlet': previous['outlet'], 'deletedAt': next(self.clock)}
+        self.records[record_id] = {
+            'id': record_id, 'outlet': outlet, 'item': 'item0', 'unit': 'PCS',
+            'tarikh': '2025-01-01', 'stockIn': order, 'baki': 0, 'order': order,
+            'updatedAt': next(self.clock)
+        }
+
+    def delete(self, record_id):
+        record = self.records.pop(record_id)
+        self.tombstones[record_id] = {'outlet': record['outlet'], 'deletedAt': next(self.clock)}
+
+    def fetch(self, outlet=None, since=None):
+        self.fetches.append(since)
+        synced_at = next(self.clock)
+        data = [dict(r) for r in self.records.values()
+                if (outlet is None or r['outlet'] == outlet) and (since is None or r['updatedAt'] > since)]
+        body = {'data': data, 'syncedAt': synced_at}
+        if since is not None:
+            body['deleted'] = [record_id for record_id, t in self.tombstones.items()
+                               if (outlet is None or t['outlet'] == outlet) and t['deletedAt'] > since]
+        return body
+
+
+def ids(snapshot):
+    return sorted(record['id'] for record in snapshot.records)
+
+
+def test_record_moved_between_outlets():
+    backend = FakeStockBackend()
+    backend.put('r1', 'a@papadin.com', 5)
+    backend.put('r2', 'a@papadin.com', 7)
+    outlets = PartitionedStockCache(backend.fetch, ttl=0, full_resync_interval=1e9)
+    everything = StockSnapshotCache(backend.fetch, ttl=0, full_resync_interval=1e9)
+    assert ids(outlets.get('a@papadin.com')) == ['r1', 'r2']
+    assert ids(outlets.get('b@papadin.com')) == []
+    assert ids(everything.get()) == ['r1', 'r2']
+
+    # Delta syncs only from here on
+    backend.put('r1', 'b@papadin.com', 5)
+    assert ids(outlets.get('a@papadin.com')) == ['r2']
+    assert ids(outlets.get('b@papadin.com')) == ['r1']
+    assert ids(everything.get()) == ['r1', 'r2']
+
+    # And back: the old tombstone must not hide it
+    backend.put('r1', 'a@papadin.com', 6)
+    assert ids(outlets.get('a@papadin.com')) == ['r1', 'r2']
+    assert ids(outlets.get('b@papadin.com')) == []
+    assert [r['order'] for r in outlets.get('a@papadin.com').records if r['id'] == 'r1'] == [6]
+
+
+def test_first_get_and_invalidate_sync_on_a_young_clock(monkeypatch):
+    # A host up for 5 s: monotonic() is below the ttl
+    monkeypatch.setattr(stock_cache.time, 'monotonic', lambda: 5.0)
+    backend = FakeStockBackend()
+    backend.put('r1', 'a@papadin.com', 5)
+    cache = StockSnapshotCache(backend.fetch, ttl=30)
+    outlets = PartitionedStockCache(backend.fetch, ttl=30)
+
+    assert ids(cache.get()) == ['r1']
+    assert ids(outlets.get('a@papadin.com')) == ['r1']
+    assert len(backend.fetches) == 2
+
+    # Fresh within the ttl, until invalidated
+    backend.put('r2', 'a@papadin.com', 7)
+    assert ids(cache.get()) == ['r1']
+    cache.invalidate()
+    outlets.invalidate('a@papadin.com')
+    assert ids(cache.get()) == ['r1', 'r2']
+    assert ids(outlets.get('a@papadin.com')) == ['r1', 'r2']
+
+
+def test_delta_sync_applies_changes_and_deletions():
+    backend = FakeStockBackend()
+    for record_id, order in (('r1', 5), ('r2', 7), ('r3', 9)):
+        backend.put(record_id, 'a@papadin.com', order)
+    cache = StockSnapshotCache(backend.fetch, ttl=0, full_resync_interval=1e9)
+    syncs = []
+    cache.on_change(lambda snapshot, changed, removed, full: syncs.append(
+        (snapshot.version, sorted(r['id'] for r in changed), sorted(r['id'] for r in removed), full)
+    ))
+
+    first = cache.get()
+    assert ids(first) == ['r1', 'r2', 'r3'] and backend.fetches == [None]
+
+    # Nothing changed: same snapshot, no new version
+    assert cache.get() is first
+
+    backend.put('r2', 'a@papadin.com', 8)
+    backend.put('r4', 'a@papadin.com', 1)
+    backend.delete('r3')
+    second = cache.get()
+    assert ids(second) == ['r1', 'r2', 'r4']
+    assert [r['order'] for r in second.records if r['id'] == 'r2'] == [8]
+    assert second.version > first.version
+    assert all(since is not None for since in backend.fetches[1:])
+    assert syncs == [(first.version, ['r1', 'r2', 'r3'], [], True),
+                     (second.version, ['r2', 'r4'], ['r2', 'r3'], False)]
@@ -0,0 +1,45 @@
+# papadin-ai/tests/test_training_jobs.py
+"""De-duplication of training jobs by model and options"""
+
+import threading
+import time
+
+import pytest
+
+from training_jobs import JobConflict, TrainingJobQueue
+
+
+def blocked_job(release):
+    def train(progress, **options):
+        release.wait(5)
+        return options
+    return train
+
+
+def test_same_options_share_a_job_and_other_options_conflict():
+    queue = TrainingJobQueue(max_workers=1)
+    release = threading.Event()
+    train = blocked_job(release)
+    try:
+        job, created = queue.submit('lstm', train, epochs=50, horizon=7)
+        assert created
+
+        again, created = queue.submit('lstm', train, horizon=7, epochs=50)
+        assert again is job and not created
+
+        with pytest.raises(JobConflict) as conflict:
+            queue.submit('lstm', train, epochs=50, horizon=1)
+        assert conflict.value.job is job
+
+        # Another model is a separate job, whatever its options
+        other, created = queue.submit('random_forest', train, epochs=50, horizon=1)
+        assert created and other is not job
+    finally:
+        release.set()
+    while queue.depth():
+        time.sleep(0.01)
+
+    assert job.to_dict()['metrics'] == {'epochs': 50, 'horizon': 7}
+    # Finished jobs no longer block a run with other options
+    _, created = queue.submit('lstm', train, epochs=50, horizon=1)
+    assert created
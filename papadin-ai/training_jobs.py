@@ -0,0 +1,149 @@
+# papadin-ai/training_jobs.py
+"""
+Background training jobs
+Runs model training on its own executor so request threads return
+immediately; clients poll /ml/jobs/<id> for progress and final metrics
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TrainingJob:
+    """
+    Status of one training run
+
+    status: queued -> running -> succeeded | failed
+    """
+
+    def __init__(self, model, options=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.model = model
+        self.options = options or {}
+        self.status = 'queued'
+        self.progress = {'stage': 'queued'}
+        self.metrics = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+
+    def update(self, **progress):
+        """Progress callback handed to the trainer (stage, epoch, loss, ...)"""
+        with self._lock:
+            self.progress = {**self.progress, **progress}
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'job_id': self.id,
+                'model': self.model,
+                'options': self.options,
+                'status': self.status,
+                'progress': dict(self.progress),
+                'metrics': self.metrics,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'elapsed_seconds': round((self.finished_at or time.time()) - (self.started_at or time.time()), 2)
+            }
+
+
+class JobConflict(Exception):
+    """A job for the same model is already active with different options"""
+
+    def __init__(self, job):
+        super().__init__(f"Another {job.model} job is already {job.status} with different options: {job.id}")
+        self.job = job
+
+
+class TrainingJobQueue:
+    """
+    Executor for training jobs with per-model de-duplication
+
+    Args:
+        max_workers: concurrent training jobs (kept low so training doesn't
+            starve the prediction threads)
+        history: finished jobs kept for polling
+    """
+
+    def __init__(self, max_workers=1, history=100):
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='train')
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._active = {}
+
+    def submit(self, model, fn, *args, **kwargs):
+        """
+        Queue fn(*args, progress=job.update, **kwargs) as a training job
+
+        Returns (job, created); if a job for the same model is already
+        queued or running with the same kwargs, that job is returned with
+        created=False, and with other kwargs JobConflict is raised (one
+        model's runs would otherwise race to publish)
+        """
+        options = dict(sorted(kwargs.items()))
+        with self._lock:
+            existing = self._active.get(model)
+            if existing is not None and existing.active:
+                if existing.options != options:
+                    raise JobConflict(existing)
+                return existing, False
+
+            job = TrainingJob(model, options)
+            self._jobs[job.id] = job
+            self._active[model] = job
+            self._trim()
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job, True
+
+    def _run(self, job, fn, args, kwargs):
+        with job._lock:
+            job.status = 'running'
+            job.started_at = time.time()
+        job.update(stage='starting')
+
+        try:
+            metrics = fn(*args, progress=job.update, **kwargs)
+            with job._lock:
+                job.metrics = metrics
+                job.status = 'succeeded'
+            job.update(stage='done')
+        except Exception as e:
+            traceback.print_exc()
+            with job._lock:
+                job.error = str(e)
+                job.status = 'failed'
+            job.update(stage='failed')
+        finally:
+            with job._lock:
+                job.finished_at = time.time()
+            with self._lock:
+                if self._active.get(job.model) is job:
+                    del self._active[job.model]
+
+    def _trim(self):
+        """Drop the oldest finished jobs beyond `history`"""
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def depth(self):
+        """Jobs queued or running"""
+        with self._lock:
+            return len(self._active)
@@ -0,0 +1,9 @@
+# papadin-ai/wsgi.py
+"""
+gunicorn entry point (gunicorn wsgi:app): the app plus its serving-only
+setup, which importing app.py alone does not run
+"""
+
+from app import app, init_serving
+
+init_serving()
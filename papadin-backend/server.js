@@ -29,6 +29,18 @@ admin.initializeApp({
 
 const db = admin.firestore();
 
+// Python AI backend, told to drop cached predictions when stock changes
+const AI_BACKEND_URL = process.env.AI_BACKEND_URL || "http://localhost:5000";
+
+function notifyStockChanged(outlet) {
+  // Fire-and-forget: a missed notification only delays freshness until the cache TTL
+  fetch(`${AI_BACKEND_URL}/cache/invalidate`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ outlet: outlet || null }),
+  }).catch((error) => console.warn("AI cache invalidation failed:", error.message));
+}
+
 // Root route
 app.get("/", (req, res) => {
   res.json({ message: "Papadin backend is alive!", status: "running" });
@@ -56,13 +68,60 @@ app.get("/test-firestore", async (req, res) => {
   }
 });
 
-// Get all stock data
+// Get stock data
+// Optional filters, all pushed down into the Firestore query:
+//   ?outlet=<email>&item=<name>   equality filters
+//   ?from=YYYY-MM-DD&to=YYYY-MM-DD   tarikh range (inclusive)
+//   ?since=<ISO timestamp>   only records written after that time, plus the
+//                            ids deleted (or moved to another outlet) since
+//                            then, for incremental sync; an id can be in both
+//                            lists, and then the record still exists
+// outlet/item combined with since need composite indexes on
+// (outlet, updatedAt) / (outlet, item, updatedAt).
 app.get("/get-stock", async (req, res) => {
-  console.log("GET /get-stock triggered");
+  console.log("GET /get-stock triggered", req.query);
   try {
-    const snapshot = await db.collection("stokOutlet").get();
+    // Stamp before querying so writes racing with this request are picked up next sync
+    const syncedAt = new Date();
+    const { since, outlet, item, from, to } = req.query;
+
+    let query = db.collection("stokOutlet");
+    if (outlet) query = query.where("outlet", "==", outlet);
+    if (item) query = query.where("item", "==", item);
+
+    const inDateRange = (record) =>
+      (!from || record.tarikh >= from) && (!to || record.tarikh <= to);
+
+    if (since) {
+      const sinceDate = new Date(since);
+      if (Number.isNaN(sinceDate.getTime())) {
+        return res.status(400).json({ success: false, error: "Invalid 'since' timestamp" });
+      }
+
+      let deletedQuery = db.collection("stokOutletDeleted");
+      if (outlet) deletedQuery = deletedQuery.where("outlet", "==", outlet);
+
+      const [changedSnap, deletedSnap] = await Promise.all([
+        query.where("updatedAt", ">", sinceDate).get(),
+        deletedQuery.where("deletedAt", ">", sinceDate).get(),
+      ]);
+
+      // Deltas are small, so the tarikh range is applied here rather than as a
+      // second inequality field in the query
+      const data = changedSnap.docs
+        .map((doc) => ({ id: doc.id, ...doc.data() }))
+        .filter(inDateRange);
+      const deleted = deletedSnap.docs.map((doc) => doc.id);
+
+      return res.json({ success: true, data, deleted, syncedAt: syncedAt.toISOString() });
+    }
+
+    if (from) query = query.where("tarikh", ">=", from);
+    if (to) query = query.where("tarikh", "<=", to);
+
+    const snapshot = await query.get();
     if (snapshot.empty) {
-      return res.json({ success: true, data: [] });
+      return res.json({ success: true, data: [], syncedAt: syncedAt.toISOString() });
     }
 
     const data = snapshot.docs.map((doc) => ({
@@ -70,7 +129,7 @@ app.get("/get-stock", async (req, res) => {
       ...doc.data(),
     }));
 
-    res.json({ success: true, data });
+    res.json({ success: true, data, syncedAt: syncedAt.toISOString() });
   } catch (error) {
     console.error("Error fetching stock:", error);
     res.status(500).json({ success: false, error: "Failed to fetch stock from Firestore." });
@@ -87,6 +146,7 @@ app.post("/add-stock", async (req, res) => {
     }
 
     const stokCollection = db.collection("stokOutlet");
+    const now = new Date();
 
     for (const item of items) {
       await stokCollection.add({
@@ -98,10 +158,12 @@ app.post("/add-stock", async (req, res) => {
         baki: Number(item.baki) || 0,
         order: Number(item.order) || 0,
         remark: item.remark || "",
-        createdAt: new Date(),
+        createdAt: now,
+        updatedAt: now,
       });
     }
 
+    notifyStockChanged(outlet);
     res.json({ success: true, message: "Stock report saved successfully!" });
   } catch (error) {
     console.error("Error adding stock:", error);
@@ -124,6 +186,8 @@ app.put("/update-stock/:id", async (req, res) => {
       return res.status(404).json({ success: false, error: "Record not found" });
     }
 
+    const previousOutlet = docSnapshot.data().outlet;
+
     await stokRef.update({
       tarikh,
       outlet,
@@ -136,6 +200,16 @@ app.put("/update-stock/:id", async (req, res) => {
       updatedAt: new Date(),
     });
 
+    // Moved to another outlet: tombstone it for the old outlet's incremental
+    // syncs (?outlet=<old>&since=), which no longer see the record
+    if (previousOutlet && previousOutlet !== outlet) {
+      await db.collection("stokOutletDeleted").doc(id).set({
+        outlet: previousOutlet,
+        deletedAt: new Date(),
+      });
+      notifyStockChanged(previousOutlet);
+    }
+    notifyStockChanged(outlet);
     res.json({ success: true, message: "Stock updated successfully!" });
   } catch (error) {
     console.error("Error updating stock:", error);
@@ -156,7 +230,15 @@ app.delete("/delete-stock/:id", async (req, res) => {
       return res.status(404).json({ success: false, error: "Record not found" });
     }
 
+    const { outlet } = docSnapshot.data();
+
+    // Leave a tombstone so incremental /get-stock?since= clients drop the record
+    await db.collection("stokOutletDeleted").doc(id).set({
+      outlet: outlet || "",
+      deletedAt: new Date(),
+    });
     await stokRef.delete();
+    notifyStockChanged(outlet);
     res.json({ success: true, message: "Stock deleted successfully!" });
   } catch (error) {
     console.error("Error deleting stock:", error);
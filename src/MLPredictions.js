@@ -56,6 +56,17 @@ function MLPredictions({ user }) {
     }
   };
 
+  const waitForJob = async (jobId) => {
+    while (true) {
+      const response = await fetch(`${ML_BACKEND}/ml/jobs/${jobId}`);
+      const job = await response.json();
+      if (!job.success || (job.status !== "queued" && job.status !== "running")) {
+        return job;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+    }
+  };
+
   const trainModel = async () => {
     setIsTraining(true);
     setError(null);
@@ -68,13 +79,21 @@ function MLPredictions({ user }) {
       
       const data = await response.json();
       
-      if (data.success) {
+      if (!data.success) {
+        setError(data.error || "Training failed");
+        return;
+      }
+
+      // Training runs as a background job; poll until it finishes
+      const job = await waitForJob(data.job_id);
+
+      if (job.status === "succeeded") {
         alert("✅ Model trained successfully!\n\n" + 
-              `Accuracy: ${data.metrics?.accuracy || 'N/A'}%\n` +
-              `Training samples: ${data.metrics?.training_samples || 'N/A'}`);
+              `Accuracy: ${job.metrics?.accuracy || 'N/A'}%\n` +
+              `Training samples: ${job.metrics?.training_samples || 'N/A'}`);
         checkModelStatus();
       } else {
-        setError(data.error || "Training failed");
+        setError(job.error || "Training failed");
       }
     } catch (err) {
       console.error("Training error:", err);